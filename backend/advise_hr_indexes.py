@@ -0,0 +1,97 @@
+"""
+Advise HR Indexes
+
+This script replays the SQL the LLM generated for HR Analytics questions
+(stored in the SQL cache) or SQL from a file, runs EXPLAIN QUERY PLAN on
+each query, and prints the queries that scan hr_data or build temp B-trees
+together with a ranked list of recommended composite/covering indexes.
+
+Usage:
+  python advise_hr_indexes.py                      # replay the SQL cache
+  python advise_hr_indexes.py --file queries.sql   # queries separated by ';'
+  python advise_hr_indexes.py --limit 5 --json advice.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.hr_db import hr_db
+    from app.services.query_advisor import query_advisor
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.hr_db import hr_db
+    from backend.app.services.query_advisor import query_advisor
+
+
+def load_cached_queries(path: str) -> list:
+    """Load the generated SQL stored in the SQL cache"""
+    if not os.path.exists(path):
+        print(f"SQL cache not found at {path}")
+        return []
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("SELECT sql FROM sql_cache")]
+    except sqlite3.Error as e:
+        print(f"Error reading SQL cache: {str(e)}")
+        return []
+    finally:
+        conn.close()
+
+
+def load_file_queries(path: str) -> list:
+    """Load ';'-separated queries from a file"""
+    with open(path) as f:
+        return [query.strip() for query in f.read().split(";") if query.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend indexes for the SQL run against hr_data")
+    parser.add_argument("--file", help="Read queries from this file instead of the SQL cache")
+    parser.add_argument("--limit", type=int, default=10, help="Number of slow queries and recommendations to show")
+    parser.add_argument("--json", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    queries = load_file_queries(args.file) if args.file else load_cached_queries(settings.SQL_CACHE_PATH)
+    if not queries:
+        print("No queries to analyze")
+        return
+
+    failed = 0
+    for query in queries:
+        try:
+            hr_db.execute_query(query, use_cache=False, observer=query_advisor.observe)
+        except Exception as e:
+            failed += 1
+            print(f"Skipping query that failed: {str(e)}")
+
+    report = query_advisor.report(args.limit)
+    print(f"Analyzed {len(queries) - failed} queries: {report['full_scan_queries']} full scans, "
+          f"{report['temp_btree_queries']} temp B-trees")
+
+    print("\nSlowest scanning queries:")
+    for item in report["slow_queries"]:
+        print(f"  {item['avg_ms']:>9.3f} ms  {'; '.join(item['full_scans'] + item['temp_btrees'])}")
+        print(f"               {item['query'][:160]}")
+        if item["like_columns"] or item["function_columns"]:
+            print(f"               not indexable: {', '.join(item['like_columns'] + item['function_columns'])}")
+
+    print("\nRecommended indexes:")
+    for rank, item in enumerate(report["recommendations"], start=1):
+        print(f"  {rank}. {item['create_statement']}")
+        if item["covering_statement"]:
+            print(f"     covering: {item['covering_statement']}")
+        print(f"     serves {item['queries']} queries ({item['executions']} runs, {item['total_ms']:.1f} ms total)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
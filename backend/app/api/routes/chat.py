@@ -1,30 +1,43 @@
 from typing import List, Any
+import json
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 # Handle imports for both direct and package execution
 try:
-    from app.db.database import get_db
-    from app.services.auth import get_current_user
+    from app.db.database import get_db, get_async_db, AsyncSessionLocal
+    from app.services.auth import get_current_user, aget_current_user
     from app.services.chat import (
         get_user_conversations, create_conversation, get_conversation_by_id,
         get_conversation_messages, create_message, generate_ai_response,
         update_conversation_title, delete_conversation, get_conversation_by_id_str,
-        get_conversation_history
+        get_conversation_history, aget_conversation_by_id_str, acreate_conversation,
+        acreate_message, aget_conversation_history, agenerate_ai_response,
+        aget_or_create_chat_conversation, fallback_ai_response
     )
+    from app.services.hr_analytics import astream_hr_analytics_query
+    from app.services.stage_metrics import trace_request, span
+    from app.services.llm_usage import usage_scope
     from app.schemas.conversation import Conversation, ConversationCreate, ConversationWithMessages
     from app.schemas.message import Message, MessageCreate
     from app.models.user import User
 except ImportError:
-    from backend.app.db.database import get_db
-    from backend.app.services.auth import get_current_user
+    from backend.app.db.database import get_db, get_async_db, AsyncSessionLocal
+    from backend.app.services.auth import get_current_user, aget_current_user
     from backend.app.services.chat import (
         get_user_conversations, create_conversation, get_conversation_by_id,
         get_conversation_messages, create_message, generate_ai_response,
         update_conversation_title, delete_conversation, get_conversation_by_id_str,
-        get_conversation_history
+        get_conversation_history, aget_conversation_by_id_str, acreate_conversation,
+        acreate_message, aget_conversation_history, agenerate_ai_response,
+        aget_or_create_chat_conversation, fallback_ai_response
     )
+    from backend.app.services.hr_analytics import astream_hr_analytics_query
+    from backend.app.services.stage_metrics import trace_request, span
+    from backend.app.services.llm_usage import usage_scope
     from backend.app.schemas.conversation import Conversation, ConversationCreate, ConversationWithMessages
     from backend.app.schemas.message import Message, MessageCreate
     from backend.app.models.user import User
@@ -237,60 +250,107 @@ class ChatResponse(BaseModel):
 
 # Send a message and get AI response
 @router.post("/chat", response_model=ChatResponse)
-def chat(
+async def chat(
     message_in: MessageCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(aget_current_user)
 ) -> Any:
     """
     Send a message and get AI response.
     """
-    # Determine the conversation
-    conversation = None
-    conversation_id_str = message_in.conversation_id
-
-    if conversation_id_str:
-        # Try to get existing conversation by UUID
-        conversation = get_conversation_by_id_str(db, conversation_id_str)
-        if not conversation:
-            # If not found, create a new conversation
-            # Use the first part of the message as the title (up to 50 chars)
-            title = message_in.content[:50] + ("..." if len(message_in.content) > 50 else "")
-            new_conversation = ConversationCreate(title=title)
-            conversation = create_conversation(db, new_conversation, current_user.id)
-            conversation_id_str = conversation.conversation_id
-        elif conversation.user_id != current_user.id:
-            # Check permissions
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
-    else:
-        # Create a new conversation
-        # Use the first part of the message as the title (up to 50 chars)
-        title = message_in.content[:50] + ("..." if len(message_in.content) > 50 else "")
-        new_conversation = ConversationCreate(title=title)
-        conversation = create_conversation(db, new_conversation, current_user.id)
+    with trace_request("chat"):
+        # Determine the conversation
+        with span("load_conversation"):
+            conversation = await aget_or_create_chat_conversation(db, message_in, current_user.id)
         conversation_id_str = conversation.conversation_id
 
-    # Ensure the role is 'user'
-    message_in.role = "user"
+        # Ensure the role is 'user'
+        message_in.role = "user"
 
-    # Save the user message
-    user_message = create_message(db, message_in, conversation_id_str)
+        # Save the user message
+        with span("save_user_message"):
+            user_message = await acreate_message(db, message_in, conversation_id_str)
 
-    # Get conversation history for context
-    conversation_history = get_conversation_history(db, conversation_id_str)
+        # Attribute the LLM calls (history summary, SQL, answer, analysis) to this user and conversation
+        with usage_scope(current_user.id, conversation_id_str):
+            # Get conversation history for context
+            with span("load_history"):
+                conversation_history = await aget_conversation_history(db, conversation_id_str)
 
-    # Generate AI response with conversation history
-    ai_response_text = generate_ai_response(message_in.content, conversation_history)
+            # Generate AI response with conversation history
+            with span("generate_response"):
+                ai_response_text = await agenerate_ai_response(message_in.content, conversation_history)
 
-    # Create AI response message
-    ai_message_in = MessageCreate(
-        role="assistant",
-        content=ai_response_text
-    )
-    ai_message = create_message(db, ai_message_in, conversation_id_str)
+        # Create AI response message
+        ai_message_in = MessageCreate(
+            role="assistant",
+            content=ai_response_text
+        )
+        with span("save_ai_message"):
+            ai_message = await acreate_message(db, ai_message_in, conversation_id_str)
 
     # Return messages and conversation details
     return {
         "messages": [user_message, ai_message],
         "conversation": conversation
     }
+
+# Format an event for a Server-Sent Events stream
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Send a message and stream the AI response as Server-Sent Events
+@router.post("/chat/stream")
+async def chat_stream(
+    message_in: MessageCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(aget_current_user)
+) -> Any:
+    """
+    Send a message and stream the AI response as Server-Sent Events.
+
+    Events are sent in order: `conversation`, `query`, `result`, one `answer` event
+    per answer token, `analysis`, and finally `done` with the saved assistant message.
+    """
+    # Determine the conversation
+    conversation = await aget_or_create_chat_conversation(db, message_in, current_user.id)
+    conversation_id_str = conversation.conversation_id
+
+    # Ensure the role is 'user'
+    message_in.role = "user"
+
+    # Save the user message
+    user_message = await acreate_message(db, message_in, conversation_id_str)
+
+    # Get conversation history for context
+    with usage_scope(current_user.id, conversation_id_str):
+        conversation_history = await aget_conversation_history(db, conversation_id_str)
+
+    conversation_data = conversation.to_dict()
+    user_message_data = user_message.to_dict()
+
+    async def event_stream():
+        yield format_sse("conversation", {"conversation": conversation_data, "message": user_message_data})
+
+        answer_parts = []
+        with usage_scope(current_user.id, conversation_id_str):
+            async for event in astream_hr_analytics_query(message_in.content, conversation_history):
+                if event["event"] == "answer":
+                    answer_parts.append(event["data"])
+                yield format_sse(event["event"], event["data"])
+
+        # Persist the assistant message once the stream completes; the request
+        # session may already be closed, so use a session owned by the stream
+        ai_message_in = MessageCreate(
+            role="assistant",
+            content="".join(answer_parts) or fallback_ai_response(message_in.content)
+        )
+        async with AsyncSessionLocal() as stream_db:
+            ai_message = await acreate_message(stream_db, ai_message_in, conversation_id_str)
+        yield format_sse("done", {"message": ai_message.to_dict()})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,38 +1,67 @@
 from typing import List, Any, Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 # Handle imports for both direct and package execution
 try:
-    from app.db.database import get_db
-    from app.services.auth import get_current_user
-    from app.services.hr_analytics import process_hr_analytics_query
-    from app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse
+    from app.core.config import settings
+    from app.db.database import get_db, get_async_db
+    from app.services.auth import get_current_user, get_current_admin_user, aget_current_user
+    from app.services.hr_analytics import aprocess_hr_analytics_query, schema_cache, schema_pruning_stats, langchain_pool_stats, text_index_cache, hr_query_flights, llm_breaker, abandoned_llm_calls
+    from app.services.sql_cache import sql_cache
+    from app.services.intent_router import fast_path_stats
+    from app.services.query_advisor import query_advisor
+    from app.services.text_index import text_search_rewriter
+    from app.services.query_budget import budget_stats
+    from app.services.sql_rewriter import sql_rewriter
+    from app.services.stage_metrics import trace_request
+    from app.services.llm_usage import usage_scope, usage_report
+    from app.services.startup_profile import startup_profile
+    from app.services.answer_cache import answer_cache
+    from app.services.cache_warmer import cache_warmer
+    from app.services.hr_db import hr_db, langchain_result_cache
+    from app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse, HRCacheStats, SchemaPruningStats, FastPathStats, HRPoolStats, QueryPlanReport, TextIndexStats, QueryBudgetStats, SQLRewriteStats, CoalescingStats, LLMBreakerStats, LLMUsageReport, StartupProfileReport, CacheWarmupReport
     from app.models.user import User
 except ImportError:
-    from backend.app.db.database import get_db
-    from backend.app.services.auth import get_current_user
-    from backend.app.services.hr_analytics import process_hr_analytics_query
-    from backend.app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse
+    from backend.app.core.config import settings
+    from backend.app.db.database import get_db, get_async_db
+    from backend.app.services.auth import get_current_user, get_current_admin_user, aget_current_user
+    from backend.app.services.hr_analytics import aprocess_hr_analytics_query, schema_cache, schema_pruning_stats, langchain_pool_stats, text_index_cache, hr_query_flights, llm_breaker, abandoned_llm_calls
+    from backend.app.services.sql_cache import sql_cache
+    from backend.app.services.intent_router import fast_path_stats
+    from backend.app.services.query_advisor import query_advisor
+    from backend.app.services.text_index import text_search_rewriter
+    from backend.app.services.query_budget import budget_stats
+    from backend.app.services.sql_rewriter import sql_rewriter
+    from backend.app.services.stage_metrics import trace_request
+    from backend.app.services.llm_usage import usage_scope, usage_report
+    from backend.app.services.startup_profile import startup_profile
+    from backend.app.services.answer_cache import answer_cache
+    from backend.app.services.cache_warmer import cache_warmer
+    from backend.app.services.hr_db import hr_db, langchain_result_cache
+    from backend.app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse, HRCacheStats, SchemaPruningStats, FastPathStats, HRPoolStats, QueryPlanReport, TextIndexStats, QueryBudgetStats, SQLRewriteStats, CoalescingStats, LLMBreakerStats, LLMUsageReport, StartupProfileReport, CacheWarmupReport
     from backend.app.models.user import User
 
 router = APIRouter()
 
 @router.post("/hr-analytics/query", response_model=HRAnalyticsResponse)
-def query_hr_analytics(
+async def query_hr_analytics(
     query_in: HRAnalyticsQuery,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(aget_current_user)
 ) -> Any:
     """
     Process an HR analytics query with conversation history.
     """
     try:
         # Process the query
-        response = process_hr_analytics_query(
-            query=query_in.query,
-            conversation_history=query_in.conversation_history
-        )
+        with trace_request("hr_analytics_query"), usage_scope(current_user.id):
+            response = await aprocess_hr_analytics_query(
+                query=query_in.query,
+                conversation_history=query_in.conversation_history,
+                use_cache=query_in.use_cache
+            )
         
         # Return the response
         return HRAnalyticsResponse(
@@ -46,3 +75,143 @@ def query_hr_analytics(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing HR analytics query: {str(e)}"
         )
+
+@router.get("/hr-analytics/cache/stats", response_model=HRCacheStats)
+def get_cache_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get hit/miss counters for the schema description, generated SQL, query result and answer caches.
+    """
+    return {
+        "schema_description": schema_cache.stats(),
+        "sql": sql_cache.stats(),
+        "results": hr_db.result_cache.stats(),
+        "langchain_results": langchain_result_cache.stats(),
+        "answers": answer_cache.stats()
+    }
+
+@router.get("/hr-analytics/schema-pruning/stats", response_model=SchemaPruningStats)
+def get_schema_pruning_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the prompt-token reduction achieved by question-aware schema pruning.
+    """
+    return schema_pruning_stats.stats()
+
+@router.get("/hr-analytics/fast-path/stats", response_model=FastPathStats)
+def get_fast_path_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the share of HR analytics questions answered by the deterministic fast path without the LLM.
+    """
+    return fast_path_stats.stats()
+
+@router.get("/hr-analytics/pool/stats", response_model=HRPoolStats)
+def get_pool_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get checkout counts and wait times for the HR database connection pools.
+    """
+    return {
+        "hr_db": hr_db.pool.stats(),
+        "langchain": langchain_pool_stats()
+    }
+
+@router.get("/hr-analytics/query-plans", response_model=QueryPlanReport)
+def get_query_plan_report(
+    limit: int = 10,
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Get the executed queries that scan hr_data or build temp B-trees, and the ranked index recommendations (admins only).
+    """
+    return query_advisor.report(limit)
+
+@router.get("/hr-analytics/text-index/stats", response_model=TextIndexStats)
+def get_text_index_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get how many text-search LIKE filters were rewritten into FTS5 index lookups.
+    """
+    return {
+        "enabled": settings.TEXT_INDEX_REWRITE_ENABLED,
+        "exists": bool(text_index_cache.get()),
+        **text_search_rewriter.stats()
+    }
+
+@router.get("/hr-analytics/budget/stats", response_model=QueryBudgetStats)
+def get_budget_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the query execution budget limits and how often generated queries exceeded them.
+    """
+    return budget_stats.stats()
+
+@router.get("/hr-analytics/rewrites/stats", response_model=SQLRewriteStats)
+def get_rewrite_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get how often generated SQL was rewritten or rejected, with the rows and latency of rewritten queries.
+    """
+    return sql_rewriter.stats()
+
+@router.get("/hr-analytics/coalescing/stats", response_model=CoalescingStats)
+def get_coalescing_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get how many HR analytics requests shared an identical request's in-flight execution.
+    """
+    return hr_query_flights.stats()
+
+@router.get("/hr-analytics/breaker/stats", response_model=LLMBreakerStats)
+def get_breaker_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the Azure OpenAI circuit breaker state, its recent failure and slow-call rates and how many requests fell back to the rule-based path.
+    """
+    return {
+        **llm_breaker.stats(),
+        "deadline_seconds": settings.LLM_DEADLINE_SECONDS,
+        "abandoned_calls": abandoned_llm_calls()
+    }
+
+@router.get("/hr-analytics/usage/stats", response_model=LLMUsageReport)
+def get_usage_stats(
+    hours: float = 24.0,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Get LLM token and latency totals and percentiles per stage, user and conversation for the last hours (admins only).
+    """
+    return usage_report(db, hours=hours, limit=limit)
+
+@router.get("/hr-analytics/startup/stats", response_model=StartupProfileReport)
+def get_startup_stats(
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get the cold start broken down by import and initialization step, with when the server was ready and warm.
+    """
+    return startup_profile.report()
+
+@router.get("/hr-analytics/warmup/stats", response_model=CacheWarmupReport)
+def get_warmup_stats(
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+) -> Any:
+    """
+    Get the recent cache warm-up runs, the questions each warmed and how much of the next day's questions they covered (admins only).
+    """
+    return cache_warmer.report(db, limit=limit)
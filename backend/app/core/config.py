@@ -40,10 +40,111 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Emails of the users allowed to read the admin diagnostics (other users' usage, questions and SQL)
+    ADMIN_EMAILS: List[str] = []
+
+    # Conversation history settings
+    HISTORY_TOKEN_BUDGET: int = 1500
+    HISTORY_SUMMARY_MAX_TOKENS: int = 300
+    # Once the window overflows the budget, fold it down to this share of it so the next turns fit without a summary call
+    HISTORY_SUMMARY_TARGET_RATIO: float = 0.5
+
     # Azure OpenAI settings
     API_KEY: str = ""
     AZURE_OPENAI_ENDPOINT: str = ""
 
+    # HR Analytics SQL cache settings
+    SQL_CACHE_ENABLED: bool = True
+    SQL_CACHE_PATH: str = f"{BASE_DIR}/app/db/sql_cache.db"
+    SQL_CACHE_TTL_SECONDS: int = 86400
+    SQL_CACHE_MAX_ENTRIES: int = 1000
+
+    # HR Analytics query result cache settings
+    HR_RESULT_CACHE_ENABLED: bool = True
+    HR_RESULT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # HR Analytics answer cache settings (complete LLM responses, in memory)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 500
+    ANSWER_CACHE_TTL_SECONDS: int = 86400
+
+    # HR Analytics cache warm-up: answer the most frequent past questions at startup and every interval (0 = startup only)
+    CACHE_WARMUP_ENABLED: bool = True
+    CACHE_WARMUP_TOP_N: int = 50
+    CACHE_WARMUP_MIN_COUNT: int = 2
+    CACHE_WARMUP_LOOKBACK_DAYS: int = 7
+    CACHE_WARMUP_LLM_BUDGET: int = 150
+    CACHE_WARMUP_INTERVAL_SECONDS: int = 21600
+
+    # HR Analytics schema description cache settings
+    SCHEMA_CACHE_CHECK_SECONDS: float = 5.0
+    SCHEMA_PRUNING_ENABLED: bool = True
+
+    # HR Analytics database connection pool settings (0 = match the worker threadpool)
+    HR_DB_POOL_SIZE: int = 0
+    HR_DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    HR_DB_POOL_HEALTH_CHECK_SECONDS: float = 30.0
+
+    # HR Analytics database read profile (opt-in): read-only connections tuned for aggregate queries
+    HR_DB_READ_PROFILE: bool = False
+    HR_DB_IMMUTABLE: bool = False
+    HR_DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    HR_DB_CACHE_SIZE_KB: int = 64 * 1024
+
+    # HR Analytics query plan advisor settings
+    QUERY_ADVISOR_ENABLED: bool = True
+    QUERY_ADVISOR_MAX_QUERIES: int = 500
+
+    # HR Analytics query execution budget (per generated query; 0 = no limit)
+    QUERY_BUDGET_ENABLED: bool = True
+    QUERY_BUDGET_MAX_STEPS: int = 100_000_000
+    QUERY_BUDGET_MAX_SECONDS: float = 10.0
+    QUERY_BUDGET_MAX_ROWS: int = 5000
+
+    # HR Analytics SQL rewriter settings (the row cap matches the prompt's top_k)
+    SQL_REWRITE_ENABLED: bool = True
+    SQL_REWRITE_MAX_ROWS: int = 2000
+
+    # HR Analytics FTS5 text index settings
+    TEXT_INDEX_REWRITE_ENABLED: bool = True
+
+    # HR Analytics request coalescing: identical concurrent questions share one execution
+    COALESCE_ENABLED: bool = True
+
+    # HR Analytics deterministic fast path settings
+    FAST_PATH_ENABLED: bool = True
+    FAST_PATH_MIN_CONFIDENCE: float = 0.85
+    FAST_PATH_DEFAULT_YEAR: int = 2024
+
+    # HR Analytics answer/analysis LLM call settings (each call is bounded by LLM_DEADLINE_SECONDS)
+    LLM_PARALLEL_ENABLED: bool = True
+    LLM_PARALLEL_WORKERS: int = 16
+
+    # Azure OpenAI latency SLO and circuit breaker: a call past the deadline, or any call while the breaker is
+    # open, is answered by the rule-based SQL path instead (each call is a single attempt, never retried)
+    LLM_DEADLINE_SECONDS: float = 20.0
+    LLM_BREAKER_ENABLED: bool = True
+    LLM_BREAKER_WINDOW: int = 20
+    LLM_BREAKER_MIN_CALLS: int = 5
+    LLM_BREAKER_FAILURE_RATE: float = 0.5
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    LLM_BREAKER_SLOW_CALL_RATE: float = 0.8
+    LLM_BREAKER_OPEN_SECONDS: float = 30.0
+    LLM_BREAKER_HALF_OPEN_CALLS: int = 2
+
+    # LLM token and latency accounting (written to the llm_usage table by a background writer)
+    LLM_USAGE_ENABLED: bool = True
+    LLM_USAGE_QUEUE_SIZE: int = 10000
+    LLM_USAGE_BATCH_SIZE: int = 200
+    LLM_USAGE_FLUSH_SECONDS: float = 2.0
+
+    # Per-stage timing metrics exported on /metrics
+    METRICS_ENABLED: bool = True
+
+    # HR Analytics resources (LangChain, the LLM client, schema caches) are created on first use;
+    # warm-up creates them in a background thread right after startup instead
+    HR_ANALYTICS_WARMUP: bool = True
+
     # Configure environment variables
     if PYDANTIC_V2:
         model_config = {"env_file": ".env"}
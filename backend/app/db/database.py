@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 # Handle imports for both direct and package execution
 try:
     from app.core.config import settings
@@ -15,6 +16,13 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async SQLAlchemy engine backed by aiosqlite
+ASYNC_DATABASE_URL = settings.DATABASE_URL.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+
+# Create AsyncSessionLocal class; objects stay usable after commit for response serialization
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -25,3 +33,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,14 +1,15 @@
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 
 # Handle imports for both direct and package execution
 try:
     from app.db.database import Base, engine
-    from app.models import User, Conversation, Message
+    from app.models import User, Conversation, Message, LLMUsage
     from app.schemas.user import UserCreate
     from app.services.auth import create_user
 except ImportError:
     from backend.app.db.database import Base, engine
-    from backend.app.models import User, Conversation, Message
+    from backend.app.models import User, Conversation, Message, LLMUsage
     from backend.app.schemas.user import UserCreate
     from backend.app.services.auth import create_user
 
@@ -29,5 +30,21 @@ def init_db():
     #     )
     #     create_user(db, admin)
 
+# Bring an existing database up to date without dropping data
+def upgrade_db():
+    # Create any tables that don't exist yet
+    Base.metadata.create_all(bind=engine)
+
+    # Add columns introduced after the tables were created
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    print(f"Added column {table.name}.{column.name}")
+
 if __name__ == "__main__":
     init_db()
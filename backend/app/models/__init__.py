@@ -4,8 +4,10 @@ try:
     from app.models.conversation import Conversation
     from app.models.message import Message
     from app.models.hr_analytics import HRData
+    from app.models.llm_usage import LLMUsage
 except ImportError:
     from backend.app.models.user import User
     from backend.app.models.conversation import Conversation
     from backend.app.models.message import Message
     from backend.app.models.hr_analytics import HRData
+    from backend.app.models.llm_usage import LLMUsage
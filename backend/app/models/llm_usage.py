@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    user_id = Column(Integer, index=True, nullable=True)
+    conversation_id = Column(String, index=True, nullable=True)
+    stage = Column(String)  # 'sql', 'answer', 'analysis' or 'summary'
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    latency_ms = Column(Float)
+    # Token counts estimated from the text when the API didn't report usage (streamed answers)
+    estimated = Column(Boolean, default=False)
@@ -3,9 +3,9 @@ try:
     from app.schemas.user import User, UserCreate, UserLogin, Token, TokenPayload
     from app.schemas.conversation import Conversation, ConversationCreate, ConversationWithMessages
     from app.schemas.message import Message, MessageCreate
-    from app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse, HRData
+    from app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse, SQLCacheStats, ResultCacheStats, AnswerCacheStats, SchemaCacheStats, HRCacheStats, SchemaPruningStats, FastPathStats, ConnectionPoolStats, HRPoolStats, SlowQueryPlan, IndexRecommendation, QueryPlanReport, TextIndexStats, BudgetBreach, QueryBudgetStats, SQLRewriteRuleStats, SQLRewriteEntry, SQLRewriteStats, CoalescingStats, LLMBreakerStats, LLMUsageGroup, LLMUsageRecorderStats, LLMUsageReport, StartupStep, StartupProfileReport, CacheWarmupQuestion, CacheWarmupCoverage, CacheWarmupRun, CacheWarmupReport, HRData
 except ImportError:
     from backend.app.schemas.user import User, UserCreate, UserLogin, Token, TokenPayload
     from backend.app.schemas.conversation import Conversation, ConversationCreate, ConversationWithMessages
     from backend.app.schemas.message import Message, MessageCreate
-    from backend.app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse, HRData
+    from backend.app.schemas.hr_analytics import HRAnalyticsQuery, HRAnalyticsResponse, SQLCacheStats, ResultCacheStats, AnswerCacheStats, SchemaCacheStats, HRCacheStats, SchemaPruningStats, FastPathStats, ConnectionPoolStats, HRPoolStats, SlowQueryPlan, IndexRecommendation, QueryPlanReport, TextIndexStats, BudgetBreach, QueryBudgetStats, SQLRewriteRuleStats, SQLRewriteEntry, SQLRewriteStats, CoalescingStats, LLMBreakerStats, LLMUsageGroup, LLMUsageRecorderStats, LLMUsageReport, StartupStep, StartupProfileReport, CacheWarmupQuestion, CacheWarmupCoverage, CacheWarmupRun, CacheWarmupReport, HRData
@@ -1,11 +1,12 @@
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-from datetime import date
+from datetime import date, datetime
 
 # Base HR Analytics Query
 class HRAnalyticsQuery(BaseModel):
     query: str
     conversation_history: Optional[List[Dict[str, str]]] = []
+    use_cache: bool = True
 
 # HR Analytics Response
 class HRAnalyticsResponse(BaseModel):
@@ -14,6 +15,312 @@ class HRAnalyticsResponse(BaseModel):
     result: Optional[str] = None
     analysis: Optional[str] = None
 
+# SQL Cache Statistics
+class SQLCacheStats(BaseModel):
+    enabled: bool
+    version: str
+    entries: int
+    max_entries: int
+    ttl_seconds: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    hit_rate: float
+
+# Query Result Cache Statistics
+class ResultCacheStats(BaseModel):
+    enabled: bool
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    hit_rate: float
+
+# Answer Cache Statistics
+class AnswerCacheStats(BaseModel):
+    enabled: bool
+    entries: int
+    max_entries: int
+    ttl_seconds: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+    hit_rate: float
+
+# Schema Description Cache Statistics
+class SchemaCacheStats(BaseModel):
+    version: Optional[int] = None
+    hits: int
+    builds: int
+    last_build_seconds: float
+    total_build_seconds: float
+    built_at: Optional[float] = None
+    length: int
+
+# Combined HR Analytics Cache Statistics
+class HRCacheStats(BaseModel):
+    schema_description: SchemaCacheStats
+    sql: SQLCacheStats
+    results: ResultCacheStats
+    langchain_results: ResultCacheStats
+    answers: AnswerCacheStats
+
+# Schema Pruning Statistics
+class SchemaPruningStats(BaseModel):
+    enabled: bool
+    prompts: int
+    full_schema_tokens: int
+    pruned_schema_tokens: int
+    tokens_saved: int
+    reduction: float
+    avg_columns_selected: float
+
+# Deterministic Fast Path Statistics
+class FastPathStats(BaseModel):
+    enabled: bool
+    min_confidence: float
+    questions: int
+    served: int
+    declined: int
+    errors: int
+    served_share: float
+    intents: Dict[str, int]
+    decline_reasons: Dict[str, int]
+
+# HR Database Connection Pool Statistics
+class ConnectionPoolStats(BaseModel):
+    name: str
+    size: int
+    connections: int
+    checkouts: int
+    checkins: int
+    in_use: int
+    peak_in_use: int
+    timeouts: int
+    discarded: int = 0
+    avg_wait_ms: float
+    max_wait_ms: float
+
+class HRPoolStats(BaseModel):
+    hr_db: ConnectionPoolStats
+    langchain: Optional[ConnectionPoolStats] = None
+
+# Query Plan Advisor Report
+class SlowQueryPlan(BaseModel):
+    query: str
+    count: int
+    avg_ms: float
+    max_ms: float
+    full_scans: List[str]
+    temp_btrees: List[str]
+    like_columns: List[str]
+    function_columns: List[str]
+
+class IndexRecommendation(BaseModel):
+    columns: List[str]
+    covering_columns: List[str]
+    create_statement: str
+    covering_statement: str
+    queries: int
+    executions: int
+    total_ms: float
+    example: str
+
+class QueryPlanReport(BaseModel):
+    enabled: bool
+    observations: int
+    distinct_queries: int
+    full_scan_queries: int
+    temp_btree_queries: int
+    explain_errors: int
+    slow_queries: List[SlowQueryPlan]
+    recommendations: List[IndexRecommendation]
+
+# FTS5 Text Index Rewrite Statistics
+class TextIndexStats(BaseModel):
+    enabled: bool
+    exists: bool
+    queries: int
+    rewritten_queries: int
+    rewritten_predicates: int
+    skipped_predicates: int
+
+# Query Execution Budget Breach
+class BudgetBreach(BaseModel):
+    limit: str
+    query: str
+    steps: int
+    elapsed_ms: float
+    rows: int
+    at: float
+
+# Query Execution Budget Statistics
+class QueryBudgetStats(BaseModel):
+    enabled: bool
+    max_steps: int
+    max_seconds: float
+    max_rows: int
+    queries: int
+    breaches: int
+    breaches_by_limit: Dict[str, int]
+    max_steps_seen: int
+    max_seconds_seen: float
+    max_rows_seen: int
+    recent_breaches: List[BudgetBreach]
+
+# SQL Rewrite Rule Statistics
+class SQLRewriteRuleStats(BaseModel):
+    count: int
+    avg_rows: Optional[float] = None
+    avg_ms: Optional[float] = None
+    removed_columns: int = 0
+
+# Logged SQL Rewrite
+class SQLRewriteEntry(BaseModel):
+    original: str
+    rewritten: str
+    rules: List[str]
+    rows: Optional[int] = None
+    latency_ms: Optional[float] = None
+    at: float
+
+# SQL Rewriter Statistics
+class SQLRewriteStats(BaseModel):
+    enabled: bool
+    max_rows: int
+    queries: int
+    rewritten: int
+    rejected: int
+    rejections: Dict[str, int]
+    rules: Dict[str, SQLRewriteRuleStats]
+    recent: List[SQLRewriteEntry]
+
+# Request Coalescing Statistics
+class CoalescingStats(BaseModel):
+    name: str
+    enabled: bool
+    requests: int
+    executions: int
+    coalesced: int
+    coalesced_share: float
+    errors: int
+    in_flight: int
+    max_shared: int
+
+# LLM Circuit Breaker Statistics
+class LLMBreakerStats(BaseModel):
+    name: str
+    enabled: bool
+    state: str
+    retry_in_seconds: Optional[float] = None
+    window_calls: int
+    window_failure_rate: float
+    window_slow_call_rate: float
+    calls: int
+    failures: int
+    slow_calls: int
+    rejected: int
+    opened: int
+    fallbacks: int
+    deadline_seconds: float
+    abandoned_calls: int
+
+# LLM Usage Totals for a Stage, User or Conversation
+class LLMUsageGroup(BaseModel):
+    key: str
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    latency_ms: float
+    p50_latency_ms: float
+    p95_latency_ms: float
+    p99_latency_ms: float
+    p50_tokens: float
+    p95_tokens: float
+
+# LLM Usage Writer Statistics
+class LLMUsageRecorderStats(BaseModel):
+    enabled: bool
+    recorded: int
+    written: int
+    pending: int
+    dropped: int
+    write_errors: int
+
+# LLM Usage Report
+class LLMUsageReport(BaseModel):
+    hours: float
+    total: LLMUsageGroup
+    stages: List[LLMUsageGroup]
+    users: List[LLMUsageGroup]
+    conversations: List[LLMUsageGroup]
+    recorder: LLMUsageRecorderStats
+
+# Timed Startup Step
+class StartupStep(BaseModel):
+    name: str
+    kind: str
+    started_ms: float
+    duration_ms: float
+    thread: str
+
+# Startup Profile Report
+class StartupProfileReport(BaseModel):
+    ready_ms: Optional[float] = None
+    warmed_ms: Optional[float] = None
+    import_ms: float
+    init_ms: float
+    warmup_ms: float
+    steps: List[StartupStep]
+
+# Warmed Question
+class CacheWarmupQuestion(BaseModel):
+    question: str
+    count: int
+    status: str
+    path: Optional[str] = None
+    llm_calls: int
+
+# Next-Day Traffic Coverage of a Warm-Up Run
+class CacheWarmupCoverage(BaseModel):
+    window_start: datetime
+    window_end: datetime
+    complete: bool
+    questions: int
+    first_questions: int
+    covered: int
+    coverage: float
+
+# Cache Warm-Up Run
+class CacheWarmupRun(BaseModel):
+    started_at: datetime
+    duration_ms: float
+    questions: int
+    warmed: int
+    cached: int
+    failed: int
+    skipped: int
+    llm_calls: int
+    llm_budget: int
+    coverage: CacheWarmupCoverage
+    top_questions: List[CacheWarmupQuestion]
+
+# Cache Warm-Up Report
+class CacheWarmupReport(BaseModel):
+    enabled: bool
+    top_n: int
+    lookback_days: int
+    llm_budget: int
+    interval_seconds: int
+    runs: List[CacheWarmupRun]
+
 # HR Data Schema
 class HRDataBase(BaseModel):
     month: Optional[str] = None
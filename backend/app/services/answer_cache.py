@@ -0,0 +1,115 @@
+"""
+Answer Cache Service
+
+This module caches the complete response (SQL, result, answer and analysis)
+of HR Analytics questions answered with the LLM, so a repeated question with
+the same conversation history is served without any LLM call. Entries are
+kept in memory, expire after a TTL and are dropped when the HR data changes.
+The cache warmer fills it with the most frequent questions ahead of traffic.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.hr_db import hr_db
+    from app.services.sql_cache import normalize_question, fingerprint
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.hr_db import hr_db
+    from backend.app.services.sql_cache import normalize_question, fingerprint
+
+
+class AnswerCache:
+    """In-memory LRU cache of complete HR Analytics responses with TTL expiry"""
+
+    def __init__(self, version: Callable[[], Any], max_entries: int = None, ttl_seconds: int = None):
+        """Initialize an empty cache invalidated whenever version() changes"""
+        self.version = version
+        self.max_entries = max_entries if max_entries is not None else settings.ANSWER_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.ANSWER_CACHE_TTL_SECONDS
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Dict[str, str], float]]" = OrderedDict()
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, question: str, conversation_history: str = "") -> str:
+        """Build the cache key from the normalized question and the history"""
+        raw = "|".join([normalize_question(question), fingerprint(conversation_history)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _check_version(self) -> None:
+        """Drop all entries if the underlying data changed"""
+        version = self.version()
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """Return a copy of the cached response for a key, or None on a miss"""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            response, created_at = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(response)
+
+    def set(self, key: str, response: Dict[str, str]) -> None:
+        """Store a response, evicting the least recently used entries"""
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (dict(response), time.time())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.ANSWER_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# Create a singleton instance; answers go stale whenever the HR data changes
+answer_cache = AnswerCache(version=hr_db.result_cache.data_version)
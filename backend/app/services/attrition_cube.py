@@ -0,0 +1,236 @@
+"""
+Attrition Cube Service
+
+This module maintains hr_attrition_cube, a pre-aggregated table of the sums
+behind the attrition formula (SUM(Overall_Inactive_Count) / SUM(Count)) for
+every Year/Month/Department/Location/Band/Process/Gender combination.
+
+Triggers on hr_data keep the cube in sync as rows are inserted, updated or
+deleted, and refresh_cube() backfills or repairs months whose contents differ
+and recreates the triggers if hr_data was dropped and recreated. The cube is
+only used while its triggers exist.
+"""
+
+import sqlite3
+from typing import Dict, List, Set, Tuple
+
+CUBE_TABLE = "hr_attrition_cube"
+
+# Dimensions the attrition formula is filtered by, with the value stored for NULLs
+DIMENSIONS = [
+    ("year", "INTEGER", "0"),
+    ("month", "TEXT", "''"),
+    ("department", "TEXT", "''"),
+    ("location", "TEXT", "''"),
+    ("band", "TEXT", "''"),
+    ("process", "TEXT", "''"),
+    ("gender", "TEXT", "''"),
+]
+
+# Measures summed from hr_data: (cube column, hr_data column)
+MEASURES = [
+    ("headcount", "count"),
+    ("attrited", "overall_inactive_count"),
+    ("active", "active_count"),
+    ("new_hires", "new_hire"),
+]
+
+# Guidance added to the SQL prompt when the cube exists
+CUBE_PROMPT_NOTE = f"""
+/*
+{CUBE_TABLE} holds monthly sums of hr_data per year, month, department, location, band, process and gender:
+headcount = SUM(Count), attrited = SUM(Overall_Inactive_Count), active = SUM(Active_Count), new_hires = SUM(New_Hire).
+Missing dimension values are stored as '' (or 0 for year).
+PREFER {CUBE_TABLE} over hr_data for attrition rate, attrited and headcount questions that only filter or group
+by those dimensions: Attrition Percentage = SUM(attrited) * 100.0 / SUM(headcount).
+Use hr_data only when other columns (names, managers, reasons, tenure, age, ...) are needed.
+*/"""
+
+# Table definition and guidance added to schema descriptions that don't include the cube
+CUBE_TABLE_INFO = f"""
+CREATE TABLE {CUBE_TABLE} (
+	year INTEGER, 
+	month TEXT, 
+	department TEXT, 
+	location TEXT, 
+	band TEXT, 
+	process TEXT, 
+	gender TEXT, 
+	headcount INTEGER, 
+	attrited INTEGER, 
+	active INTEGER, 
+	new_hires INTEGER, 
+	row_count INTEGER
+)
+""" + CUBE_PROMPT_NOTE
+
+
+def describe_cube(table_info: str) -> str:
+    """Add the cube's description to a schema description, without repeating its definition"""
+    if f"CREATE TABLE {CUBE_TABLE}" in table_info:
+        return table_info + "\n" + CUBE_PROMPT_NOTE
+    return table_info + "\n" + CUBE_TABLE_INFO
+
+
+def _dimension_values(row: str) -> List[str]:
+    """Return the dimension expressions of a trigger row (NEW or OLD) with NULLs replaced"""
+    return [f"IFNULL({row}.{name}, {default})" for name, _, default in DIMENSIONS]
+
+
+def _dimension_match(row: str) -> str:
+    """Return a WHERE clause matching the cube row of a trigger row (NEW or OLD)"""
+    return " AND ".join(
+        f"{name} = {value}" for (name, _, _), value in zip(DIMENSIONS, _dimension_values(row))
+    )
+
+
+def _add_statement(row: str) -> str:
+    """Return an upsert adding a trigger row's measures to the cube"""
+    dims = ", ".join(name for name, _, _ in DIMENSIONS)
+    measures = ", ".join(name for name, _ in MEASURES)
+    values = ", ".join(_dimension_values(row) + [f"IFNULL({row}.{source}, 0)" for _, source in MEASURES])
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name, _ in MEASURES)
+    return (
+        f"INSERT INTO {CUBE_TABLE} ({dims}, {measures}, row_count) VALUES ({values}, 1) "
+        f"ON CONFLICT ({dims}) DO UPDATE SET {updates}, row_count = row_count + 1;"
+    )
+
+
+def _remove_statements(row: str) -> str:
+    """Return statements subtracting a trigger row's measures from the cube"""
+    updates = ", ".join(f"{name} = {name} - IFNULL({row}.{source}, 0)" for name, source in MEASURES)
+    match = _dimension_match(row)
+    return (
+        f"UPDATE {CUBE_TABLE} SET {updates}, row_count = row_count - 1 WHERE {match};\n"
+        f"    DELETE FROM {CUBE_TABLE} WHERE row_count <= 0 AND {match};"
+    )
+
+
+def create_cube(conn: sqlite3.Connection) -> None:
+    """Create the cube table and the triggers that keep it in sync with hr_data"""
+    dims = ", ".join(f"{name} {sql_type} NOT NULL DEFAULT {default}" for name, sql_type, default in DIMENSIONS)
+    measures = ", ".join(f"{name} INTEGER NOT NULL DEFAULT 0" for name, _ in MEASURES)
+    key = ", ".join(name for name, _, _ in DIMENSIONS)
+
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {CUBE_TABLE} ({dims}, {measures}, "
+        f"row_count INTEGER NOT NULL DEFAULT 0, PRIMARY KEY ({key}))"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_insert AFTER INSERT ON hr_data BEGIN\n"
+        f"    {_add_statement('NEW')}\nEND"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_delete AFTER DELETE ON hr_data BEGIN\n"
+        f"    {_remove_statements('OLD')}\nEND"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {CUBE_TABLE}_update AFTER UPDATE ON hr_data BEGIN\n"
+        f"    {_remove_statements('OLD')}\n    {_add_statement('NEW')}\nEND"
+    )
+    conn.commit()
+
+
+def drop_cube(conn: sqlite3.Connection) -> None:
+    """Drop the cube table and its triggers"""
+    for action in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {CUBE_TABLE}_{action}")
+    conn.execute(f"DROP TABLE IF EXISTS {CUBE_TABLE}")
+    conn.commit()
+
+
+def _cube_select() -> str:
+    """Return the SELECT aggregating hr_data into cube rows, without its GROUP BY"""
+    dim_values = ", ".join(f"IFNULL({name}, {default})" for name, _, default in DIMENSIONS)
+    sums = ", ".join(f"SUM(IFNULL({source}, 0))" for _, source in MEASURES)
+    return f"SELECT {dim_values}, {sums}, COUNT(*) FROM hr_data"
+
+
+def _group_by() -> str:
+    """Return the GROUP BY of the dimensions in _cube_select()"""
+    return ", ".join(str(i) for i in range(1, len(DIMENSIONS) + 1))
+
+
+def _rows_by_month(rows) -> Dict[Tuple[int, str], Set[tuple]]:
+    """Group cube rows (dimensions, measures, row count) by their (year, month)"""
+    months: Dict[Tuple[int, str], Set[tuple]] = {}
+    for row in rows:
+        months.setdefault((row[0], row[1]), set()).add(tuple(row))
+    return months
+
+
+def missing_triggers(conn: sqlite3.Connection) -> List[str]:
+    """Return the cube's maintenance triggers that don't exist, e.g. because hr_data was dropped and recreated"""
+    names = [f"{CUBE_TABLE}_{action}" for action in ("insert", "delete", "update")]
+    existing = {
+        name for (name,) in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'hr_data' "
+            f"AND name IN ({', '.join('?' for _ in names)})", names
+        )
+    }
+    return [name for name in names if name not in existing]
+
+
+def stale_months(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """Return the (year, month) pairs whose cube rows differ from hr_data's sums, not just its row counts"""
+    dims = ", ".join(name for name, _, _ in DIMENSIONS)
+    measures = ", ".join(name for name, _ in MEASURES)
+    source = _rows_by_month(conn.execute(f"{_cube_select()} GROUP BY {_group_by()}"))
+    cube = _rows_by_month(conn.execute(f"SELECT {dims}, {measures}, row_count FROM {CUBE_TABLE}"))
+    return sorted(key for key in set(source) | set(cube) if source.get(key) != cube.get(key))
+
+
+def refresh_cube(conn: sqlite3.Connection, full: bool = False) -> List[Tuple[int, str]]:
+    """Recompute the cube for new or changed months (or every month with full=True)"""
+    missing = missing_triggers(conn)
+    if missing and not full:
+        print(f"Recreating missing {CUBE_TABLE} triggers: {', '.join(missing)}")
+    create_cube(conn)
+
+    if full:
+        conn.execute(f"DELETE FROM {CUBE_TABLE}")
+        months = None
+    else:
+        months = stale_months(conn)
+        if not months:
+            return []
+
+    dims = ", ".join(name for name, _, _ in DIMENSIONS)
+    measures = ", ".join(name for name, _ in MEASURES)
+    group_by = _group_by()
+    select = _cube_select()
+
+    if months is None:
+        conn.execute(f"INSERT INTO {CUBE_TABLE} ({dims}, {measures}, row_count) {select} GROUP BY {group_by}")
+    else:
+        for year, month in months:
+            conn.execute(f"DELETE FROM {CUBE_TABLE} WHERE year = ? AND month = ?", (year, month))
+            conn.execute(
+                f"INSERT INTO {CUBE_TABLE} ({dims}, {measures}, row_count) {select} "
+                f"WHERE IFNULL(year, 0) = ? AND IFNULL(month, '') = ? GROUP BY {group_by}",
+                (year, month)
+            )
+    conn.commit()
+
+    if months is None:
+        months = [tuple(row) for row in conn.execute(f"SELECT DISTINCT year, month FROM {CUBE_TABLE}")]
+    return months
+
+
+def cube_exists(db_path: str) -> bool:
+    """Check whether the cube table exists in the HR database and is still kept in sync by its triggers"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CUBE_TABLE,)
+        ).fetchone()
+        if row is None:
+            return False
+        missing = missing_triggers(conn)
+        if missing:
+            # hr_data was recreated without them, so the cube may be stale until build_attrition_cube.py repairs it
+            print(f"Not using {CUBE_TABLE}: missing triggers {', '.join(missing)}; run build_attrition_cube.py")
+            return False
+        return True
+    finally:
+        conn.close()
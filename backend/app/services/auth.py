@@ -1,6 +1,8 @@
 from typing import Optional
 from datetime import timedelta
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -10,13 +12,13 @@ from pydantic import ValidationError
 try:
     from app.core.config import settings
     from app.core.security import verify_password, get_password_hash, create_access_token, is_token_blacklisted
-    from app.db.database import get_db
+    from app.db.database import get_db, get_async_db
     from app.models.user import User
     from app.schemas.user import UserCreate, TokenPayload
 except ImportError:
     from backend.app.core.config import settings
     from backend.app.core.security import verify_password, get_password_hash, create_access_token, is_token_blacklisted
-    from backend.app.db.database import get_db
+    from backend.app.db.database import get_db, get_async_db
     from backend.app.models.user import User
     from backend.app.schemas.user import UserCreate, TokenPayload
 
@@ -73,10 +75,8 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         return None
     return user
 
-# Get current user from token
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+# Decode and validate an access token
+def decode_token(token: str) -> TokenPayload:
     try:
         # Check if token is blacklisted
         if is_token_blacklisted(token):
@@ -89,13 +89,19 @@ def get_current_user(
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
 
+# Get current user from token
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = decode_token(token)
+
     user = db.query(User).filter(User.id == token_data.sub).first()
     if not user:
         raise HTTPException(
@@ -103,3 +109,28 @@ def get_current_user(
             detail="User not found",
         )
     return user
+
+# Get current user from token, requiring an administrator listed in ADMIN_EMAILS
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    admins = {email.lower() for email in settings.ADMIN_EMAILS}
+    if (current_user.email or "").lower() not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user
+
+# Get current user from token using an async session
+async def aget_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> User:
+    token_data = decode_token(token)
+
+    result = await db.execute(select(User).filter(User.id == token_data.sub))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    return user
@@ -0,0 +1,229 @@
+"""
+Cache Warmer
+
+This module pre-populates the HR Analytics caches before users ask. It mines
+the most frequent first questions of recent conversations from the messages
+table and runs each through the normal pipeline without history, which
+stores the generated SQL (SQL cache), the query result (result cache) and
+the complete response (answer cache), so the first person to ask one of them
+after a deploy or restart gets a cached answer. Each run is capped by an LLM
+call budget; it runs at startup and then on a fixed interval. The report
+shows, for each run, how much of the following day's questions it covered.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from datetime import timedelta
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.db.database import SessionLocal
+    from app.models.message import Message
+    from app.services.hr_analytics import process_hr_analytics_query, count_llm_calls
+    from app.services.sql_cache import normalize_question
+    from app.services.stage_metrics import trace_request
+    from app.services.llm_usage import usage_scope, utc_now
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.db.database import SessionLocal
+    from backend.app.models.message import Message
+    from backend.app.services.hr_analytics import process_hr_analytics_query, count_llm_calls
+    from backend.app.services.sql_cache import normalize_question
+    from backend.app.services.stage_metrics import trace_request
+    from backend.app.services.llm_usage import usage_scope, utc_now
+
+# SQL generation, answer and analysis: the most LLM calls one question can make
+MAX_LLM_CALLS_PER_QUESTION = 3
+
+# Conversation the warm-up's LLM calls are attributed to in the usage report
+WARMUP_CONVERSATION = "cache-warmup"
+
+# Paths that answered a question from what was already cached
+CACHED_PATHS = ("fast_path", "answer_cache")
+
+# Number of past runs kept for the report
+MAX_RUNS = 10
+
+
+def first_message_ids():
+    """Select the id of the first message of every conversation"""
+    return select(func.min(Message.id)).group_by(Message.conversation_id)
+
+
+def top_questions(db: Session, limit: int, days: float, min_count: int = 1) -> List[Tuple[str, int]]:
+    """Return the most frequent first questions of the last days, with how often each was asked"""
+    since = utc_now() - timedelta(days=days)
+    contents = db.execute(
+        select(Message.content).where(
+            Message.role == "user",
+            Message.created_at >= since,
+            Message.id.in_(first_message_ids()),
+        )
+    ).scalars()
+
+    # Count each normalized question, and each phrasing of it so the most common one is warmed
+    counts: Counter = Counter()
+    phrasings: Dict[str, Counter] = {}
+    for content in contents:
+        key = normalize_question(content or "")
+        if key:
+            counts[key] += 1
+            phrasings.setdefault(key, Counter())[content.strip()] += 1
+    return [
+        (phrasings[key].most_common(1)[0][0], count)
+        for key, count in counts.most_common(limit) if count >= min_count
+    ]
+
+
+def next_day_coverage(db: Session, keys: Set[str], since) -> Dict[str, Any]:
+    """Return the share of the questions asked in the day after since that a warm-up run had cached"""
+    until = since + timedelta(days=1)
+    rows = db.execute(
+        select(Message.content, Message.id.in_(first_message_ids())).where(
+            Message.role == "user",
+            Message.created_at >= since,
+            Message.created_at < until,
+        )
+    ).all()
+
+    # Follow-up questions are answered with their conversation's history, so only first questions can hit
+    first_turn = [content for content, is_first in rows if is_first]
+    covered = sum(1 for content in first_turn if normalize_question(content or "") in keys)
+    return {
+        "window_start": since,
+        "window_end": until,
+        "complete": utc_now() >= until,
+        "questions": len(rows),
+        "first_questions": len(first_turn),
+        "covered": covered,
+        "coverage": round(covered / len(rows), 4) if rows else 0.0,
+    }
+
+
+class CacheWarmer:
+    """Answers the most frequent past questions ahead of traffic, at startup and on a schedule"""
+
+    def __init__(self):
+        """Initialize with no runs; the schedule starts with start()"""
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._runs: deque = deque(maxlen=MAX_RUNS)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def warm_question(self, question: str) -> Dict[str, Any]:
+        """Answer one question without history, returning the path that served it and the LLM calls made"""
+        calls: List[str] = []
+        path = None
+        status = "warmed"
+        try:
+            with trace_request("cache_warmup") as trace, count_llm_calls() as calls, usage_scope(conversation_id=WARMUP_CONVERSATION):
+                response = process_hr_analytics_query(question, [])
+                path = trace.path if trace is not None else None
+            if not response.get("answer") or response["answer"].startswith("Error") or path == "degraded":
+                # Nothing was cached: the pipeline failed, or the LLM was down and the rule-based path answered
+                status = "failed"
+            elif path in CACHED_PATHS:
+                status = "cached"
+        except Exception as e:
+            print(f"Error warming HR analytics question '{question}': {str(e)}")
+            status = "failed"
+        return {"status": status, "path": path, "llm_calls": len(calls)}
+
+    def warm(self) -> Dict[str, Any]:
+        """Run one warm-up pass within the LLM budget and return its summary"""
+        with self._run_lock:
+            started_at = utc_now()
+            started = time.perf_counter()
+            with SessionLocal() as db:
+                questions = top_questions(
+                    db, settings.CACHE_WARMUP_TOP_N, settings.CACHE_WARMUP_LOOKBACK_DAYS, settings.CACHE_WARMUP_MIN_COUNT
+                )
+
+            budget = settings.CACHE_WARMUP_LLM_BUDGET
+            llm_calls = 0
+            entries = []
+            for question, count in questions:
+                if llm_calls + MAX_LLM_CALLS_PER_QUESTION > budget:
+                    # Answering it could overspend what is left of the budget
+                    entries.append({"question": question, "count": count, "status": "skipped", "path": None, "llm_calls": 0})
+                    continue
+                outcome = self.warm_question(question)
+                llm_calls += outcome["llm_calls"]
+                entries.append({"question": question, "count": count, **outcome})
+
+            statuses = Counter(entry["status"] for entry in entries)
+            run = {
+                "started_at": started_at,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                "questions": len(entries),
+                "warmed": statuses["warmed"],
+                "cached": statuses["cached"],
+                "failed": statuses["failed"],
+                "skipped": statuses["skipped"],
+                "llm_calls": llm_calls,
+                "llm_budget": budget,
+                "entries": entries,
+                "keys": {normalize_question(entry["question"]) for entry in entries if entry["status"] in ("warmed", "cached")},
+            }
+            with self._lock:
+                self._runs.append(run)
+
+        print(
+            f"Warmed HR analytics caches: {run['warmed']} answered, {run['cached']} already cached, "
+            f"{run['failed']} failed, {run['skipped']} over budget, {llm_calls} LLM calls in {run['duration_ms']:.0f} ms"
+        )
+        return run
+
+    def _run(self) -> None:
+        """Warm up now and then every interval until stopped"""
+        while not self._stop.is_set():
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"Error warming HR analytics caches: {str(e)}")
+            if settings.CACHE_WARMUP_INTERVAL_SECONDS <= 0:
+                return
+            self._stop.wait(settings.CACHE_WARMUP_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """Start the warm-up schedule in a background thread"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the schedule after the run in progress, if any"""
+        self._stop.set()
+
+    def report(self, db: Session, limit: int = 20) -> Dict[str, Any]:
+        """Return the settings and the recent runs, newest first, with the next day's coverage of each"""
+        with self._lock:
+            runs = list(self._runs)
+        return {
+            "enabled": settings.CACHE_WARMUP_ENABLED,
+            "top_n": settings.CACHE_WARMUP_TOP_N,
+            "lookback_days": settings.CACHE_WARMUP_LOOKBACK_DAYS,
+            "llm_budget": settings.CACHE_WARMUP_LLM_BUDGET,
+            "interval_seconds": settings.CACHE_WARMUP_INTERVAL_SECONDS,
+            "runs": [
+                {
+                    **{name: value for name, value in run.items() if name not in ("entries", "keys")},
+                    "coverage": next_day_coverage(db, run["keys"], run["started_at"]),
+                    "top_questions": run["entries"][:limit],
+                }
+                for run in reversed(runs)
+            ],
+        }
+
+# Create a singleton instance
+cache_warmer = CacheWarmer()
@@ -1,5 +1,7 @@
 from typing import List, Optional, Dict
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 import random
 
@@ -9,13 +11,25 @@ try:
     from app.models.message import Message
     from app.schemas.conversation import ConversationCreate
     from app.schemas.message import MessageCreate
-    from app.services.hr_analytics import process_hr_analytics_query
+    from app.core.config import settings
+    from app.services.hr_analytics import (
+        process_hr_analytics_query, aprocess_hr_analytics_query,
+        summarize_conversation, asummarize_conversation
+    )
+    from app.services.stage_metrics import trace_request, set_path
+    from app.utils.tokens import estimate_tokens
 except ImportError:
     from backend.app.models.conversation import Conversation
     from backend.app.models.message import Message
     from backend.app.schemas.conversation import ConversationCreate
     from backend.app.schemas.message import MessageCreate
-    from backend.app.services.hr_analytics import process_hr_analytics_query
+    from backend.app.core.config import settings
+    from backend.app.services.hr_analytics import (
+        process_hr_analytics_query, aprocess_hr_analytics_query,
+        summarize_conversation, asummarize_conversation
+    )
+    from backend.app.services.stage_metrics import trace_request, set_path
+    from backend.app.utils.tokens import estimate_tokens
 
 # Get conversation by conversation_id
 def get_conversation_by_id_str(db: Session, conversation_id: str) -> Optional[Conversation]:
@@ -89,52 +103,215 @@ def create_message(db: Session, message_in: MessageCreate, conversation_id_str:
     db.refresh(db_message)
     return db_message
 
+# Find where the history window starts within the unsummarized messages
+def history_window_start(messages: List[Message], summary: str, token_budget: int) -> int:
+    """Return the index of the oldest message that still fits in the token budget after the summary"""
+    used = estimate_tokens(summary)
+    start = len(messages)
+    while start > 0:
+        tokens = estimate_tokens(f"{messages[start - 1].role.upper()}: {messages[start - 1].content}")
+        # Always keep the latest message, even if it alone exceeds the budget
+        if start < len(messages) and used + tokens > token_budget:
+            break
+        used += tokens
+        start -= 1
+    return start
+
+# Find how many of the oldest unsummarized messages to fold into the summary
+def summary_fold_count(messages: List[Message], summary: str, token_budget: int) -> int:
+    """Return 0 while the window fits in the budget, otherwise the count that shrinks it to the target share of the budget"""
+    if history_window_start(messages, summary, token_budget) == 0:
+        return 0
+    # Leave room for the next few turns instead of summarizing again on every one
+    return history_window_start(messages, summary, int(token_budget * settings.HISTORY_SUMMARY_TARGET_RATIO))
+
+# Format a summary and message window for HR Analytics
+def format_history(summary: str, messages: List[Message]) -> List[Dict[str, str]]:
+    history = [{"role": "summary", "content": summary}] if summary else []
+    for msg in messages:
+        history.append({
+            "role": msg.role,  # 'user' or 'assistant'
+            "content": msg.content
+        })
+    return history
+
 # Get conversation history for a conversation
-def get_conversation_history(db: Session, conversation_id: str, max_messages: int = 10) -> List[Dict[str, str]]:
+def get_conversation_history(db: Session, conversation_id: str, token_budget: int = None) -> List[Dict[str, str]]:
     """Get conversation history in a format suitable for the HR Analytics chatbot"""
+    if token_budget is None:
+        token_budget = settings.HISTORY_TOKEN_BUDGET
+
     # Get the conversation
     conversation = get_conversation_by_id_str(db, conversation_id)
     if not conversation:
         return []
 
-    # Get messages for this conversation
-    messages = db.query(Message).filter(Message.conversation_id == conversation.id).order_by(Message.created_at).limit(max_messages).all()
+    # Get the messages not yet folded into the summary; messages reference the conversation UUID
+    summary = conversation.summary or ""
+    summarized_count = conversation.summarized_message_count or 0
+    messages = db.query(Message).filter(Message.conversation_id == conversation.conversation_id).order_by(Message.created_at, Message.id).offset(summarized_count).all()
 
-    # Format messages for HR Analytics
-    history = []
-    for msg in messages:
-        history.append({
-            "role": msg.role,  # 'user' or 'assistant'
-            "content": msg.content
-        })
+    # Fold messages that no longer fit in the budget into the rolling summary
+    start = summary_fold_count(messages, summary, token_budget)
+    if start > 0:
+        summary = summarize_conversation(summary, format_history("", messages[:start]))
+        folded = db.query(Conversation).filter(
+            Conversation.id == conversation.id,
+            Conversation.summarized_message_count == conversation.summarized_message_count
+        ).update({"summary": summary, "summarized_message_count": summarized_count + start}, synchronize_session=False)
+        if not folded:
+            # A concurrent request folded these messages first; discard this fold and use its summary
+            db.rollback()
+            return get_conversation_history(db, conversation_id, token_budget)
+        db.commit()
 
-    return history
+    return format_history(summary, messages[start:])
 
 # Generate AI response using HR Analytics
 def generate_ai_response(prompt: str, conversation_history: List[Dict[str, str]] = None) -> str:
     """Generate AI response using HR Analytics chatbot"""
-    try:
-        # Use HR Analytics to process the query
-        if conversation_history is None:
-            conversation_history = []
-
-        response = process_hr_analytics_query(prompt, conversation_history)
-
-        # Return the answer
-        if response and response.get("answer"):
-            return response.get("answer")
-
-        # Fallback to default responses if HR Analytics fails
-        raise Exception("HR Analytics processing failed")
-    except Exception as e:
-        print(f"Error generating AI response: {str(e)}")
-        # Fallback responses
-        responses = [
-            f"I understand you're asking about '{prompt}'. Let me analyze the HR data for you.",
-            f"Thanks for your HR analytics query on '{prompt}'. Here's what I found.",
-            f"Regarding '{prompt}', I'll check the HR database for insights.",
-            f"Your HR query about '{prompt}' is important. Let me process that for you.",
-            f"I'm analyzing your HR question about '{prompt}' and will provide the best information available."
-        ]
-
-        return random.choice(responses)
+    with trace_request("generate_ai_response"):
+        try:
+            # Use HR Analytics to process the query
+            if conversation_history is None:
+                conversation_history = []
+
+            response = process_hr_analytics_query(prompt, conversation_history)
+
+            # Return the answer
+            if response and response.get("answer"):
+                return response.get("answer")
+
+            # Fallback to default responses if HR Analytics fails
+            raise Exception("HR Analytics processing failed")
+        except Exception as e:
+            print(f"Error generating AI response: {str(e)}")
+            set_path("fallback")
+            return fallback_ai_response(prompt)
+
+# Fallback response when HR Analytics fails
+def fallback_ai_response(prompt: str) -> str:
+    responses = [
+        f"I understand you're asking about '{prompt}'. Let me analyze the HR data for you.",
+        f"Thanks for your HR analytics query on '{prompt}'. Here's what I found.",
+        f"Regarding '{prompt}', I'll check the HR database for insights.",
+        f"Your HR query about '{prompt}' is important. Let me process that for you.",
+        f"I'm analyzing your HR question about '{prompt}' and will provide the best information available."
+    ]
+
+    return random.choice(responses)
+
+# Async counterparts used by the non-blocking request path
+
+# Get conversation by conversation_id
+async def aget_conversation_by_id_str(db: AsyncSession, conversation_id: str) -> Optional[Conversation]:
+    result = await db.execute(select(Conversation).filter(Conversation.conversation_id == conversation_id))
+    return result.scalars().first()
+
+# Create a new conversation
+async def acreate_conversation(db: AsyncSession, conversation_in: ConversationCreate, user_id: int) -> Conversation:
+    db_conversation = Conversation(
+        user_id=user_id,
+        title=conversation_in.title
+    )
+    db.add(db_conversation)
+    await db.commit()
+    await db.refresh(db_conversation)
+    return db_conversation
+
+# Get the conversation a chat message belongs to, creating one if needed
+async def aget_or_create_chat_conversation(db: AsyncSession, message_in: MessageCreate, user_id: int) -> Conversation:
+    if message_in.conversation_id:
+        # Try to get existing conversation by UUID
+        conversation = await aget_conversation_by_id_str(db, message_in.conversation_id)
+        if conversation:
+            # Check permissions
+            if conversation.user_id != user_id:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+            return conversation
+
+    # Create a new conversation
+    # Use the first part of the message as the title (up to 50 chars)
+    title = message_in.content[:50] + ("..." if len(message_in.content) > 50 else "")
+    return await acreate_conversation(db, ConversationCreate(title=title), user_id)
+
+# Create a new message
+async def acreate_message(db: AsyncSession, message_in: MessageCreate, conversation_id_str: str = None) -> Message:
+    # Get the conversation by UUID
+    conversation_uuid = conversation_id_str or message_in.conversation_id
+
+    if not conversation_uuid:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Conversation ID is required")
+
+    # Get the conversation to ensure it exists
+    conversation = await aget_conversation_by_id_str(db, conversation_uuid)
+    if not conversation:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+
+    db_message = Message(
+        conversation_id=conversation_id_str,
+        role=message_in.role,
+        content=message_in.content
+    )
+    db.add(db_message)
+    await db.commit()
+    await db.refresh(db_message)
+    return db_message
+
+# Get conversation history for a conversation
+async def aget_conversation_history(db: AsyncSession, conversation_id: str, token_budget: int = None) -> List[Dict[str, str]]:
+    """Get conversation history in a format suitable for the HR Analytics chatbot"""
+    if token_budget is None:
+        token_budget = settings.HISTORY_TOKEN_BUDGET
+
+    conversation = await aget_conversation_by_id_str(db, conversation_id)
+    if not conversation:
+        return []
+
+    # Get the messages not yet folded into the summary; messages reference the conversation UUID
+    summary = conversation.summary or ""
+    summarized_count = conversation.summarized_message_count or 0
+    result = await db.execute(
+        select(Message).filter(Message.conversation_id == conversation.conversation_id).order_by(Message.created_at, Message.id).offset(summarized_count)
+    )
+    messages = result.scalars().all()
+
+    # Fold messages that no longer fit in the budget into the rolling summary
+    start = summary_fold_count(messages, summary, token_budget)
+    if start > 0:
+        summary = await asummarize_conversation(summary, format_history("", messages[:start]))
+        folded = await db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation.id,
+                Conversation.summarized_message_count == conversation.summarized_message_count
+            )
+            .values(summary=summary, summarized_message_count=summarized_count + start)
+            .execution_options(synchronize_session=False)
+        )
+        if not folded.rowcount:
+            # A concurrent request folded these messages first; discard this fold and use its summary
+            await db.rollback()
+            return await aget_conversation_history(db, conversation_id, token_budget)
+        await db.commit()
+
+    return format_history(summary, messages[start:])
+
+# Generate AI response using HR Analytics without blocking the event loop
+async def agenerate_ai_response(prompt: str, conversation_history: List[Dict[str, str]] = None) -> str:
+    """Generate AI response using HR Analytics chatbot"""
+    with trace_request("generate_ai_response"):
+        try:
+            if conversation_history is None:
+                conversation_history = []
+
+            response = await aprocess_hr_analytics_query(prompt, conversation_history)
+
+            if response and response.get("answer"):
+                return response.get("answer")
+
+            raise Exception("HR Analytics processing failed")
+        except Exception as e:
+            print(f"Error generating AI response: {str(e)}")
+            set_path("fallback")
+            return fallback_ai_response(prompt)
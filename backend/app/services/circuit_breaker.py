@@ -0,0 +1,152 @@
+"""
+Circuit Breaker
+
+This module protects the request path from a degraded dependency such as
+the Azure OpenAI API. The breaker keeps the outcomes of the most recent
+calls; when enough of them failed, or were slower than the slow-call
+threshold, it opens and callers are refused immediately so they can serve a
+fallback instead of waiting on the dependency. After a cool-down it lets a
+few probe calls through (half-open) and closes again once they succeed.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Failure- and latency-rate circuit breaker over a sliding window of calls"""
+
+    def __init__(self, name: str, window_size: int = None, min_calls: int = None, failure_rate: float = None,
+                 slow_call_seconds: float = None, slow_call_rate: float = None, open_seconds: float = None,
+                 half_open_calls: int = None):
+        """Initialize a closed breaker; unset thresholds come from the LLM_BREAKER_* settings"""
+        self.name = name
+        self.window_size = window_size if window_size is not None else settings.LLM_BREAKER_WINDOW
+        self.min_calls = min_calls if min_calls is not None else settings.LLM_BREAKER_MIN_CALLS
+        self.failure_rate = failure_rate if failure_rate is not None else settings.LLM_BREAKER_FAILURE_RATE
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else settings.LLM_BREAKER_SLOW_CALL_SECONDS
+        self.slow_call_rate = slow_call_rate if slow_call_rate is not None else settings.LLM_BREAKER_SLOW_CALL_RATE
+        self.open_seconds = open_seconds if open_seconds is not None else settings.LLM_BREAKER_OPEN_SECONDS
+        self.half_open_calls = half_open_calls if half_open_calls is not None else settings.LLM_BREAKER_HALF_OPEN_CALLS
+
+        self._lock = threading.Lock()
+        # (failed, slow) for each of the most recent calls
+        self._window: deque = deque(maxlen=self.window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+
+        self.calls = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.opened = 0
+        self.fallbacks = 0
+
+    def _open(self) -> None:
+        """Start refusing calls for the cool-down (lock held)"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.opened += 1
+        print(f"Circuit breaker '{self.name}' opened; refusing calls for {self.open_seconds}s")
+
+    def _half_open(self) -> None:
+        """Let a few probe calls through after the cool-down (lock held)"""
+        self._state = HALF_OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+        self._probe_successes = 0
+
+    def allow(self) -> bool:
+        """Return whether a call may go ahead, counting it as a probe when half-open"""
+        if not settings.LLM_BREAKER_ENABLED:
+            return True
+
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._half_open()
+
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_calls and time.monotonic() - self._opened_at >= self.open_seconds:
+                    # A probe was abandoned (its caller was cancelled) without recording an outcome
+                    self._half_open()
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record(self, seconds: float, ok: bool) -> None:
+        """Record the outcome of a call that was allowed"""
+        slow = seconds > self.slow_call_seconds
+        with self._lock:
+            self.calls += 1
+            self.failures += 0 if ok else 1
+            self.slow_calls += 1 if slow else 0
+            if not settings.LLM_BREAKER_ENABLED or self._state == OPEN:
+                # Calls started before the breaker opened don't affect it
+                return
+
+            if self._state == HALF_OPEN:
+                if not ok or slow:
+                    self._open()
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._state = CLOSED
+                    self._window.clear()
+                    print(f"Circuit breaker '{self.name}' closed")
+                return
+
+            self._window.append((not ok, slow))
+            if len(self._window) < self.min_calls:
+                return
+            failed = sum(1 for failure, _ in self._window if failure) / len(self._window)
+            slowed = sum(1 for _, is_slow in self._window if is_slow) / len(self._window)
+            if failed >= self.failure_rate or slowed >= self.slow_call_rate:
+                self._open()
+
+    def record_fallback(self) -> None:
+        """Count a request served by the caller's fallback"""
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state, the window's failure and slow-call rates and the lifetime counters"""
+        with self._lock:
+            window = len(self._window)
+            retry_in: Optional[float] = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 3)
+            return {
+                "name": self.name,
+                "enabled": settings.LLM_BREAKER_ENABLED,
+                "state": self._state,
+                "retry_in_seconds": retry_in,
+                "window_calls": window,
+                "window_failure_rate": round(sum(1 for failure, _ in self._window if failure) / window, 4) if window else 0.0,
+                "window_slow_call_rate": round(sum(1 for _, slow in self._window if slow) / window, 4) if window else 0.0,
+                "calls": self.calls,
+                "failures": self.failures,
+                "slow_calls": self.slow_calls,
+                "rejected": self.rejected,
+                "opened": self.opened,
+                "fallbacks": self.fallbacks,
+            }
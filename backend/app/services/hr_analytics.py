@@ -1,109 +1,67 @@
 import os
 import sqlite3
 import re
-from typing import Dict, Any, List, Optional
+import asyncio
+from typing import Dict, Any, List, Optional, Set, Tuple, AsyncIterator, Iterator
 from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from sqlalchemy.exc import SQLAlchemyError
 
 # Handle imports for both direct and package execution
 try:
     from app.core.config import settings
-    from app.services.hr_db import hr_db
+    from app.services.hr_db import hr_db, langchain_result_cache, SchemaCache, get_schema_version, get_table_sample, create_hr_engine
+    from app.utils.tokens import estimate_tokens
+    from app.services.attrition_cube import CUBE_TABLE, cube_exists, describe_cube
+    from app.services.sql_cache import sql_cache, normalize_question, fingerprint
+    from app.services.answer_cache import answer_cache
+    from app.services.single_flight import SingleFlight
+    from app.services.circuit_breaker import CircuitBreaker
+    from app.services.stage_metrics import trace_request, span, add_span, set_path, current_trace
+    from app.services.llm_usage import usage_recorder, current_usage_scope
+    from app.services.startup_profile import startup_profile
+    from app.services.query_advisor import query_advisor
+    from app.services.text_index import text_index_exists, text_search_rewriter, is_text_index_table
+    from app.services.query_budget import execution_budget, QueryBudgetExceeded, is_budget_error, budget_answer
+    from app.services.sql_rewriter import sql_rewriter, SQLRewrite, is_rejected_query, rejection_answer
+    from app.services.intent_router import route_question, load_filter_values, format_answer, fast_path_stats
 except ImportError:
     from backend.app.core.config import settings
-    from backend.app.services.hr_db import hr_db
+    from backend.app.services.hr_db import hr_db, langchain_result_cache, SchemaCache, get_schema_version, get_table_sample, create_hr_engine
+    from backend.app.utils.tokens import estimate_tokens
+    from backend.app.services.attrition_cube import CUBE_TABLE, cube_exists, describe_cube
+    from backend.app.services.sql_cache import sql_cache, normalize_question, fingerprint
+    from backend.app.services.answer_cache import answer_cache
+    from backend.app.services.single_flight import SingleFlight
+    from backend.app.services.circuit_breaker import CircuitBreaker
+    from backend.app.services.stage_metrics import trace_request, span, add_span, set_path, current_trace
+    from backend.app.services.llm_usage import usage_recorder, current_usage_scope
+    from backend.app.services.startup_profile import startup_profile
+    from backend.app.services.query_advisor import query_advisor
+    from backend.app.services.text_index import text_index_exists, text_search_rewriter, is_text_index_table
+    from backend.app.services.query_budget import execution_budget, QueryBudgetExceeded, is_budget_error, budget_answer
+    from backend.app.services.sql_rewriter import sql_rewriter, SQLRewrite, is_rejected_query, rejection_answer
+    from backend.app.services.intent_router import route_question, load_filter_values, format_answer, fast_path_stats
 
 # Load environment variables
 from dotenv import load_dotenv
 load_dotenv()
 
-# Initialize LangChain components if available
-try:
-    from langchain_community.utilities import SQLDatabase
-    from langchain_openai import AzureChatOpenAI
-    from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
-    from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate
-    from langchain_core.messages import HumanMessage, SystemMessage
-
-    # Database Configuration
-    DATABASE_URI = settings.HR_DATABASE_URL
-
-    # Initialize database connection
-    try:
-        db = SQLDatabase.from_uri(DATABASE_URI)
-        print("Using LangChain SQLDatabase for HR Analytics")
-        using_langchain = True
-
-        # Initialize query prompt template
-        system_template = """You are a SQL expert. Given an input question and conversation history, create a syntactically correct {dialect} query to run.
-always limit your query to at most {top_k} results using the LIMIT clause.
-Never query for all columns. Only ask for the few relevant columns given the question.
-Pay attention to use only the column names that you can see in the schema description.
-IMPORTANT RULES:
-1. For textual columns (e.g., Employee Name, Manager Name), ALWAYS use the LIKE operator with wildcard '%' for partial matches
-2. Make textual searches case-insensitive using LOWER() function on both column and value
-3. Example: SELECT * FROM table WHERE LOWER(Employee_Name) LIKE LOWER('%john%')
-4. Use CAST instead of CONVERT for data type conversions
-5. Use LIMIT clause for result limiting
-6. Prioritize partial matches over exact matches for textual data
-7. For numerical comparisons, use appropriate mathematical operators (=, >, <, etc.)
-8. Consider previous conversation context when interpreting the current question
-9. Step 1: Count Total Attrited Employees
-Identify the total number of employees who have left the organization (attrited) using the sum(Overall_Inactive) column, match the condition overall_inactive = 1
-Apply all user-specified filters, such as:Department. Location, Band, Process, Gender, Month, Year
-If no filters are provided, Consider all months of the year 2024.
-
-
-Step 2: Calculate Total Headcount
-Determine the total headcount using the sum(Count) column.
-Apply the same user-defined filters as in Step 1.
-
-Step 3: Calculate Attrition Rate
-Use the formula:
-Attrition Percentage =
-(Total Attrited Employees divided by Total Headcount) multiplied by 100.
-
-This gives the percentage of employees who have left the organization relative to the total headcount.
-
-For month-on-month calculations:
-Compute the attrition rate for each month sequentially, Ensure all filters provided by the user are applied without omission.
-If no specific month or year is provided, perform the calculation for each month in sequence.
-
-Step 4: Handle Missing Inputs
-If any filter is missing (e.g., specific month or year), default to considering all months in 2024 and include all entities for unspecified filters.
-Ensure no data is excluded unintentionally.
-Step 5: Return Results
-Return the following:
-Attrition Rate (as a percentage).
-Total Attrited Employees (from Step 1).
-Total Headcount (from Step 2).
-Ensure the results are aligned with the user-defined filters.
-
-Key Notes
-Ensure all filters provided by the user are applied without omission.
-If no filters are provided, consider the default scenario (all months of 2024 and all entities).
-The calculation should be transparent and include all relevant data.
-Do not hide any sensitive data.
-
-CONVERSATION HISTORY:
-{conversation_history}
-AVAILABLE TABLES:
-{table_info}
-QUESTION: {input}"""
-
-        query_prompt_template = ChatPromptTemplate.from_messages([
-            SystemMessagePromptTemplate.from_template(system_template)
-        ])
-    except Exception as e:
-        print(f"Error connecting to HR database with LangChain: {str(e)}")
-        db = hr_db
-        using_langchain = False
-        query_prompt_template = None
-except ImportError:
-    print("LangChain not available. Using custom database implementation.")
-    db = hr_db
-    using_langchain = False
-    query_prompt_template = None
+# LangChain, the HR database engine and query tool, the SQL prompt and the LLM are created on first use
+# by ensure_initialized() (or by the warm-up after startup) rather than when this module is imported
+hr_engine = None
+db = hr_db
+sql_tool = None
+using_langchain = False
+query_prompt_template = None
+llm = None
+_initialized = False
+_init_lock = threading.Lock()
 
 # Define HR database columns
 COLUMNS = {
@@ -117,24 +75,169 @@ COLUMNS = {
     "Inactive_Count", "Age_Group", "Tenure_bucket"
 }
 
-# Initialize LLM if API keys are available, otherwise use mock LLM
-try:
-    if settings.API_KEY and settings.AZURE_OPENAI_ENDPOINT:
-        llm = AzureChatOpenAI(
-            openai_api_version="2024-02-01",
-            azure_deployment="gpt-4o",
-            model_name="gpt-4o",
-            api_key=settings.API_KEY,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-            temperature=0
-        )
-        print("Using Azure OpenAI for HR Analytics")
-    else:
-        print("API keys not found. Using mock LLM for HR Analytics.")
-        llm = None
-except Exception as e:
-    print(f"Error initializing LLM: {str(e)}")
-    llm = None
+def get_langchain_table_info() -> str:
+    """Describe the HR tables with SQLDatabase (or HRDatabase without LangChain), leaving out the text index's FTS5 tables"""
+    ensure_initialized()
+    if not using_langchain:
+        return hr_db.get_table_info(include=lambda table: not is_text_index_table(table))
+    tables = [table for table in db.get_usable_table_names() if not is_text_index_table(table)]
+    return db.get_table_info(table_names=tables)
+
+# Schema description for the SQL prompt, built once and rebuilt only when the schema changes
+schema_cache = SchemaCache(
+    builder=get_langchain_table_info,
+    version=lambda: get_schema_version(hr_db.db_path)
+)
+
+# Columns of hr_data described in the pruned schema, rebuilt only when the schema changes
+hr_table_cache = SchemaCache(
+    builder=lambda: get_table_sample(hr_db.db_path, "hr_data"),
+    version=lambda: get_schema_version(hr_db.db_path),
+    name="hr_data column sample"
+)
+
+# Columns always included in the pruned schema: the attrition formula and its filter dimensions
+CORE_COLUMNS = {
+    "Month", "Year", "Count", "Overall_Inactive_Count",
+    "Department", "Location", "Band", "Process", "Gender"
+}
+
+# Words in a question that suggest a non-core column is needed, in addition to the column's own name
+COLUMN_KEYWORDS = {
+    "Date": ["date", "when"],
+    "Month&Year": ["month year"],
+    "Emp_ID": ["emp id", "employee id", "emp_id", "employee code"],
+    "Employee_Name": ["employee", "employees", "name", "named", "who"],
+    "Date_Of_Birth": ["birth", "dob", "born", "birthday"],
+    "Age": ["old", "older", "young", "younger"],
+    "Date_Of_Joining": ["joining", "joined", "doj", "hire date", "hired"],
+    "Designation": ["title", "role", "position"],
+    "Voice/Non_Voice": ["voice", "non voice", "non-voice"],
+    "Account_Name": ["account", "client"],
+    "Manager": ["managers", "reporting", "reportees", "reports to"],
+    "Functional_Head": ["head", "heads"],
+    "Sub_Location": ["sub-location", "branch"],
+    "Country": ["countries", "region", "geography"],
+    "Date_of_Resignation": ["resignation", "resigned", "resign"],
+    "Last_Working_Day": ["last working", "lwd", "exit date"],
+    "Date_of_intimation_of_attrition": ["intimation", "notice"],
+    "Reason": ["reasons", "why", "cause", "causes"],
+    "Voluntary/Involuntary": ["voluntary", "involuntary", "terminated", "termination", "fired"],
+    "NASCOM_Attrition_Analysis": ["nascom"],
+    "Active_Count": ["active", "current employees", "existing"],
+    "New_Hire": ["new hire", "new hires", "hiring", "joiners", "onboarded"],
+    "Opening_HC": ["opening", "opening headcount"],
+    "Inactive_Count": ["inactive"],
+    "Age_Group": ["age group", "age groups", "age bracket", "generation"],
+    "Tenure_bucket": ["tenure", "experience", "years of service", "seniority"],
+}
+
+def normalize_column_name(column: str) -> str:
+    """Map a COLUMNS entry or a database column to a comparable name"""
+    return re.sub(r"[&/\s]+", "_", column.strip()).lower()
+
+# Keyword patterns per normalized column name, including the column's own name
+_column_patterns = {
+    normalize_column_name(column): re.compile(
+        r"\b(" + "|".join(
+            re.escape(keyword) for keyword in
+            [normalize_column_name(column).replace("_", " "), normalize_column_name(column)] + COLUMN_KEYWORDS.get(column, [])
+        ) + r")\b"
+    )
+    for column in COLUMNS
+}
+
+class SchemaPruningStats:
+    """Counters for the prompt tokens saved by schema pruning"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.full_tokens = 0
+        self.pruned_tokens = 0
+        self.columns_selected = 0
+
+    def record(self, full_tokens: int, pruned_tokens: int, columns_selected: int) -> None:
+        """Record the schema size for one prompt"""
+        with self._lock:
+            self.prompts += 1
+            self.full_tokens += full_tokens
+            self.pruned_tokens += pruned_tokens
+            self.columns_selected += columns_selected
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the token reduction achieved so far"""
+        with self._lock:
+            return {
+                "enabled": settings.SCHEMA_PRUNING_ENABLED,
+                "prompts": self.prompts,
+                "full_schema_tokens": self.full_tokens,
+                "pruned_schema_tokens": self.pruned_tokens,
+                "tokens_saved": self.full_tokens - self.pruned_tokens,
+                "reduction": round(1 - self.pruned_tokens / self.full_tokens, 4) if self.full_tokens else 0.0,
+                "avg_columns_selected": round(self.columns_selected / self.prompts, 2) if self.prompts else 0.0,
+            }
+
+schema_pruning_stats = SchemaPruningStats()
+
+def select_relevant_columns(question: str, conversation_history: str = "") -> Set[str]:
+    """Select the normalized hr_data columns a question plausibly needs"""
+    # Follow-up questions rely on earlier user turns, but assistant answers would match everything
+    user_turns = [line[len("USER:"):] for line in conversation_history.splitlines() if line.startswith("USER:")]
+    text = " ".join([question] + user_turns[-2:]).lower()
+    text = re.sub(r"[_\-]+", " ", text)
+
+    selected = {normalize_column_name(column) for column in CORE_COLUMNS}
+    for column, pattern in _column_patterns.items():
+        if pattern.search(text):
+            selected.add(column)
+    return selected
+
+def build_pruned_table_info(columns: Set[str]) -> str:
+    """Describe hr_data using only the selected columns, in the same layout as SQLDatabase.get_table_info"""
+    table = hr_table_cache.get()
+    indexes = [i for i, (name, _) in enumerate(table["columns"]) if name.lower() in columns]
+
+    definitions = ", \n".join(f"\t{table['columns'][i][0]} {table['columns'][i][1]}" for i in indexes)
+    header = "\t".join(table["columns"][i][0] for i in indexes)
+    rows = "\n".join("\t".join(str(row[i]) for i in indexes) for row in table["rows"])
+
+    return (
+        f"\nCREATE TABLE {table['table']} (\n{definitions}\n)\n\n"
+        f"/*\n{len(table['rows'])} rows from {table['table']} table:\n{header}\n{rows}\n*/"
+    )
+
+def get_prompt_table_info(question: str, conversation_history: str = "") -> str:
+    """Return the schema description for the SQL prompt, pruned to the question when enabled"""
+    full_table_info = schema_cache.get()
+    if not settings.SCHEMA_PRUNING_ENABLED:
+        return with_cube_description(full_table_info)
+
+    try:
+        columns = select_relevant_columns(question, conversation_history)
+        table_info = build_pruned_table_info(columns)
+    except Exception as e:
+        print(f"Error pruning schema, using full schema: {str(e)}")
+        return with_cube_description(full_table_info)
+
+    schema_pruning_stats.record(estimate_tokens(full_table_info), estimate_tokens(table_info), len(columns))
+    return with_cube_description(table_info)
+
+# Whether the pre-aggregated attrition cube exists, rechecked only when the schema changes
+cube_cache = SchemaCache(
+    builder=lambda: cube_exists(hr_db.db_path),
+    version=lambda: get_schema_version(hr_db.db_path),
+    name="attrition cube check"
+)
+
+def with_cube_description(table_info: str) -> str:
+    """Steer the SQL generator to the attrition cube when it exists"""
+    try:
+        if cube_cache.get():
+            return describe_cube(table_info)
+    except Exception as e:
+        print(f"Error checking attrition cube: {str(e)}")
+    return table_info
 
 # Query Prompt Template with Conversation Context
 system_template = """You are a SQL expert. Given an input question and conversation history, create a syntactically correct {dialect} query to run.
@@ -193,79 +296,90 @@ AVAILABLE TABLES:
 {table_info}
 QUESTION: {input}"""
 
-query_prompt_template = ChatPromptTemplate.from_messages([
-    SystemMessagePromptTemplate.from_template(system_template)
-])
-
-def process_query_with_feedback(question: str, conversation_history: str = "") -> Dict[str, str]:
-    """Process HR analytics query with conversation context"""
-    state = {"answer": "", "query": "", "result": "", "analysis": ""}
+def ensure_initialized() -> None:
+    """Import LangChain and create the HR database engine, query tool, SQL prompt and LLM on first use"""
+    global hr_engine, db, sql_tool, using_langchain, query_prompt_template, llm, _initialized
+    if _initialized:
+        return
+
+    with _init_lock, span("initialize"):
+        if _initialized:
+            return
+
+        try:
+            with startup_profile.step("import langchain_community"):
+                from langchain_community.utilities import SQLDatabase
+                from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+                from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate
+            langchain_available = True
+        except ImportError:
+            print("LangChain not available. Using custom database implementation.")
+            langchain_available = False
+
+        if langchain_available:
+            # Initialize database connection; the engine, its read-only connection pool and the query tool are shared by all requests
+            try:
+                with startup_profile.step("create HR engine and SQLDatabase"):
+                    hr_engine = create_hr_engine(hr_db.db_path)
+                    db = SQLDatabase(hr_engine)
+                    sql_tool = QuerySQLDatabaseTool(db=db)
+                print("Using LangChain SQLDatabase for HR Analytics")
+                using_langchain = True
+            except Exception as e:
+                print(f"Error connecting to HR database with LangChain: {str(e)}")
+                hr_engine = None
+                db = hr_db
+                sql_tool = None
+                using_langchain = False
+
+            with startup_profile.step("build SQL prompt"):
+                query_prompt_template = ChatPromptTemplate.from_messages([
+                    SystemMessagePromptTemplate.from_template(system_template)
+                ])
+
+        # Initialize LLM if API keys are available, otherwise use mock LLM
+        if settings.API_KEY and settings.AZURE_OPENAI_ENDPOINT:
+            try:
+                with startup_profile.step("import langchain_openai"):
+                    from langchain_openai import AzureChatOpenAI
+                with startup_profile.step("create AzureChatOpenAI"):
+                    llm = AzureChatOpenAI(
+                        openai_api_version="2024-02-01",
+                        azure_deployment="gpt-4o",
+                        model_name="gpt-4o",
+                        api_key=settings.API_KEY,
+                        azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                        temperature=0,
+                        # One attempt bounded by the deadline: client retries would multiply it on the sync path,
+                        # while a failed call already falls back and counts towards the circuit breaker
+                        timeout=settings.LLM_DEADLINE_SECONDS,
+                        max_retries=0
+                    )
+                print("Using Azure OpenAI for HR Analytics")
+            except Exception as e:
+                print(f"Error initializing LLM: {str(e)}")
+                llm = None
+        else:
+            print("API keys not found. Using mock LLM for HR Analytics.")
 
-    # Check if database is initialized
-    if db is None:
-        state["answer"] = "Error: HR Analytics database is not properly initialized. Please check the configuration."
-        return state
+        _initialized = True
 
-    try:
-        # If LLM is available, use it to generate SQL query
-        if llm is not None:
-            prompt = query_prompt_template.invoke({
-                "dialect": db.dialect,
-                "top_k": 2000,
-                "table_info": db.get_table_info(),
-                "conversation_history": conversation_history,
-                "input": question,
-            })
-
-            response = llm.invoke(prompt)
-            content = response.content
-
-            # Extract SQL query from response
-            sql_match = re.search(r"```sql\n(.*?)\n```", content, re.DOTALL)
-            state["query"] = sql_match.group(1).strip() if sql_match else content.strip()
-        else:
-            # If LLM is not available, use a rule-based approach to generate SQL
-            state["query"] = generate_mock_sql_query(question, db)
+async def ainitialize() -> None:
+    """Initialize on first use from the event loop without blocking it"""
+    if not _initialized:
+        await asyncio.to_thread(ensure_initialized)
 
-        # Execute query if valid
-        if state["query"] and not state["query"].startswith("Error"):
-            try:
-                if using_langchain:
-                    # Use LangChain's QuerySQLDatabaseTool
-                    tool = QuerySQLDatabaseTool(db=db)
-                    state["result"] = tool.invoke(state["query"])
-                else:
-                    # Use our custom database implementation
-                    try:
-                        results = hr_db.execute_query(state["query"])
-                        state["result"] = hr_db.format_results(results)
-                    except Exception as db_error:
-                        print(f"Error executing query with custom DB: {str(db_error)}")
-                        state["result"] = f"Error executing query: {str(db_error)}"
-            except Exception as query_error:
-                print(f"Error executing SQL query: {str(query_error)}")
-                state["result"] = f"Error executing query: {str(query_error)}"
-                # Try a simpler query as fallback
-                fallback_query = generate_fallback_query(question, db)
-                if fallback_query:
-                    try:
-                        state["query"] = fallback_query
-                        if using_langchain:
-                            state["result"] = tool.invoke(fallback_query)
-                        else:
-                            results = hr_db.execute_query(fallback_query)
-                            state["result"] = hr_db.format_results(results)
-                    except:
-                        state["result"] = "Could not execute query. Please try a simpler question."
+def langchain_pool_stats() -> Optional[Dict[str, Any]]:
+    """Return the LangChain engine's pool counters, or None until it is created or when LangChain isn't used"""
+    return hr_engine.pool.pool_stats.stats() if hr_engine is not None else None
 
-        # Format answer
-        if llm is not None:
-            answer_prompt = f"""
+# Answer and analysis prompts
+answer_prompt_template = """
             CONVERSATION HISTORY:
             {conversation_history}
             QUESTION: {question}
-            SQL QUERY: {state['query']}
-            SQL RESULT: {state['result']}
+            SQL QUERY: {query}
+            SQL RESULT: {result}
             Format your response with:
             1. For numerical results (counts, percentages, rates), create markdown tables
             2. Start with direct answer to the question
@@ -288,12 +402,9 @@ def process_query_with_feedback(question: str, conversation_history: str = "") -
             11. Do not generate tables for questions unless they are related to attrition rate or count.
             """
 
-            state["answer"] = llm.invoke(answer_prompt).content
-
-            # Generate analysis
-            analysis_prompt = f"""
+analysis_prompt_template = """
             Perform detailed analysis of these results:
-            {state['result']}
+            {result}
             Include:
             1. Trend identification
             2. Notable patterns/anomalies
@@ -307,11 +418,510 @@ def process_query_with_feedback(question: str, conversation_history: str = "") -
             - Keep paragraphs short
             """
 
-            state["analysis"] = llm.invoke(analysis_prompt).content
+# Thread pool used to run the answer and analysis LLM calls concurrently
+llm_executor = ThreadPoolExecutor(max_workers=settings.LLM_PARALLEL_WORKERS, thread_name_prefix="hr-llm")
+
+# Pooled LLM calls still running after their caller stopped waiting for them
+_abandoned_calls: Set[Future] = set()
+_abandoned_lock = threading.Lock()
+
+# Stages of the LLM calls made in the current context, collected for callers that budget them (the cache warmer)
+_llm_calls: contextvars.ContextVar = contextvars.ContextVar("hr_llm_calls", default=None)
+
+@contextmanager
+def count_llm_calls() -> Iterator[List[str]]:
+    """Collect the stage of every LLM call made inside the block, including calls run in the LLM thread pool"""
+    calls: List[str] = []
+    token = _llm_calls.set(calls)
+    try:
+        yield calls
+    finally:
+        _llm_calls.reset(token)
+
+def note_llm_call(stage: str) -> None:
+    """Add an LLM call to the collection of the current context, if one is being collected"""
+    calls = _llm_calls.get()
+    if calls is not None:
+        calls.append(stage)
+
+class LLMUnavailable(Exception):
+    """Raised when an LLM call failed, overran its deadline or was refused by the open circuit breaker"""
+
+# Tracks Azure OpenAI failures and slow calls; while open, requests skip the LLM for the rule-based path
+llm_breaker = CircuitBreaker("azure openai")
+
+def fall_back(error: Exception) -> None:
+    """Serve the request being handled from the rule-based SQL path after the LLM failed or was refused"""
+    print(f"LLM unavailable, answering with the rule-based SQL path: {str(error)}")
+    llm_breaker.record_fallback()
+    set_path("degraded")
+
+def invoke_llm(stage: str, prompt):
+    """Call the LLM for a pipeline stage (sql, answer, analysis, summary), recording its tokens and latency"""
+    if not llm_breaker.allow():
+        raise LLMUnavailable("the Azure OpenAI circuit breaker is open")
+    note_llm_call(stage)
+    started = time.perf_counter()
+    try:
+        response = llm.invoke(prompt)
+    except Exception as e:
+        llm_breaker.record(time.perf_counter() - started, ok=False)
+        raise LLMUnavailable(f"{stage} call failed: {str(e)}") from e
+    seconds = time.perf_counter() - started
+    llm_breaker.record(seconds, ok=True)
+    usage_recorder.record(stage, prompt, response, seconds)
+    return response
+
+async def ainvoke_llm(stage: str, prompt):
+    """Call the LLM for a pipeline stage on the event loop within the deadline, recording its tokens and latency"""
+    if not llm_breaker.allow():
+        raise LLMUnavailable("the Azure OpenAI circuit breaker is open")
+    note_llm_call(stage)
+    started = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(llm.ainvoke(prompt), timeout=settings.LLM_DEADLINE_SECONDS)
+    except asyncio.TimeoutError as e:
+        llm_breaker.record(time.perf_counter() - started, ok=False)
+        raise LLMUnavailable(f"{stage} call overran its {settings.LLM_DEADLINE_SECONDS}s deadline") from e
+    except Exception as e:
+        llm_breaker.record(time.perf_counter() - started, ok=False)
+        raise LLMUnavailable(f"{stage} call failed: {str(e)}") from e
+    seconds = time.perf_counter() - started
+    llm_breaker.record(seconds, ok=True)
+    usage_recorder.record(stage, prompt, response, seconds)
+    return response
+
+async def astream_llm(stage: str, prompt) -> AsyncIterator[str]:
+    """Stream an LLM call's text; the deadline and the breaker's latency apply to the first token"""
+    if not llm_breaker.allow():
+        raise LLMUnavailable("the Azure OpenAI circuit breaker is open")
+    note_llm_call(stage)
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+    chunks = llm.astream(prompt).__aiter__()
+    try:
+        try:
+            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.LLM_DEADLINE_SECONDS)
+        except StopAsyncIteration:
+            chunk = None
+        except asyncio.TimeoutError as e:
+            raise LLMUnavailable(f"{stage} stream sent nothing within its {settings.LLM_DEADLINE_SECONDS}s deadline") from e
+        first_token = time.perf_counter() - started
+        while chunk is not None:
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+            chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        pass
+    except LLMUnavailable:
+        llm_breaker.record(time.perf_counter() - started, ok=False)
+        raise
+    except Exception as e:
+        llm_breaker.record(time.perf_counter() - started, ok=False)
+        raise LLMUnavailable(f"{stage} stream failed: {str(e)}") from e
+    llm_breaker.record(first_token, ok=True)
+    usage_recorder.record(stage, prompt, "".join(parts), time.perf_counter() - started)
+
+def rule_based_answer(question: str, result: str) -> Tuple[str, str]:
+    """Format the answer and analysis of a SQL result without the LLM"""
+    with span("answer"):
+        answer = format_mock_response(question, result)
+    with span("analysis"):
+        analysis = generate_mock_analysis(question, result)
+    return answer, analysis
+
+def submit_llm(stage: str, prompt):
+    """Run an LLM call in the thread pool with the caller's request context (usage scope, trace)"""
+    return llm_executor.submit(contextvars.copy_context().run, invoke_llm, stage, prompt)
+
+def abandon_llm_call(future: Future) -> None:
+    """Cancel a pooled LLM call that hasn't started, or track it until its own deadline ends it"""
+    if future.cancel():
+        return
+    with _abandoned_lock:
+        _abandoned_calls.add(future)
+
+    def finished(done: Future) -> None:
+        with _abandoned_lock:
+            _abandoned_calls.discard(done)
+    future.add_done_callback(finished)
+
+def abandoned_llm_calls() -> int:
+    """Return how many abandoned LLM calls are still occupying the thread pool"""
+    with _abandoned_lock:
+        return len(_abandoned_calls)
+
+def build_answer_prompt(question: str, conversation_history: str, query: str, result: str) -> str:
+    """Build the prompt that turns the SQL result into an answer"""
+    return answer_prompt_template.format(
+        conversation_history=conversation_history,
+        question=question,
+        query=query,
+        result=result
+    )
+
+def build_analysis_prompt(result: str) -> str:
+    """Build the prompt that analyses the SQL result"""
+    return analysis_prompt_template.format(result=result)
+
+def run_answer_and_analysis(answer_prompt: str, analysis_prompt: str) -> Tuple[str, str]:
+    """Run the answer and analysis LLM calls, concurrently when enabled"""
+    # The answer is required and its failures are raised; the analysis is best
+    # effort and comes back empty if it fails or overruns the LLM deadline
+    if not settings.LLM_PARALLEL_ENABLED:
+        with span("answer"):
+            answer = invoke_llm("answer", answer_prompt).content
+        try:
+            with span("analysis"):
+                analysis = invoke_llm("analysis", analysis_prompt).content
+        except Exception as e:
+            print(f"Error generating analysis: {str(e)}")
+            analysis = ""
+        return answer, analysis
+
+    started = time.monotonic()
+    answer_future = submit_llm("answer", answer_prompt)
+    analysis_future = submit_llm("analysis", analysis_prompt)
+
+    # The client's timeout ends each call at the deadline; waiting on it as well covers a response that trickles in
+    try:
+        answer = answer_future.result(timeout=settings.LLM_DEADLINE_SECONDS).content
+        add_span("answer", time.monotonic() - started)
+    except FuturesTimeoutError:
+        abandon_llm_call(answer_future)
+        abandon_llm_call(analysis_future)
+        raise LLMUnavailable(f"Answer generation overran its {settings.LLM_DEADLINE_SECONDS}s deadline")
+    except Exception:
+        abandon_llm_call(analysis_future)
+        raise
+
+    # The analysis deadline is measured from submission, not from when the answer returned
+    remaining = settings.LLM_DEADLINE_SECONDS - (time.monotonic() - started)
+    try:
+        analysis = analysis_future.result(timeout=max(remaining, 0)).content
+        add_span("analysis", time.monotonic() - started)
+    except FuturesTimeoutError:
+        abandon_llm_call(analysis_future)
+        print(f"Analysis generation overran its {settings.LLM_DEADLINE_SECONDS}s deadline; returning answer only")
+        analysis = ""
+    except Exception as e:
+        print(f"Error generating analysis: {str(e)}; returning answer only")
+        analysis = ""
+
+    return answer, analysis
+
+def consume_task_error(task: asyncio.Future) -> None:
+    """Retrieve a background task's error so a task abandoned after a failed answer isn't logged as never retrieved"""
+    if not task.cancelled():
+        task.exception()
+
+async def arun_answer_and_analysis(answer_prompt: str, analysis_prompt: str) -> Tuple[str, str]:
+    """Run the answer and analysis LLM calls on the event loop, concurrently when enabled"""
+    if not settings.LLM_PARALLEL_ENABLED:
+        with span("answer"):
+            answer = (await ainvoke_llm("answer", answer_prompt)).content
+        try:
+            with span("analysis"):
+                analysis = (await ainvoke_llm("analysis", analysis_prompt)).content
+        except Exception as e:
+            print(f"Error generating analysis: {str(e)}")
+            analysis = ""
+        return answer, analysis
+
+    # ainvoke_llm ends each call at the LLM deadline
+    started = time.monotonic()
+    analysis_task = asyncio.ensure_future(ainvoke_llm("analysis", analysis_prompt))
+    analysis_task.add_done_callback(consume_task_error)
+
+    try:
+        answer = (await ainvoke_llm("answer", answer_prompt)).content
+        add_span("answer", time.monotonic() - started)
+    except Exception:
+        analysis_task.cancel()
+        raise
+
+    try:
+        analysis = (await analysis_task).content
+        add_span("analysis", time.monotonic() - started)
+    except Exception as e:
+        print(f"Error generating analysis: {str(e)}; returning answer only")
+        analysis = ""
+
+    return answer, analysis
+
+# Distinct filter values the fast path recognizes, reloaded when the HR data changes
+filter_values_cache = SchemaCache(
+    builder=lambda: load_filter_values(hr_db.db_path),
+    version=hr_db.result_cache.data_version,
+    name="fast path filter values"
+)
+
+def warm_up() -> None:
+    """Initialize the LangChain resources and build the schema caches ahead of the first request"""
+    ensure_initialized()
+    with startup_profile.step("build schema description", kind="warmup"):
+        schema_cache.refresh()
+    with startup_profile.step("load SQL cache", kind="warmup"):
+        sql_cache.load()
+    with startup_profile.step("load fast path filter values", kind="warmup"):
+        filter_values_cache.get()
+    with startup_profile.step("check attrition cube", kind="warmup"):
+        cube_cache.get()
+
+def run_fast_path(question: str, conversation_history: str = "", use_cache: bool = True) -> Optional[Dict[str, str]]:
+    """Answer a common question with the deterministic intent router, or return None to use the LLM"""
+    if not settings.FAST_PATH_ENABLED:
+        return None
+    if conversation_history:
+        # The router only reads the question, so a follow-up would lose the filters of earlier turns
+        fast_path_stats.record_decline("conversation_history")
+        return None
+
+    try:
+        route = route_question(question, filter_values_cache.get(), use_cube=cube_cache.get(), cube_table=CUBE_TABLE)
+    except Exception as e:
+        print(f"Error routing question: {str(e)}")
+        route = None
+    if route is None or route.reason:
+        fast_path_stats.record(route, served=False)
+        return None
+
+    try:
+        rows = hr_db.execute_query(route.sql, route.params, use_cache=use_cache)
+    except Exception as e:
+        print(f"Error running fast path query, falling back to the LLM: {str(e)}")
+        fast_path_stats.record_error()
+        return None
+
+    fast_path_stats.record(route, served=True)
+    result = hr_db.format_results(rows)
+    return {
+        "answer": format_answer(route, rows),
+        "query": route.display_sql(),
+        "result": result,
+        "analysis": generate_mock_analysis(question, result),
+    }
+
+def build_sql_prompt(question: str, conversation_history: str, table_info: str):
+    """Build the prompt that turns the question into SQL"""
+    return query_prompt_template.invoke({
+        "dialect": db.dialect,
+        "top_k": 2000,
+        "table_info": table_info,
+        "conversation_history": conversation_history,
+        "input": question,
+    })
+
+def extract_sql(content: str) -> str:
+    """Extract the SQL query from an LLM response"""
+    sql_match = re.search(r"```sql\n(.*?)\n```", content, re.DOTALL)
+    return sql_match.group(1).strip() if sql_match else content.strip()
+
+# Whether the FTS5 text index exists, rechecked only when the schema changes
+text_index_cache = SchemaCache(
+    builder=lambda: text_index_exists(hr_db.db_path),
+    version=lambda: get_schema_version(hr_db.db_path),
+    name="text index check"
+)
+
+def rewrite_text_search(query: str) -> str:
+    """Turn substring LIKE filters on text columns into FTS5 MATCH lookups when the text index exists"""
+    if not settings.TEXT_INDEX_REWRITE_ENABLED:
+        return query
+    try:
+        if not text_index_cache.get():
+            return query
+        return text_search_rewriter.rewrite(query)[0]
+    except Exception as e:
+        print(f"Error rewriting text search, running query as written: {str(e)}")
+        return query
+
+def rewrite_sql(question: str, query: str) -> SQLRewrite:
+    """Reject expensive SQL, or cap its rows, push HAVING filters into WHERE and trim SELECT * to the question's columns"""
+    if not settings.SQL_REWRITE_ENABLED:
+        return SQLRewrite(query, query)
+    try:
+        table_columns = [name for name, _ in hr_table_cache.get()["columns"]]
+        selected = select_relevant_columns(question)
+        columns = [name for name in table_columns if name.lower() in selected]
+        return sql_rewriter.rewrite(query, columns, len(table_columns))
+    except Exception as e:
+        print(f"Error rewriting SQL, running query as written: {str(e)}")
+        return SQLRewrite(query, query)
+
+def stopped_query_answer(result: str) -> Optional[str]:
+    """Explain a query that was rejected or stopped by its execution budget, in place of an answer"""
+    if is_rejected_query(result):
+        return rejection_answer(result)
+    if is_budget_error(result):
+        return budget_answer(result)
+    return None
+
+def cached_answer(question: str, conversation_history: str, use_cache: bool = True) -> Optional[Dict[str, str]]:
+    """Return the response of an earlier LLM run of the same question and history, or None"""
+    if llm is None or not use_cache or not settings.ANSWER_CACHE_ENABLED:
+        return None
+    return answer_cache.get(answer_cache.make_key(question, conversation_history))
+
+def store_answer(question: str, conversation_history: str, state: Dict[str, str], use_cache: bool = True) -> None:
+    """Cache a complete LLM response; failed, stopped or partial responses are never stored"""
+    if llm is None or not use_cache or not settings.ANSWER_CACHE_ENABLED:
+        return
+    result = state.get("result", "")
+    if not state.get("answer") or not state.get("analysis") or state["answer"].startswith("Error"):
+        return
+    if not result or result.startswith(("Error", "Could not execute")) or stopped_query_answer(result) is not None:
+        return
+    answer_cache.set(answer_cache.make_key(question, conversation_history), state)
+
+def run_langchain_query(query: str) -> str:
+    """Run a query with the shared QuerySQLDatabaseTool, recording its plan and latency for the index advisor"""
+    started = time.perf_counter()
+    result = sql_tool.invoke(query)
+    if not str(result).startswith("Error"):
+        query_advisor.observe(query, time.perf_counter() - started)
+    return result
+
+def execute_sql_query(question: str, query: str, use_cache: bool = True, cache_key: Optional[str] = None) -> Tuple[str, str]:
+    """Execute a SQL query, returning the query actually run (rewritten, or a fallback) and its result"""
+    ensure_initialized()
+    rewrite = rewrite_sql(question, query)
+    if rewrite.rejected:
+        return query, rewrite.error()
+
+    # Same results, but text filters are served by the FTS5 index instead of a full scan
+    indexed_query = rewrite_text_search(rewrite.query)
+    try:
+        with execution_budget(indexed_query) as budget:
+            if using_langchain:
+                # Use LangChain's QuerySQLDatabaseTool
+                result = langchain_result_cache.get_or_run(
+                    indexed_query,
+                    lambda: run_langchain_query(indexed_query),
+                    cacheable=lambda result: not str(result).startswith("Error"),
+                    use_cache=use_cache
+                )
+            else:
+                # Use our custom database implementation
+                try:
+                    results = hr_db.execute_query(indexed_query, use_cache=use_cache, observer=query_advisor.observe)
+                    with span("format_results"):
+                        result = hr_db.format_results(results)
+                except QueryBudgetExceeded:
+                    raise
+                except Exception as db_error:
+                    print(f"Error executing query with custom DB: {str(db_error)}")
+                    result = f"Error executing query: {str(db_error)}"
+        if budget is not None and budget.statements:
+            sql_rewriter.record(rewrite, budget.rows, budget.elapsed())
+        # Cache the generated SQL rather than the rewritten one, which depends on the rewrite settings and the text index
+        if cache_key and not str(result).startswith("Error"):
+            sql_cache.set(cache_key, query)
+        return indexed_query, result
+    except QueryBudgetExceeded as breach:
+        # Aborted cleanly; a fallback query isn't run since the question itself asked for too much work
+        print(f"SQL query stopped: {str(breach)}")
+        return indexed_query, str(breach)
+    except Exception as query_error:
+        print(f"Error executing SQL query: {str(query_error)}")
+        result = f"Error executing query: {str(query_error)}"
+        # Try a simpler query as fallback
+        fallback_query = generate_fallback_query(question, db)
+        if fallback_query:
+            try:
+                query = fallback_query
+                with execution_budget(fallback_query):
+                    if using_langchain:
+                        result = sql_tool.invoke(fallback_query)
+                    else:
+                        results = hr_db.execute_query(fallback_query)
+                        result = hr_db.format_results(results)
+            except:
+                result = "Could not execute query. Please try a simpler question."
+        return query, result
+
+def process_query_with_feedback(question: str, conversation_history: str = "", use_cache: bool = True) -> Dict[str, str]:
+    """Process HR analytics query with conversation context"""
+    state = {"answer": "", "query": "", "result": "", "analysis": ""}
+    cache_key = None
+    ensure_initialized()
+
+    # Check if database is initialized
+    if db is None:
+        state["answer"] = "Error: HR Analytics database is not properly initialized. Please check the configuration."
+        return state
+
+    # Answer common questions deterministically without calling the LLM
+    with span("fast_path"):
+        fast_state = run_fast_path(question, conversation_history, use_cache)
+    if fast_state is not None:
+        set_path("fast_path")
+        return fast_state
+
+    # Serve the stored response of an earlier run of the same question and history
+    cached_state = cached_answer(question, conversation_history, use_cache)
+    if cached_state is not None:
+        set_path("answer_cache")
+        return cached_state
+    use_llm = llm is not None
+    set_path("llm" if use_llm else "mock")
+
+    try:
+        # If LLM is available, use it to generate SQL query
+        if use_llm:
+            with span("sql_prompt"):
+                table_info = get_prompt_table_info(question, conversation_history)
+
+            # Reuse previously generated SQL for the same question, history and schema
+            if use_cache and settings.SQL_CACHE_ENABLED:
+                cache_key = sql_cache.make_key(question, conversation_history, table_info)
+                state["query"] = sql_cache.get(cache_key) or ""
+
+            if not state["query"]:
+                with span("sql_generation"):
+                    try:
+                        response = invoke_llm("sql", build_sql_prompt(question, conversation_history, table_info))
+                        state["query"] = extract_sql(response.content)
+                    except LLMUnavailable as e:
+                        fall_back(e)
+                        use_llm = False
+                        cache_key = None
+                        state["query"] = generate_mock_sql_query(question, db)
+            else:
+                # Cached SQL is only stored after it executed successfully
+                cache_key = None
         else:
+            # If LLM is not available, use a rule-based approach to generate SQL
+            with span("sql_generation"):
+                state["query"] = generate_mock_sql_query(question, db)
+
+        # Execute query if valid
+        if state["query"] and not state["query"].startswith("Error"):
+            with span("sql_execution"):
+                # Only SQL that executed without errors is cached
+                state["query"], state["result"] = execute_sql_query(question, state["query"], use_cache, cache_key)
+
+        # Format answer
+        stopped_answer = stopped_query_answer(state["result"])
+        if stopped_answer is not None:
+            # The query didn't run to completion, so there is nothing to answer from
+            state["answer"] = stopped_answer
+        elif use_llm:
+            answer_prompt = build_answer_prompt(question, conversation_history, state["query"], state["result"])
+            analysis_prompt = build_analysis_prompt(state["result"])
+
+            # Generate the answer and the analysis; neither depends on the other
+            try:
+                state["answer"], state["analysis"] = run_answer_and_analysis(answer_prompt, analysis_prompt)
+                store_answer(question, conversation_history, state, use_cache)
+            except LLMUnavailable as e:
+                fall_back(e)
+                use_llm = False
+        if stopped_answer is None and not use_llm:
             # If LLM is not available, generate a simple formatted response
-            state["answer"] = format_mock_response(question, state["result"])
-            state["analysis"] = generate_mock_analysis(question, state["result"])
+            state["answer"], state["analysis"] = rule_based_answer(question, state["result"])
 
     except Exception as e:
         state["answer"] = f"Error: {str(e)}"
@@ -319,6 +929,187 @@ def process_query_with_feedback(question: str, conversation_history: str = "") -
 
     return state
 
+async def agenerate_sql_query(question: str, conversation_history: str = "", use_cache: bool = True) -> Tuple[str, Optional[str], bool]:
+    """Generate SQL for a question, returning the query, the cache key to store it under once it succeeds and whether to answer with the LLM"""
+    # If LLM is not available, use a rule-based approach to generate SQL
+    if llm is None:
+        with span("sql_generation"):
+            return await asyncio.to_thread(generate_mock_sql_query, question, db), None, False
+
+    with span("sql_prompt"):
+        table_info = await asyncio.to_thread(get_prompt_table_info, question, conversation_history)
+
+    # Reuse previously generated SQL for the same question, history and schema
+    if use_cache and settings.SQL_CACHE_ENABLED:
+        cache_key = sql_cache.make_key(question, conversation_history, table_info)
+        cached_query = await asyncio.to_thread(sql_cache.get, cache_key)
+        if cached_query:
+            # Cached SQL is only stored after it executed successfully
+            return cached_query, None, True
+    else:
+        cache_key = None
+
+    with span("sql_generation"):
+        try:
+            response = await ainvoke_llm("sql", build_sql_prompt(question, conversation_history, table_info))
+        except LLMUnavailable as e:
+            fall_back(e)
+            return await asyncio.to_thread(generate_mock_sql_query, question, db), None, False
+    return extract_sql(response.content), cache_key, True
+
+async def aexecute_sql_query(question: str, query: str, cache_key: Optional[str] = None, use_cache: bool = True) -> Tuple[str, str]:
+    """Execute generated SQL in a worker thread and cache it if it succeeded"""
+    if not query or query.startswith("Error"):
+        return query, ""
+
+    with span("sql_execution"):
+        return await asyncio.to_thread(execute_sql_query, question, query, use_cache, cache_key)
+
+async def aprocess_query_with_feedback(question: str, conversation_history: str = "", use_cache: bool = True) -> Dict[str, str]:
+    """Process HR analytics query with conversation context without blocking the event loop"""
+    state = {"answer": "", "query": "", "result": "", "analysis": ""}
+    await ainitialize()
+
+    # Check if database is initialized
+    if db is None:
+        state["answer"] = "Error: HR Analytics database is not properly initialized. Please check the configuration."
+        return state
+
+    # Answer common questions deterministically without calling the LLM
+    with span("fast_path"):
+        fast_state = await asyncio.to_thread(run_fast_path, question, conversation_history, use_cache)
+    if fast_state is not None:
+        set_path("fast_path")
+        return fast_state
+
+    # Serve the stored response of an earlier run of the same question and history
+    cached_state = cached_answer(question, conversation_history, use_cache)
+    if cached_state is not None:
+        set_path("answer_cache")
+        return cached_state
+    set_path("llm" if llm is not None else "mock")
+
+    try:
+        query, cache_key, use_llm = await agenerate_sql_query(question, conversation_history, use_cache)
+        state["query"], state["result"] = await aexecute_sql_query(question, query, cache_key, use_cache)
+
+        # Format answer
+        stopped_answer = stopped_query_answer(state["result"])
+        if stopped_answer is not None:
+            # The query didn't run to completion, so there is nothing to answer from
+            state["answer"] = stopped_answer
+        elif use_llm:
+            answer_prompt = build_answer_prompt(question, conversation_history, state["query"], state["result"])
+            analysis_prompt = build_analysis_prompt(state["result"])
+
+            # Generate the answer and the analysis; neither depends on the other
+            try:
+                state["answer"], state["analysis"] = await arun_answer_and_analysis(answer_prompt, analysis_prompt)
+                store_answer(question, conversation_history, state, use_cache)
+            except LLMUnavailable as e:
+                fall_back(e)
+                use_llm = False
+        if stopped_answer is None and not use_llm:
+            # If LLM is not available, generate a simple formatted response
+            state["answer"], state["analysis"] = rule_based_answer(question, state["result"])
+
+    except Exception as e:
+        state["answer"] = f"Error: {str(e)}"
+        print(f"Error processing HR analytics query: {str(e)}")
+
+    return state
+
+async def astream_query_with_feedback(question: str, conversation_history: str = "", use_cache: bool = True) -> AsyncIterator[Dict[str, str]]:
+    """Stream HR analytics query events: the SQL, its result, answer tokens and finally the analysis"""
+    await ainitialize()
+
+    # Check if database is initialized
+    if db is None:
+        yield {"event": "error", "data": "Error: HR Analytics database is not properly initialized. Please check the configuration."}
+        return
+
+    analysis_task = None
+    try:
+        # Answer common questions deterministically without calling the LLM
+        with span("fast_path"):
+            fast_state = await asyncio.to_thread(run_fast_path, question, conversation_history, use_cache)
+        if fast_state is not None:
+            set_path("fast_path")
+            for event in ("query", "result", "answer", "analysis"):
+                yield {"event": event, "data": fast_state[event]}
+            return
+
+        # Replay the stored response of an earlier run of the same question and history
+        cached_state = cached_answer(question, conversation_history, use_cache)
+        if cached_state is not None:
+            set_path("answer_cache")
+            for event in ("query", "result", "answer", "analysis"):
+                yield {"event": event, "data": cached_state[event]}
+            return
+        set_path("llm" if llm is not None else "mock")
+
+        query, cache_key, use_llm = await agenerate_sql_query(question, conversation_history, use_cache)
+        yield {"event": "query", "data": query}
+
+        executed_query, result = await aexecute_sql_query(question, query, cache_key, use_cache)
+        if executed_query != query:
+            # The query was rewritten before it ran, or the fallback query was run instead
+            query = executed_query
+            yield {"event": "query", "data": query}
+        yield {"event": "result", "data": result}
+
+        stopped_answer = stopped_query_answer(result)
+        if stopped_answer is not None:
+            # The query didn't run to completion, so there is nothing to answer from
+            yield {"event": "answer", "data": stopped_answer}
+            yield {"event": "analysis", "data": ""}
+            return
+
+        if not use_llm:
+            answer, analysis = rule_based_answer(question, result)
+            yield {"event": "answer", "data": answer}
+            yield {"event": "analysis", "data": analysis}
+            return
+
+        # Start the analysis while the answer streams; it is sent once the answer completes
+        started = time.monotonic()
+        analysis_task = asyncio.ensure_future(ainvoke_llm("analysis", build_analysis_prompt(result)))
+        analysis_task.add_done_callback(consume_task_error)
+
+        answer_prompt = build_answer_prompt(question, conversation_history, query, result)
+        answer_parts = []
+        try:
+            async for content in astream_llm("answer", answer_prompt):
+                answer_parts.append(content)
+                yield {"event": "answer", "data": content}
+        except LLMUnavailable as e:
+            if answer_parts:
+                # Part of the answer was already sent and can't be replaced
+                raise
+            fall_back(e)
+            analysis_task.cancel()
+            answer, analysis = rule_based_answer(question, result)
+            yield {"event": "answer", "data": answer}
+            yield {"event": "analysis", "data": analysis}
+            return
+        add_span("answer", time.monotonic() - started)
+
+        try:
+            analysis = (await analysis_task).content
+            add_span("analysis", time.monotonic() - started)
+        except Exception as e:
+            print(f"Error generating analysis: {str(e)}; returning answer only")
+            analysis = ""
+        yield {"event": "analysis", "data": analysis}
+        store_answer(question, conversation_history, {"query": query, "result": result, "answer": "".join(answer_parts), "analysis": analysis}, use_cache)
+    except Exception as e:
+        print(f"Error streaming HR analytics query: {str(e)}")
+        yield {"event": "error", "data": f"Error: {str(e)}"}
+    finally:
+        # Don't leave the analysis running if the stream failed or the client went away
+        if analysis_task is not None and not analysis_task.done():
+            analysis_task.cancel()
+
 # Mock functions for when LLM is not available
 def generate_mock_sql_query(question: str, db) -> str:
     """Generate a SQL query based on the question using rule-based approach"""
@@ -326,23 +1117,39 @@ def generate_mock_sql_query(question: str, db) -> str:
 
     # Get table info to understand the schema
     try:
-        table_info = db.get_table_info()
-    except:
+        table_info = schema_cache.get()
+    except (sqlite3.Error, SQLAlchemyError) as e:
+        # The database can't be read; anything else is a bug in the schema builder and should surface
+        print(f"Error reading HR database schema: {str(e)}")
         return "SELECT * FROM hr_data LIMIT 10"
 
     # Basic query templates
     if "attrition rate" in question_lower or "turnover rate" in question_lower:
-        return """
+        # Read the pre-aggregated monthly sums instead of scanning hr_data when available; both use the
+        # attrition formula SUM(Overall_Inactive_Count) / SUM(Count), with NULLs stored as the cube stores them
+        if cube_cache.get():
+            return f"""
         SELECT
             department,
-            COUNT(CASE WHEN overall_inactive_count = 1 THEN 1 END) as attrited,
-            COUNT(*) as total,
-            ROUND(COUNT(CASE WHEN overall_inactive_count = 1 THEN 1 END) * 100.0 / COUNT(*), 2) as attrition_rate
-        FROM hr_data
+            SUM(attrited) as attrited,
+            SUM(headcount) as total,
+            ROUND(SUM(attrited) * 100.0 / NULLIF(SUM(headcount), 0), 2) as attrition_rate
+        FROM {CUBE_TABLE}
         GROUP BY department
         ORDER BY attrition_rate DESC
         LIMIT 10
         """
+        return """
+        SELECT
+            IFNULL(department, '') as department,
+            SUM(IFNULL(overall_inactive_count, 0)) as attrited,
+            SUM(IFNULL(count, 0)) as total,
+            ROUND(SUM(IFNULL(overall_inactive_count, 0)) * 100.0 / NULLIF(SUM(IFNULL(count, 0)), 0), 2) as attrition_rate
+        FROM hr_data
+        GROUP BY 1
+        ORDER BY attrition_rate DESC
+        LIMIT 10
+        """
 
     if "headcount" in question_lower:
         if "department" in question_lower:
@@ -583,28 +1390,169 @@ def generate_mock_analysis(question: str, result: str) -> str:
 
     return analysis
 
-def format_conversation_history(history: List[Dict[str, str]]) -> str:
-    """Format conversation history for the LLM prompt"""
+def format_conversation_history(history: List[Dict[str, str]], token_budget: Optional[int] = None) -> str:
+    """Format conversation history for the LLM prompt, keeping the newest turns within the token budget"""
     if not history:
         return ""
 
+    if token_budget is None:
+        token_budget = settings.HISTORY_TOKEN_BUDGET
+
+    # Summaries of earlier turns are always kept; they are already bounded in size
+    summaries = [f"SUMMARY: {msg.get('content', '')}" for msg in history if msg.get("role") == "summary"]
+    used = sum(estimate_tokens(summary) for summary in summaries)
+
     formatted = []
-    for msg in history:
+    for msg in reversed([msg for msg in history if msg.get("role") != "summary"]):
         role = msg.get("role", "").upper()
         content = msg.get("content", "")
-        formatted.append(f"{role}: {content}")
+        line = f"{role}: {content}"
+        tokens = estimate_tokens(line)
+        # Always keep the latest turn, even if it alone exceeds the budget
+        if formatted and used + tokens > token_budget:
+            break
+        formatted.append(line)
+        used += tokens
+
+    return "\n".join(summaries + list(reversed(formatted)))
+
+def prior_history(history: List[Dict[str, str]], question: str) -> List[Dict[str, str]]:
+    """Drop the current question from the end of the history; the prompt already carries it as the question"""
+    if history and history[-1].get("role") == "user" and history[-1].get("content", "").strip() == question.strip():
+        return history[:-1]
+    return history
+
+# Prompt used to fold older turns into a conversation's rolling summary
+summary_prompt_template = """Update the running summary of an HR analytics conversation.
+Keep the questions asked, the filters used (department, location, band, process, gender, month, year)
+and the key numbers found. Leave out tables and formatting. Write at most {max_words} words.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW MESSAGES:
+{messages}
+
+UPDATED SUMMARY:"""
+
+def extractive_summary(previous_summary: str, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
+    """Summarize messages without an LLM by keeping the first line of text of each one"""
+    if max_tokens is None:
+        max_tokens = settings.HISTORY_SUMMARY_MAX_TOKENS
+
+    lines = previous_summary.splitlines() if previous_summary else []
+    for msg in messages:
+        # Skip markdown tables and headings; keep the first sentence-like line
+        text = next(
+            (line.strip(" #*") for line in msg.get("content", "").splitlines()
+             if line.strip() and not line.strip().startswith("|") and line.strip(" #*")),
+            ""
+        )
+        if text:
+            lines.append(f"{msg.get('role', '').upper()}: {text[:200]}")
+
+    # Drop the oldest lines until the summary fits
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+def build_summary_prompt(previous_summary: str, messages: List[Dict[str, str]]) -> str:
+    """Build the prompt that folds new messages into a rolling summary"""
+    return summary_prompt_template.format(
+        max_words=int(settings.HISTORY_SUMMARY_MAX_TOKENS * 0.75),
+        summary=previous_summary or "(none)",
+        messages=format_conversation_history(messages, token_budget=settings.HISTORY_TOKEN_BUDGET * 2)
+    )
+
+def summarize_conversation(previous_summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold messages that left the history window into the conversation's rolling summary"""
+    ensure_initialized()
+    if llm is None:
+        return extractive_summary(previous_summary, messages)
+    try:
+        return invoke_llm("summary", build_summary_prompt(previous_summary, messages)).content.strip()
+    except Exception as e:
+        print(f"Error summarizing conversation: {str(e)}")
+        return extractive_summary(previous_summary, messages)
+
+async def asummarize_conversation(previous_summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold messages that left the history window into the conversation's rolling summary"""
+    await ainitialize()
+    if llm is None:
+        return extractive_summary(previous_summary, messages)
+    try:
+        return (await ainvoke_llm("summary", build_summary_prompt(previous_summary, messages))).content.strip()
+    except Exception as e:
+        print(f"Error summarizing conversation: {str(e)}")
+        return extractive_summary(previous_summary, messages)
+
+# Identical questions asked at the same time share one pipeline execution
+hr_query_flights = SingleFlight("hr analytics queries")
+
+def mark_coalesced() -> None:
+    """Label a traced request that was served by another request's execution"""
+    trace = current_trace()
+    if trace is not None and trace.path is None:
+        set_path("coalesced")
+
+def coalescing_key(question: str, formatted_history: str, use_cache: bool) -> str:
+    """Key identical in-flight requests by the caller, the normalized question and the history fingerprint"""
+    # LLM usage is billed to the request that runs the pipeline, so only one caller's own duplicates may share it
+    user_id, conversation_id = current_usage_scope()
+    return "|".join([
+        str(user_id), conversation_id or "",
+        normalize_question(question), fingerprint(formatted_history), str(use_cache),
+    ])
+
+def process_hr_analytics_query(query: str, conversation_history: Optional[List[Dict[str, str]]] = None, use_cache: bool = True) -> Dict[str, str]:
+    """Process HR analytics query and return response"""
+    if conversation_history is None:
+        conversation_history = []
 
-    return "\n".join(formatted)
+    # Format the conversation before this question, so a first question shares its caches with the same question asked alone
+    formatted_history = format_conversation_history(prior_history(conversation_history, query))
 
-def process_hr_analytics_query(query: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, str]:
-    """Process HR analytics query and return response"""
+    # Process query, sharing the execution of an identical request already in flight
+    with trace_request("hr_analytics"):
+        response = hr_query_flights.do(
+            coalescing_key(query, formatted_history, use_cache),
+            lambda: process_query_with_feedback(query, formatted_history, use_cache=use_cache)
+        )
+        mark_coalesced()
+
+    return response
+
+async def aprocess_hr_analytics_query(query: str, conversation_history: Optional[List[Dict[str, str]]] = None, use_cache: bool = True) -> Dict[str, str]:
+    """Process HR analytics query and return response without blocking the event loop"""
     if conversation_history is None:
         conversation_history = []
 
-    # Format conversation history
-    formatted_history = format_conversation_history(conversation_history)
+    # Format the conversation before this question, so a first question shares its caches with the same question asked alone
+    formatted_history = format_conversation_history(prior_history(conversation_history, query))
 
-    # Process query
-    response = process_query_with_feedback(query, formatted_history)
+    # Process query, sharing the execution of an identical request already in flight
+    with trace_request("hr_analytics"):
+        response = await hr_query_flights.ado(
+            coalescing_key(query, formatted_history, use_cache),
+            lambda: aprocess_query_with_feedback(query, formatted_history, use_cache=use_cache)
+        )
+        mark_coalesced()
 
     return response
+
+async def astream_hr_analytics_query(query: str, conversation_history: Optional[List[Dict[str, str]]] = None, use_cache: bool = True) -> AsyncIterator[Dict[str, str]]:
+    """Stream HR analytics query events"""
+    if conversation_history is None:
+        conversation_history = []
+
+    # Format the conversation before this question, so a first question shares its caches with the same question asked alone
+    formatted_history = format_conversation_history(prior_history(conversation_history, query))
+
+    # Stream query events, following the identical stream already in flight if there is one
+    with trace_request("hr_analytics_stream"):
+        async for event in hr_query_flights.astream(
+            coalescing_key(query, formatted_history, use_cache),
+            lambda: astream_query_with_feedback(query, formatted_history, use_cache=use_cache)
+        ):
+            yield event
+        mark_coalesced()
@@ -6,82 +6,591 @@ that doesn't rely on LangChain, for use when LangChain is not available.
 """
 
 import sqlite3
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from collections import OrderedDict
+import threading
+import time
 import os
+import re
+import sys
+import queue
+from pathlib import Path
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 
 # Handle imports for both direct and package execution
 try:
     from app.core.config import settings
+    from app.services.query_budget import BudgetConnection
 except ImportError:
     from backend.app.core.config import settings
+    from backend.app.services.query_budget import BudgetConnection
+
+def canonicalize_sql(query: str) -> str:
+    """Canonicalize SQL text so formatting differences share a cache entry"""
+    # Split on quoted spans so their contents are left untouched: SQLite reads "Sales" as a string literal
+    # when no column has that name, so double-quoted text is as case-sensitive as single-quoted text
+    parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", query.strip().rstrip(";").strip())
+    canonical = []
+    for i, part in enumerate(parts):
+        if i % 2 == 1:
+            canonical.append(part)
+        else:
+            canonical.append(re.sub(r"\s+", " ", part).lower())
+    return "".join(canonical).strip()
+
+
+class QueryResultCache:
+    """Memory-bounded cache of query results, invalidated when the HR data changes"""
+
+    def __init__(self, db_path: str, max_bytes: int = None):
+        """Initialize an empty cache for the given database file"""
+        self.db_path = db_path
+        self.max_bytes = max_bytes if max_bytes is not None else settings.HR_RESULT_CACHE_MAX_BYTES
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._size = 0
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def data_version(self) -> Tuple[int, ...]:
+        """Return a version stamp that changes whenever the database file changes"""
+        version = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                stat = os.stat(path)
+                version.extend([stat.st_mtime_ns, stat.st_size])
+            except OSError:
+                version.extend([0, 0])
+        return tuple(version)
+
+    def _check_version(self) -> None:
+        """Drop all entries if the underlying data changed"""
+        version = self.data_version()
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._size = 0
+            self._version = version
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Roughly estimate the memory held by a cached value"""
+        if isinstance(value, str):
+            return sys.getsizeof(value)
+        return sys.getsizeof(repr(value))
+
+    @staticmethod
+    def _key(query: str, params: Tuple = ()) -> str:
+        """Build the cache key for a query and its bound parameters"""
+        key = canonicalize_sql(query)
+        return f"{key}\x00{params!r}" if params else key
+
+    def get(self, query: str, params: Tuple = ()) -> Optional[Any]:
+        """Return the cached result for a query, or None on a miss"""
+        key = self._key(query, params)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, query: str, value: Any, params: Tuple = ()) -> None:
+        """Store a query result, evicting least recently used entries to stay in budget"""
+        key = self._key(query, params)
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_version()
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def get_or_run(self, query: str, runner: Callable[[], Any],
+                   cacheable: Callable[[Any], bool] = None, use_cache: bool = True,
+                   params: Tuple = ()) -> Any:
+        """Return the cached result for a query, running and caching it on a miss"""
+        if not use_cache or not settings.HR_RESULT_CACHE_ENABLED:
+            return runner()
+
+        result = self.get(query, params)
+        if result is not None:
+            return result
+
+        result = runner()
+        if cacheable is None or cacheable(result):
+            self.set(query, result, params)
+        return result
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.HR_RESULT_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def get_schema_version(db_path: str) -> int:
+    """Return SQLite's schema version counter, which changes on every schema change"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA schema_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def get_table_sample(db_path: str, table: str, sample_rows: int = 3) -> Dict[str, Any]:
+    """Return the column definitions and a few sample rows of a table"""
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = [(col[1], col[2]) for col in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+        rows = conn.execute(f"SELECT * FROM {table} LIMIT {int(sample_rows)}").fetchall() if columns else []
+        return {"table": table, "columns": columns, "rows": rows}
+    finally:
+        conn.close()
+
+
+class SchemaCache:
+    """Caches the schema description used in the SQL prompt until the schema version changes"""
+
+    def __init__(self, builder: Callable[[], Any], version: Callable[[], int],
+                 check_interval: float = None, name: str = "schema description"):
+        """Initialize an empty cache around a schema builder and a version source"""
+        self.name = name
+        self.builder = builder
+        self.version = version
+        self.check_interval = check_interval if check_interval is not None else settings.SCHEMA_CACHE_CHECK_SECONDS
+
+        self._lock = threading.Lock()
+        self._table_info = None
+        self._version = None
+        self._checked_at = 0.0
+
+        self.hits = 0
+        self.builds = 0
+        self.last_build_seconds = 0.0
+        self.total_build_seconds = 0.0
+        self.built_at = None
+
+    def refresh(self, force: bool = False) -> Any:
+        """Rebuild the schema description if the schema version changed"""
+        with self._lock:
+            try:
+                version = self.version()
+            except Exception as e:
+                print(f"Error reading schema version: {str(e)}")
+                version = None
+            self._checked_at = time.monotonic()
+
+            if force or self._table_info is None or version != self._version:
+                started = time.perf_counter()
+                self._table_info = self.builder()
+                self.last_build_seconds = time.perf_counter() - started
+                self.total_build_seconds += self.last_build_seconds
+                self.builds += 1
+                self.built_at = time.time()
+                self._version = version
+                print(f"Built HR {self.name} (version {version}) in {self.last_build_seconds:.3f}s")
+            return self._table_info
+
+    def get(self) -> Any:
+        """Return the cached schema description, checking the version at most every check_interval seconds"""
+        if self._table_info is not None and time.monotonic() - self._checked_at < self.check_interval:
+            self.hits += 1
+            return self._table_info
+        return self.refresh()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and rebuild timings"""
+        return {
+            "version": self._version,
+            "hits": self.hits,
+            "builds": self.builds,
+            "last_build_seconds": round(self.last_build_seconds, 6),
+            "total_build_seconds": round(self.total_build_seconds, 6),
+            "built_at": self.built_at,
+            "length": len(self._table_info) if self._table_info else 0,
+        }
+
+
+def read_only_uri(db_path: str) -> str:
+    """Return the SQLite URI opening the HR database read-only (and immutable when configured)"""
+    uri = Path(db_path).resolve().as_uri() + "?mode=ro"
+    if settings.HR_DB_READ_PROFILE and settings.HR_DB_IMMUTABLE:
+        # SQLite then skips all locking and change detection; only safe while nothing writes the file
+        uri += "&immutable=1"
+    return uri
+
+
+def apply_read_profile(conn) -> None:
+    """Tune a connection for read-only aggregate queries when HR_DB_READ_PROFILE is enabled"""
+    if not settings.HR_DB_READ_PROFILE:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.HR_DB_MMAP_SIZE)}")
+        # A negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size = -{int(settings.HR_DB_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+
+def default_pool_size() -> int:
+    """Return the pool size matching the worker threadpool that runs HR queries"""
+    if settings.HR_DB_POOL_SIZE > 0:
+        return settings.HR_DB_POOL_SIZE
+    # Same default as the asyncio executor behind asyncio.to_thread
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class PoolStats:
+    """Checkout counters and wait times for a pool of HR database connections"""
+
+    def __init__(self, name: str, size: int):
+        """Initialize empty counters"""
+        self.name = name
+        self.size = size
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self.peak_in_use = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_connect(self) -> None:
+        """Record a new connection being opened"""
+        with self._lock:
+            self.connections += 1
+
+    def record_checkout(self, wait_seconds: float) -> None:
+        """Record a checkout and how long it waited for a free connection"""
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.peak_in_use = max(self.peak_in_use, self.checkouts - self.checkins)
+
+    def record_checkin(self) -> None:
+        """Record a connection being returned to the pool"""
+        with self._lock:
+            self.checkins += 1
+
+    def record_discard(self) -> None:
+        """Record a broken or stale connection being closed instead of reused"""
+        with self._lock:
+            self.discarded += 1
+
+    def record_timeout(self, wait_seconds: float) -> None:
+        """Record a checkout that gave up waiting for a free connection"""
+        with self._lock:
+            self.timeouts += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool counters"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "connections": self.connections,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.checkouts - self.checkins,
+                "peak_in_use": self.peak_in_use,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a free connection"""
+
+    pool_stats: Optional[PoolStats] = None
+
+    def connect(self):
+        """Check out a connection, recording the wait"""
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            if self.pool_stats is not None:
+                self.pool_stats.record_timeout(time.perf_counter() - started)
+            raise
+        if self.pool_stats is not None:
+            self.pool_stats.record_checkout(time.perf_counter() - started)
+        return connection
+
+    def recreate(self) -> "TimedQueuePool":
+        """Recreate the pool (e.g. on engine.dispose()) keeping its counters"""
+        pool = super().recreate()
+        pool.pool_stats = self.pool_stats
+        return pool
+
+
+def create_hr_engine(db_path: str, pool_size: int = None) -> Engine:
+    """Create the shared read-only SQLAlchemy engine for the HR database, with an instrumented connection pool"""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database file not found: {db_path}")
+
+    pool_size = pool_size if pool_size is not None else default_pool_size()
+    engine = create_engine(
+        f"sqlite:///{read_only_uri(db_path)}&uri=true",
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=settings.HR_DB_POOL_TIMEOUT_SECONDS,
+        # Pooled connections are handed to whichever worker thread checks them out
+        # BudgetConnection enforces the execution budget of generated queries
+        connect_args={"check_same_thread": False, "factory": BudgetConnection},
+    )
+
+    stats = PoolStats("langchain", pool_size)
+    engine.pool.pool_stats = stats
+    event.listen(engine, "connect", lambda dbapi_connection, record: stats.record_connect())
+    event.listen(engine, "connect", lambda dbapi_connection, record: apply_read_profile(dbapi_connection))
+    event.listen(engine, "checkin", lambda dbapi_connection, record: stats.record_checkin())
+    return engine
+
+
+class SQLiteConnectionPool:
+    """Bounded pool of sqlite3 connections that any worker thread can check out"""
+
+    def __init__(self, db_path: str, size: int = None, timeout: float = None,
+                 health_check_seconds: float = None, name: str = "hr_db"):
+        """Initialize an empty pool; connections are opened on demand up to size"""
+        self.db_path = db_path
+        self.size = size if size is not None else default_pool_size()
+        self.timeout = timeout if timeout is not None else settings.HR_DB_POOL_TIMEOUT_SECONDS
+        self.health_check_seconds = (
+            health_check_seconds if health_check_seconds is not None else settings.HR_DB_POOL_HEALTH_CHECK_SECONDS
+        )
+
+        # Idle connections with the time they were returned; LIFO keeps the warmest ones in use
+        self._idle: "queue.LifoQueue[Tuple[sqlite3.Connection, float]]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self.pool_stats = PoolStats(name, self.size)
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a new connection"""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database file not found: {self.db_path}")
+        # Pooled connections are handed to whichever worker thread checks them out
+        if settings.HR_DB_READ_PROFILE:
+            conn = sqlite3.connect(read_only_uri(self.db_path), uri=True, check_same_thread=False,
+                                   factory=BudgetConnection)
+            apply_read_profile(conn)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=BudgetConnection)
+        conn.row_factory = sqlite3.Row
+        self.pool_stats.record_connect()
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Close a connection that shouldn't be reused"""
+        self.pool_stats.record_discard()
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _is_healthy(self, conn: sqlite3.Connection, idle_since: float) -> bool:
+        """Check a connection that has been idle for a while still works"""
+        if time.monotonic() - idle_since < self.health_check_seconds:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, waiting up to timeout seconds for a free slot"""
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.pool_stats.record_timeout(time.perf_counter() - started)
+            raise TimeoutError(f"No HR database connection became free within {self.timeout}s (pool size {self.size})")
+
+        try:
+            while True:
+                try:
+                    conn, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open()
+                    break
+                if self._is_healthy(conn, idle_since):
+                    break
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+        self.pool_stats.record_checkout(time.perf_counter() - started)
+        return conn
+
+    def release(self, conn: sqlite3.Connection, discard: bool = False) -> None:
+        """Return a checked out connection to the pool"""
+        try:
+            if not discard:
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    self._idle.put((conn, time.monotonic()))
+                except sqlite3.Error:
+                    discard = True
+            if discard:
+                self._discard(conn)
+        finally:
+            self.pool_stats.record_checkin()
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and returns it afterwards"""
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except (sqlite3.ProgrammingError, sqlite3.InterfaceError):
+            # The connection itself is unusable (e.g. closed); don't hand it out again
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool counters"""
+        return self.pool_stats.stats()
+
 
 class HRDatabase:
     """Simple database connection for HR Analytics"""
     
-    def __init__(self, db_path: str = None):
-        """Initialize the database connection"""
+    def __init__(self, db_path: str = None, pool_size: int = None):
+        """Initialize the database and its connection pool"""
         if db_path is None:
             # Extract the path from the SQLAlchemy URI
             db_path = settings.HR_DATABASE_URL.replace('sqlite:///', '')
         
         self.db_path = db_path
         self.dialect = "sqlite"
-        self._conn = None
+        self.pool = SQLiteConnectionPool(db_path, size=pool_size)
+        self.result_cache = QueryResultCache(db_path)
     
     def connect(self) -> None:
-        """Connect to the database"""
-        if not os.path.exists(self.db_path):
-            raise FileNotFoundError(f"Database file not found: {self.db_path}")
-        
-        self._conn = sqlite3.connect(self.db_path)
-        self._conn.row_factory = sqlite3.Row
+        """Check that the database can be opened, warming one pooled connection"""
+        with self.pool.connection():
+            pass
     
     def close(self) -> None:
-        """Close the database connection"""
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        """Close the idle pooled connections"""
+        self.pool.close()
     
-    def get_table_info(self) -> str:
-        """Get information about the tables in the database"""
-        if not self._conn:
-            self.connect()
-        
-        cursor = self._conn.cursor()
-        
-        # Get all tables
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        
-        table_info = []
-        for table in tables:
-            table_name = table[0]
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
-            
-            column_info = []
-            for col in columns:
-                column_info.append(f"{col[1]} ({col[2]})")
-            
-            table_info.append(f"Table: {table_name}")
-            table_info.append("Columns: " + ", ".join(column_info))
-            table_info.append("")
+    def get_table_info(self, include: Callable[[str], bool] = None) -> str:
+        """Get information about the tables in the database, optionally only those include() accepts"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            # Get all tables
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            tables = cursor.fetchall()
+
+            table_info = []
+            for table in tables:
+                table_name = table[0]
+                if include is not None and not include(table_name):
+                    continue
+                cursor.execute(f"PRAGMA table_info({table_name})")
+                columns = cursor.fetchall()
+
+                column_info = []
+                for col in columns:
+                    column_info.append(f"{col[1]} ({col[2]})")
+
+                table_info.append(f"Table: {table_name}")
+                table_info.append("Columns: " + ", ".join(column_info))
+                table_info.append("")
         
         return "\n".join(table_info)
     
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Execute a SQL query and return the results as a list of dictionaries"""
-        if not self._conn:
-            self.connect()
-        
-        cursor = self._conn.cursor()
-        cursor.execute(query)
-        
-        # Get column names
-        column_names = [description[0] for description in cursor.description] if cursor.description else []
-        
-        # Fetch all rows
-        rows = cursor.fetchall()
+    def execute_query(self, query: str, params: Tuple = (), use_cache: bool = True,
+                      observer: Callable[[str, float], None] = None) -> List[Dict[str, Any]]:
+        """Execute a SQL query (with optional bound parameters) and return the results as a list of dictionaries"""
+        # observer, if given, receives the query and its latency whenever it actually runs (not on cache hits)
+        def run() -> List[Dict[str, Any]]:
+            started = time.perf_counter()
+            rows = self._execute_query(query, params)
+            if observer is not None:
+                observer(query, time.perf_counter() - started)
+            return rows
+
+        results = self.result_cache.get_or_run(query, run, use_cache=use_cache, params=params)
+        # Hand out copies so callers cannot mutate cached rows
+        return [dict(result) for result in results]
+
+    def _execute_query(self, query: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        """Execute a SQL query against the database without caching"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+
+            # Get column names
+            column_names = [description[0] for description in cursor.description] if cursor.description else []
+
+            # Fetch all rows
+            rows = cursor.fetchall()
         
         # Convert rows to dictionaries
         results = []
@@ -123,3 +632,6 @@ class HRDatabase:
 
 # Create a singleton instance
 hr_db = HRDatabase()
+
+# Result cache for queries run through LangChain's QuerySQLDatabaseTool
+langchain_result_cache = QueryResultCache(hr_db.db_path)
@@ -0,0 +1,489 @@
+"""
+HR Analytics Intent Router
+
+This module answers common HR analytics questions (attrition rate, headcount,
+gender/age/tenure distributions, location breakdown and reasons for leaving)
+deterministically. It extracts department/location/band/process/gender/month/
+year filters, builds parameterized SQL and scores its confidence, so that
+questions it fully understands skip the LLM entirely.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+MONTHS = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# Columns questions can be filtered or grouped by
+DIMENSIONS = ["department", "location", "band", "process", "gender", "month", "year"]
+
+# Words that name each dimension in a question
+DIMENSION_WORDS = {
+    "department": ["department", "departments", "dept", "depts"],
+    "location": ["location", "locations", "office", "offices", "site", "sites"],
+    "band": ["band", "bands", "level", "levels"],
+    "process": ["process", "processes"],
+    "gender": ["gender", "genders"],
+    "month": ["month", "months"],
+    "year": ["year", "years"],
+}
+
+# Intents with the patterns that identify them and how confident a match is
+INTENT_PATTERNS = [
+    ("attrition_rate", r"\b(attrition|turnover|churn)\s+(rate|rates|percentage|percent|%)", 0.95),
+    ("attrition_rate", r"\b(attrition|turnover|churn)\b", 0.8),
+    ("headcount", r"\bhead\s*counts?\b", 0.95),
+    ("headcount", r"\bhow many (active )?(employees|people|staff)\b", 0.9),
+    ("gender_distribution", r"\bgender\s+(distribution|split|ratio|breakdown|mix|diversity)\b", 0.95),
+    ("gender_distribution", r"\b(distribution|split|ratio|breakdown|mix)\s+(of|by)\s+gender\b", 0.95),
+    ("age_distribution", r"\bage\s*(group|groups|distribution|breakdown|brackets?)\b", 0.95),
+    ("tenure_distribution", r"\b(tenure|years of service)\b", 0.9),
+    ("leaving_reasons", r"\breasons?\s+(for|of|behind)\s+(leaving|resignations?|attrition|exits?)\b", 0.95),
+    ("leaving_reasons", r"\b(leaving|resignation|attrition|exit)\s+reasons?\b", 0.95),
+    ("location_breakdown", r"\blocations?\b", 0.8),
+]
+
+# Intents that are themselves a breakdown and can't be grouped further
+DISTRIBUTION_COLUMNS = {
+    "gender_distribution": "gender",
+    "age_distribution": "age_group",
+    "tenure_distribution": "tenure_bucket",
+    "leaving_reasons": "reason",
+    "location_breakdown": "location",
+}
+
+# Words the router understands besides intent phrases, dimensions and filter values
+VOCABULARY = set("""
+a all an and any are as at be by can could current currently data do does during each every for from get give
+have has i in is know let me my of on org organisation organization our overall per please see show
+tell the there to total us was we were what what's whats with within you
+company employees employee staff workforce people active distribution breakdown split
+""".split())
+
+# Penalty applied to the intent's confidence for each word the router doesn't understand
+UNKNOWN_WORD_PENALTY = 0.2
+AMBIGUOUS_INTENT_PENALTY = 0.3
+
+
+class Route:
+    """A question the router understood: its intent, filters and parameterized SQL"""
+
+    def __init__(self, intent: str, filters: Dict[str, List[Any]], group_by: List[str],
+                 confidence: float, sql: str = "", params: Tuple = (), reason: str = ""):
+        """Initialize a route"""
+        self.intent = intent
+        self.filters = filters
+        self.group_by = group_by
+        self.confidence = confidence
+        self.sql = sql
+        self.params = params
+        self.reason = reason
+
+    def display_sql(self) -> str:
+        """Return the SQL with its parameters inlined, for showing to users and in history"""
+        values = iter(self.params)
+
+        def literal(_match):
+            value = next(values)
+            if isinstance(value, (int, float)):
+                return str(value)
+            return "'" + str(value).replace("'", "''") + "'"
+
+        return re.sub(r"\?", literal, self.sql)
+
+
+class FastPathStats:
+    """Counts how much HR analytics traffic the fast path serves"""
+
+    def __init__(self):
+        """Initialize empty counters"""
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.served = 0
+        self.errors = 0
+        self.intents: Dict[str, int] = {}
+        self.decline_reasons: Dict[str, int] = {}
+
+    def record(self, route: Optional[Route], served: bool) -> None:
+        """Record one routed question and whether the fast path answered it"""
+        with self._lock:
+            self.questions += 1
+            if served:
+                self.served += 1
+                self.intents[route.intent] = self.intents.get(route.intent, 0) + 1
+            else:
+                reason = route.reason if route is not None and route.reason else "no_intent"
+                self.decline_reasons[reason] = self.decline_reasons.get(reason, 0) + 1
+
+    def record_decline(self, reason: str) -> None:
+        """Record a question the fast path declined before routing it"""
+        with self._lock:
+            self.questions += 1
+            self.decline_reasons[reason] = self.decline_reasons.get(reason, 0) + 1
+
+    def record_error(self) -> None:
+        """Record a routed question whose SQL failed, so it fell back to the LLM"""
+        with self._lock:
+            self.questions += 1
+            self.errors += 1
+            self.decline_reasons["error"] = self.decline_reasons.get("error", 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the fast path counters"""
+        with self._lock:
+            return {
+                "enabled": settings.FAST_PATH_ENABLED,
+                "min_confidence": settings.FAST_PATH_MIN_CONFIDENCE,
+                "questions": self.questions,
+                "served": self.served,
+                "declined": self.questions - self.served,
+                "errors": self.errors,
+                "served_share": round(self.served / self.questions, 4) if self.questions else 0.0,
+                "intents": dict(self.intents),
+                "decline_reasons": dict(self.decline_reasons),
+            }
+
+# Create a singleton instance
+fast_path_stats = FastPathStats()
+
+
+def load_filter_values(db_path: str) -> Dict[str, List[Any]]:
+    """Load the distinct values of each filterable column from the HR database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            dimension: [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {dimension} FROM hr_data WHERE {dimension} IS NOT NULL"
+            )]
+            for dimension in DIMENSIONS
+        }
+    finally:
+        conn.close()
+
+
+def _value_pattern(value: str) -> re.Pattern:
+    """Return the pattern matching a filter value in a question"""
+    pattern = r"(?<![\w&])" + re.escape(value) + r"(?![\w&])"
+    # Short values such as HR or IT are only recognized in capitals ("it" is a pronoun)
+    if len(value) <= 3:
+        return re.compile(pattern)
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def extract_filters(question: str, known_values: Dict[str, List[Any]]) -> Tuple[Dict[str, List[Any]], str]:
+    """Extract filter values from a question, returning the filters and the question with them removed"""
+    filters: Dict[str, List[Any]] = {}
+    remaining = question
+
+    for dimension in ("department", "location", "band", "process", "gender"):
+        # Match longer values first so "New York" wins over "York"
+        for value in sorted(known_values.get(dimension, []), key=len, reverse=True):
+            if not isinstance(value, str) or len(value) < 2:
+                continue
+            pattern = _value_pattern(value)
+            if pattern.search(remaining):
+                filters.setdefault(dimension, []).append(value)
+                remaining = pattern.sub(" ", remaining)
+
+    for month in MONTHS:
+        # "May" is only a month when capitalized
+        flags = 0 if month == "May" else re.IGNORECASE
+        pattern = re.compile(rf"\b({month}|{month[:3]})\b", flags)
+        if pattern.search(remaining):
+            filters.setdefault("month", []).append(month)
+            remaining = pattern.sub(" ", remaining)
+
+    for year in re.findall(r"\b((?:19|20)\d\d)\b", remaining):
+        if int(year) not in filters.get("year", []):
+            filters.setdefault("year", []).append(int(year))
+    remaining = re.sub(r"\b(?:19|20)\d\d\b", " ", remaining)
+
+    return filters, remaining
+
+
+def extract_group_by(question: str) -> Tuple[List[str], str]:
+    """Extract the dimensions a question groups by, returning them and the question with them removed"""
+    words = {word: dimension for dimension, names in DIMENSION_WORDS.items() for word in names}
+    word_pattern = "|".join(sorted(words, key=len, reverse=True))
+    patterns = [
+        # "by department", "per month", "by department and location"
+        rf"\b(?:by|per|each|every|across|for each|for every)\s+((?:{word_pattern})(?:\s*(?:,|and|&)\s*(?:{word_pattern}))*)\b",
+        # "department-wise"
+        rf"\b({word_pattern})[- ]?wise\b",
+    ]
+    group_by = []
+    remaining = question
+
+    for pattern in patterns:
+        for match in re.finditer(pattern, remaining, re.IGNORECASE):
+            for word in re.findall(word_pattern, match.group(1), re.IGNORECASE):
+                dimension = words[word.lower()]
+                if dimension not in group_by:
+                    group_by.append(dimension)
+        remaining = re.sub(pattern, " ", remaining, flags=re.IGNORECASE)
+
+    for dimension, pattern in (("month", r"\b(monthly|month[- ]on[- ]month)\b"),
+                               ("year", r"\b(yearly|annually|year[- ]on[- ]year)\b")):
+        if re.search(pattern, remaining, re.IGNORECASE):
+            if dimension not in group_by:
+                group_by.append(dimension)
+            remaining = re.sub(pattern, " ", remaining, flags=re.IGNORECASE)
+
+    return group_by, remaining
+
+
+def unknown_words(text: str) -> List[str]:
+    """Return the words of a question the router doesn't understand"""
+    known = set(VOCABULARY)
+    for words in DIMENSION_WORDS.values():
+        known.update(words)
+    return [word for word in re.findall(r"[a-z][a-z'&-]*", text.lower()) if word not in known]
+
+
+def _where(filters: Dict[str, List[Any]], conditions: List[str] = None) -> Tuple[str, Tuple]:
+    """Build a parameterized WHERE clause from filters and fixed conditions"""
+    clauses = list(conditions or [])
+    params: List[Any] = []
+    for dimension in DIMENSIONS:
+        values = filters.get(dimension)
+        if not values:
+            continue
+        if len(values) == 1:
+            clauses.append(f"{dimension} = ?")
+        else:
+            clauses.append(f"{dimension} IN ({', '.join('?' for _ in values)})")
+        params.extend(values)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), tuple(params)
+
+
+def _month_order(column: str = "month") -> str:
+    """Return an ORDER BY expression sorting month names chronologically"""
+    cases = " ".join(f"WHEN '{month}' THEN {i}" for i, month in enumerate(MONTHS, start=1))
+    return f"CASE {column} {cases} END"
+
+
+def _group_order(group_by: List[str], fallback: str) -> str:
+    """Order grouped rows chronologically by time dimensions, otherwise by the fallback"""
+    order = []
+    if "year" in group_by:
+        order.append("year")
+    if "month" in group_by:
+        order.append(_month_order())
+    others = [dimension for dimension in group_by if dimension not in ("year", "month")]
+    if others or not order:
+        order.append(fallback)
+    return ", ".join(order)
+
+
+def build_sql(intent: str, filters: Dict[str, List[Any]], group_by: List[str], use_cube: bool = False,
+              cube_table: str = "") -> Tuple[str, Tuple]:
+    """Build the parameterized SQL for an intent"""
+    dims = ", ".join(group_by)
+    select_dims = f"{dims}, " if dims else ""
+    group_clause = f" GROUP BY {dims}" if dims else ""
+
+    if intent == "attrition_rate":
+        if use_cube:
+            where, params = _where(filters)
+            sql = (
+                f"SELECT {select_dims}SUM(attrited) AS attrited, SUM(headcount) AS headcount, "
+                f"ROUND(SUM(attrited) * 100.0 / NULLIF(SUM(headcount), 0), 2) AS attrition_rate "
+                f"FROM {cube_table}{where}{group_clause}"
+            )
+        else:
+            where, params = _where(filters)
+            sql = (
+                f"SELECT {select_dims}SUM(overall_inactive_count) AS attrited, SUM(count) AS headcount, "
+                f"ROUND(SUM(overall_inactive_count) * 100.0 / NULLIF(SUM(count), 0), 2) AS attrition_rate "
+                f"FROM hr_data{where}{group_clause}"
+            )
+        if dims:
+            sql += f" ORDER BY {_group_order(group_by, 'attrition_rate DESC')}"
+        return sql, params
+
+    if intent == "headcount":
+        where, params = _where(filters, ["active_count = 1"])
+        sql = f"SELECT {select_dims}COUNT(DISTINCT emp_id) AS headcount FROM hr_data{where}{group_clause}"
+        if dims:
+            sql += f" ORDER BY {_group_order(group_by, 'headcount DESC')}"
+        return sql, params
+
+    if intent == "location_breakdown":
+        where, params = _where(filters)
+        sql = (
+            f"SELECT location, COUNT(DISTINCT emp_id) AS headcount, SUM(overall_inactive_count) AS attrited, "
+            f"ROUND(SUM(overall_inactive_count) * 100.0 / NULLIF(SUM(count), 0), 2) AS attrition_rate "
+            f"FROM hr_data{where} GROUP BY location ORDER BY headcount DESC LIMIT 10"
+        )
+        return sql, params
+
+    column = DISTRIBUTION_COLUMNS[intent]
+    if intent == "leaving_reasons":
+        where, params = _where(filters, ["reason IS NOT NULL"])
+        sql = (
+            f"SELECT reason, COUNT(*) AS count, "
+            f"ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM hr_data{where}), 2) AS percentage "
+            f"FROM hr_data{where} GROUP BY reason ORDER BY count DESC LIMIT 10"
+        )
+        return sql, params + params
+
+    where, params = _where(filters, [f"{column} IS NOT NULL"])
+    order = "count DESC" if intent == "gender_distribution" else column
+    if intent == "tenure_distribution":
+        buckets = ["<1 year", "1-2 years", "3-5 years", "6-10 years", "10+ years"]
+        order = "CASE tenure_bucket " + " ".join(
+            f"WHEN '{bucket}' THEN {i}" for i, bucket in enumerate(buckets, start=1)
+        ) + " END"
+    sql = (
+        f"SELECT {column}, COUNT(DISTINCT emp_id) AS count, "
+        f"ROUND(COUNT(DISTINCT emp_id) * 100.0 / (SELECT COUNT(DISTINCT emp_id) FROM hr_data{where}), 2) AS percentage "
+        f"FROM hr_data{where} GROUP BY {column} ORDER BY {order}"
+    )
+    return sql, params + params
+
+
+def route_question(question: str, known_values: Dict[str, List[Any]], use_cube: bool = False,
+                   cube_table: str = "") -> Optional[Route]:
+    """Match a question to an intent, returning its route with a confidence score (None if no intent matched)"""
+    matches: Dict[str, float] = {}
+    for intent, pattern, confidence in INTENT_PATTERNS:
+        if re.search(pattern, question, re.IGNORECASE):
+            matches[intent] = max(matches.get(intent, 0.0), confidence)
+    if not matches:
+        return None
+
+    # "Attrition rate by location" is an attrition question, not a location breakdown
+    if len(matches) > 1:
+        matches.pop("location_breakdown", None)
+        if "leaving_reasons" in matches:
+            matches.pop("attrition_rate", None)
+
+    intent = max(matches, key=matches.get)
+    confidence = matches[intent]
+    reason = ""
+
+    filters, remaining = extract_filters(question, known_values)
+    group_by, remaining = extract_group_by(remaining)
+    for matched_intent, pattern, _ in INTENT_PATTERNS:
+        if matched_intent == intent:
+            remaining = re.sub(pattern, " ", remaining, flags=re.IGNORECASE)
+
+    if len(matches) > 1:
+        confidence -= AMBIGUOUS_INTENT_PENALTY
+        reason = "ambiguous_intent"
+
+    if intent in DISTRIBUTION_COLUMNS:
+        column = DISTRIBUTION_COLUMNS[intent]
+        extra = [dimension for dimension in group_by if dimension != column]
+        if extra:
+            confidence -= AMBIGUOUS_INTENT_PENALTY
+            reason = reason or "unsupported_grouping"
+        group_by = []
+    elif len(group_by) > 2:
+        confidence -= AMBIGUOUS_INTENT_PENALTY
+        reason = reason or "unsupported_grouping"
+
+    # Default to 2024 for attrition, as the SQL prompt instructs the LLM to
+    if intent == "attrition_rate" and "year" not in filters and "year" not in group_by:
+        filters["year"] = [settings.FAST_PATH_DEFAULT_YEAR]
+
+    unknown = unknown_words(remaining)
+    if unknown:
+        confidence -= UNKNOWN_WORD_PENALTY * len(unknown)
+        reason = reason or "unrecognized_terms"
+
+    confidence = round(max(confidence, 0.0), 2)
+    if confidence < settings.FAST_PATH_MIN_CONFIDENCE:
+        reason = reason or "low_confidence"
+    else:
+        reason = ""
+
+    sql, params = build_sql(intent, filters, group_by, use_cube, cube_table)
+    return Route(intent, filters, group_by, confidence, sql, params, reason)
+
+
+# Titles and column headings used in fast path answers
+INTENT_TITLES = {
+    "attrition_rate": "Attrition Rate",
+    "headcount": "Headcount",
+    "gender_distribution": "Gender Distribution",
+    "age_distribution": "Age Group Distribution",
+    "tenure_distribution": "Tenure Distribution",
+    "leaving_reasons": "Reasons for Leaving",
+    "location_breakdown": "Location Analysis",
+}
+
+COLUMN_HEADINGS = {
+    "attrited": "Attrited",
+    "headcount": "Headcount",
+    "attrition_rate": "Attrition Rate (%)",
+    "count": "Count",
+    "percentage": "Percentage (%)",
+    "age_group": "Age Group",
+    "tenure_bucket": "Tenure",
+}
+
+
+def describe_filters(filters: Dict[str, List[Any]]) -> str:
+    """Describe the applied filters, e.g. "Finance, March 2024" """
+    parts = []
+    for dimension in DIMENSIONS:
+        values = filters.get(dimension)
+        if values:
+            parts.append(" / ".join(str(value) for value in values))
+    return ", ".join(parts)
+
+
+def _format_value(column: str, value: Any) -> str:
+    """Format a result value for a markdown table"""
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    if isinstance(value, int) and column != "year":
+        return f"{value:,}"
+    return str(value)
+
+
+def format_answer(route: Route, rows: List[Dict[str, Any]]) -> str:
+    """Format the fast path's query results as a markdown answer"""
+    title = INTENT_TITLES.get(route.intent, "Results")
+    if route.group_by:
+        title += " by " + " and ".join(dimension.capitalize() for dimension in route.group_by)
+    scope = describe_filters(route.filters)
+    if scope:
+        title += f" ({scope})"
+
+    answer = f"### {title}\n\n"
+    if not rows:
+        return answer + "No data was found for these filters."
+
+    if route.intent == "attrition_rate" and not route.group_by:
+        row = rows[0]
+        if row.get("attrition_rate") is None:
+            return answer + "No data was found for these filters."
+        return answer + (
+            f"The attrition rate is **{row['attrition_rate']:.2f}%**: "
+            f"{_format_value('attrited', row['attrited'])} attrited out of a total headcount of "
+            f"{_format_value('headcount', row['headcount'])}."
+        )
+
+    if route.intent == "headcount" and not route.group_by:
+        return answer + f"The headcount of active employees is **{_format_value('headcount', rows[0]['headcount'])}**."
+
+    columns = list(rows[0].keys())
+    answer += "| " + " | ".join(COLUMN_HEADINGS.get(column, column.replace("_", " ").title()) for column in columns) + " |\n"
+    answer += "|" + "|".join("---" for _ in columns) + "|\n"
+    for row in rows:
+        answer += "| " + " | ".join(_format_value(column, row[column]) for column in columns) + " |\n"
+    return answer
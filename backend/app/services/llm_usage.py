@@ -0,0 +1,216 @@
+"""
+LLM Usage Accounting
+
+This module records the prompt tokens, completion tokens and latency of
+every LLM call, with the pipeline stage that made it (sql, answer,
+analysis, summary) and the user and conversation it was made for. Calls
+are queued in memory and written to the llm_usage table in batches by a
+background thread, so recording never adds a database write to the request
+path. usage_report() aggregates the table into per-user and
+per-conversation totals and latency percentiles.
+"""
+
+import contextvars
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.db.database import SessionLocal
+    from app.models.llm_usage import LLMUsage
+    from app.utils.tokens import estimate_tokens
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.db.database import SessionLocal
+    from backend.app.models.llm_usage import LLMUsage
+    from backend.app.utils.tokens import estimate_tokens
+
+# The user and conversation the current request's LLM calls are made for
+_scope: contextvars.ContextVar = contextvars.ContextVar("llm_usage_scope", default=(None, None))
+
+
+@contextmanager
+def usage_scope(user_id: Optional[int] = None, conversation_id: Optional[str] = None) -> Iterator[None]:
+    """Attribute the LLM calls made inside the block to a user and conversation"""
+    token = _scope.set((user_id, conversation_id))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current_usage_scope() -> Tuple[Optional[int], Optional[str]]:
+    """Return the user and conversation the current context's LLM calls are attributed to"""
+    return _scope.get()
+
+
+def prompt_text(prompt: Any) -> str:
+    """Return the text of a prompt passed to the LLM (a string or a prompt value)"""
+    return prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+
+
+def utc_now() -> datetime:
+    """Return the current UTC time without a timezone, as SQLite's CURRENT_TIMESTAMP stores it"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def percentile(ordered: List[float], share: float) -> float:
+    """Return the nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(share * len(ordered))) - 1))]
+
+
+class UsageRecorder:
+    """Queues LLM call records and writes them to the database from a background thread"""
+
+    def __init__(self):
+        """Initialize an empty queue; the writer thread starts with the first record"""
+        self._queue: queue.Queue = queue.Queue(maxsize=settings.LLM_USAGE_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def record(self, stage: str, prompt: Any, response: Any, seconds: float) -> None:
+        """Queue the usage of an LLM call; token counts come from the response, or are estimated"""
+        if not settings.LLM_USAGE_ENABLED:
+            return
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        content = getattr(response, "content", response)
+        estimated = not usage
+        user_id, conversation_id = _scope.get()
+        row = {
+            "created_at": utc_now(),
+            "user_id": user_id,
+            "conversation_id": conversation_id,
+            "stage": stage,
+            "prompt_tokens": usage.get("input_tokens") if usage else estimate_tokens(prompt_text(prompt)),
+            "completion_tokens": usage.get("output_tokens") if usage else estimate_tokens(str(content)),
+            "latency_ms": round(seconds * 1000, 3),
+            "estimated": estimated,
+        }
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # The writer fell behind; losing accounting rows beats blocking a request
+            with self._lock:
+                self.dropped += 1
+            return
+
+        with self._lock:
+            self.recorded += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="llm-usage-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Write queued records in batches until the process exits"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + settings.LLM_USAGE_FLUSH_SECONDS
+            while len(batch) < settings.LLM_USAGE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        """Insert a batch of records"""
+        try:
+            with SessionLocal() as db:
+                db.execute(insert(LLMUsage), batch)
+                db.commit()
+            with self._lock:
+                self.written += len(batch)
+        except Exception as e:
+            print(f"Error writing LLM usage records: {str(e)}")
+            with self._lock:
+                self.write_errors += len(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Write everything queued so far (used at shutdown)"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the writer's counters"""
+        with self._lock:
+            return {
+                "enabled": settings.LLM_USAGE_ENABLED,
+                "recorded": self.recorded,
+                "written": self.written,
+                "pending": self._queue.qsize(),
+                "dropped": self.dropped,
+                "write_errors": self.write_errors,
+            }
+
+# Create a singleton instance
+usage_recorder = UsageRecorder()
+
+
+def summarize_usage(key: str, rows: List[Any]) -> Dict[str, Any]:
+    """Return the totals and latency/token percentiles of a group of usage rows"""
+    latencies = sorted(row.latency_ms for row in rows)
+    tokens = sorted(row.prompt_tokens + row.completion_tokens for row in rows)
+    return {
+        "key": key,
+        "calls": len(rows),
+        "prompt_tokens": sum(row.prompt_tokens for row in rows),
+        "completion_tokens": sum(row.completion_tokens for row in rows),
+        "total_tokens": sum(tokens),
+        "latency_ms": round(sum(latencies), 3),
+        "p50_latency_ms": round(percentile(latencies, 0.50), 3),
+        "p95_latency_ms": round(percentile(latencies, 0.95), 3),
+        "p99_latency_ms": round(percentile(latencies, 0.99), 3),
+        "p50_tokens": percentile(tokens, 0.50),
+        "p95_tokens": percentile(tokens, 0.95),
+    }
+
+
+def group_usage(rows: List[Any], key) -> List[Dict[str, Any]]:
+    """Summarize rows grouped by key, largest token spend first"""
+    groups: Dict[str, List[Any]] = {}
+    for row in rows:
+        groups.setdefault(key(row), []).append(row)
+    summaries = [summarize_usage(name, group) for name, group in groups.items()]
+    return sorted(summaries, key=lambda summary: summary["total_tokens"], reverse=True)
+
+
+def usage_report(db: Session, hours: float = 24.0, limit: int = 20) -> Dict[str, Any]:
+    """Aggregate the LLM calls of the last hours into totals per stage, user and conversation"""
+    since = utc_now() - timedelta(hours=hours)
+    rows = db.execute(
+        select(
+            LLMUsage.user_id, LLMUsage.conversation_id, LLMUsage.stage,
+            LLMUsage.prompt_tokens, LLMUsage.completion_tokens, LLMUsage.latency_ms,
+        ).where(LLMUsage.created_at >= since)
+    ).all()
+
+    return {
+        "hours": hours,
+        "total": summarize_usage("total", rows),
+        "stages": group_usage(rows, lambda row: row.stage),
+        "users": group_usage(rows, lambda row: str(row.user_id) if row.user_id is not None else "none")[:limit],
+        "conversations": group_usage(rows, lambda row: row.conversation_id or "none")[:limit],
+        "recorder": usage_recorder.stats(),
+    }
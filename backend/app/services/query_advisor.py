@@ -0,0 +1,261 @@
+"""
+Query Plan Advisor
+
+This module runs EXPLAIN QUERY PLAN on the SQL executed for HR Analytics
+questions, records the queries that scan hr_data in full or build temporary
+B-trees together with their latency, and aggregates the filter and
+group-by columns of those queries into a ranked list of composite or
+covering index recommendations.
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.hr_db import hr_db, canonicalize_sql
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.hr_db import hr_db, canonicalize_sql
+
+TABLE = "hr_data"
+
+# Covering indexes wider than this cost more to maintain than they save
+MAX_COVERING_COLUMNS = 8
+
+
+def strip_literals(query: str) -> str:
+    """Replace string literals with placeholders so their contents aren't mistaken for columns"""
+    return re.sub(r"'(?:[^']|'')*'", "?", query)
+
+
+def _clause(query: str, start: str, ends: List[str]) -> List[str]:
+    """Return every segment of a query between a keyword and the next clause keyword"""
+    end_pattern = "|".join(ends)
+    return [
+        match.group(1)
+        for match in re.finditer(rf"\b{start}\b(.*?)(?=\b(?:{end_pattern})\b|$)", query, re.IGNORECASE | re.DOTALL)
+    ]
+
+
+def extract_columns(query: str, columns: List[str]) -> Dict[str, List[str]]:
+    """Classify the hr_data columns a query uses: equality/range/LIKE filters, group-by, order-by and all referenced"""
+    sql = strip_literals(query).lower()
+    names = "|".join(sorted((re.escape(column) for column in columns), key=len, reverse=True))
+    found = {"equality": [], "range": [], "like": [], "function": [], "group_by": [], "order_by": [], "referenced": []}
+
+    def add(kind: str, column: str) -> None:
+        if column not in found[kind]:
+            found[kind].append(column)
+
+    for segment in _clause(sql, "where", ["group", "order", "limit", "having", "union"]) + \
+            _clause(sql, "having", ["order", "limit", "union"]):
+        for match in re.finditer(rf"(\w+\(\s*)?\b({names})\b\s*\)?\s*(=|==|in\s*\(|<=|>=|<|>|between|not\s+like|like|is)",
+                                 segment):
+            wrapped, column, operator = match.group(1), match.group(2), match.group(3)
+            if operator == "is":
+                # IS [NOT] NULL checks are rarely selective enough to index
+                continue
+            if wrapped:
+                # LOWER(col) = ... can't use a plain index on col
+                add("function", column)
+            elif operator.startswith("like") or operator.startswith("not"):
+                add("like", column)
+            elif operator in ("=", "==") or operator.startswith("in"):
+                add("equality", column)
+            else:
+                add("range", column)
+
+    for segment in _clause(sql, "group by", ["having", "order", "limit", "union"]):
+        for column in re.findall(rf"\b({names})\b", segment):
+            add("group_by", column)
+    for segment in _clause(sql, "order by", ["limit", "union"]):
+        for column in re.findall(rf"\b({names})\b", segment):
+            add("order_by", column)
+    for column in re.findall(rf"\b({names})\b", sql):
+        add("referenced", column)
+    return found
+
+
+def recommend_index(used: Dict[str, List[str]]) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    """Return the (key columns, covering columns) of the index that would serve a query, if any"""
+    # Equality filters first, then the group-by columns (so grouping needs no temp B-tree), then one range filter
+    key: List[str] = []
+    for column in used["equality"] + used["group_by"] + used["range"][:1]:
+        if column not in key:
+            key.append(column)
+    if not key:
+        return None
+
+    extra = [column for column in used["referenced"] if column not in key]
+    covering = tuple(extra) if len(key) + len(extra) <= MAX_COVERING_COLUMNS else ()
+    return tuple(key), covering
+
+
+def index_statement(key: Tuple[str, ...], covering: Tuple[str, ...] = ()) -> str:
+    """Return the CREATE INDEX statement for a recommendation"""
+    columns = list(key) + list(covering)
+    name = "idx_" + "_".join(key) + ("_covering" if covering else "")
+    return f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} ({', '.join(columns)})"
+
+
+class QueryPlanAdvisor:
+    """Records slow query plans and turns their column usage into index recommendations"""
+
+    def __init__(self, max_entries: int = None):
+        """Initialize an empty advisor"""
+        self.max_entries = max_entries if max_entries is not None else settings.QUERY_ADVISOR_MAX_QUERIES
+        self._lock = threading.Lock()
+        self._queries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._columns: Optional[List[str]] = None
+        self._indexes: Optional[List[Tuple[str, ...]]] = None
+        self.observations = 0
+        self.explain_errors = 0
+
+    def _schema(self, conn) -> Tuple[List[str], List[Tuple[str, ...]]]:
+        """Load the hr_data columns and the column lists of its existing indexes"""
+        if self._columns is None:
+            self._columns = [row[1].lower() for row in conn.execute(f"PRAGMA table_info({TABLE})")]
+            self._indexes = []
+            for index in conn.execute(f"PRAGMA index_list({TABLE})").fetchall():
+                index_columns = conn.execute(f"PRAGMA index_info({index[1]})").fetchall()
+                self._indexes.append(tuple(str(column[2]).lower() for column in index_columns))
+        return self._columns, self._indexes
+
+    def refresh_schema(self) -> None:
+        """Forget the cached columns and indexes, e.g. after creating a recommended index"""
+        with self._lock:
+            self._columns = None
+            self._indexes = None
+            for entry in self._queries.values():
+                entry["plan"] = None
+
+    def explain(self, query: str) -> List[str]:
+        """Return the EXPLAIN QUERY PLAN detail lines for a query"""
+        with hr_db.pool.connection() as conn:
+            self._schema(conn)
+            return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query.strip().rstrip(';')}").fetchall()]
+
+    def observe(self, query: str, latency_seconds: float) -> None:
+        """Record an executed query, explaining its plan the first time it is seen"""
+        if not settings.QUERY_ADVISOR_ENABLED or not query:
+            return
+        key = canonicalize_sql(query)
+        with self._lock:
+            self.observations += 1
+            entry = self._queries.get(key)
+            if entry is not None:
+                self._queries.move_to_end(key)
+                entry["count"] += 1
+                entry["total_seconds"] += latency_seconds
+                entry["max_seconds"] = max(entry["max_seconds"], latency_seconds)
+                entry["last_seconds"] = latency_seconds
+                entry["last_seen"] = time.time()
+                if entry["plan"] is not None:
+                    return
+
+        # Explain outside the lock; EXPLAIN QUERY PLAN doesn't run the query
+        try:
+            plan = self.explain(query)
+        except Exception as e:
+            print(f"Error explaining query plan: {str(e)}")
+            with self._lock:
+                self.explain_errors += 1
+            return
+
+        full_scans = [line for line in plan if re.match(rf"SCAN {TABLE}\b", line) and "INDEX" not in line]
+        temp_btrees = [line for line in plan if "TEMP B-TREE" in line]
+        used = extract_columns(query, self._columns or [])
+
+        with self._lock:
+            entry = self._queries.get(key)
+            if entry is None:
+                entry = {
+                    "query": key,
+                    "count": 1,
+                    "total_seconds": latency_seconds,
+                    "max_seconds": latency_seconds,
+                    "last_seconds": latency_seconds,
+                    "last_seen": time.time(),
+                }
+                self._queries[key] = entry
+            entry.update({"plan": plan, "full_scans": full_scans, "temp_btrees": temp_btrees, "columns": used})
+            while len(self._queries) > self.max_entries:
+                self._queries.popitem(last=False)
+
+    def _is_indexed(self, key: Tuple[str, ...]) -> bool:
+        """Check whether an existing index already starts with the recommended key columns"""
+        return any(index[:len(key)] == key for index in (self._indexes or []))
+
+    def recommendations(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Rank index recommendations by the latency of the scanning queries they would serve"""
+        with self._lock:
+            entries = [entry for entry in self._queries.values() if entry.get("plan") is not None]
+
+        ranked: Dict[Tuple, Dict[str, Any]] = {}
+        for entry in entries:
+            if not entry["full_scans"] and not entry["temp_btrees"]:
+                continue
+            recommendation = recommend_index(entry["columns"])
+            if recommendation is None or self._is_indexed(recommendation[0]):
+                continue
+            item = ranked.setdefault(recommendation, {
+                "columns": list(recommendation[0]),
+                "covering_columns": list(recommendation[1]),
+                "create_statement": index_statement(recommendation[0]),
+                "covering_statement": index_statement(*recommendation) if recommendation[1] else "",
+                "queries": 0,
+                "executions": 0,
+                "total_ms": 0.0,
+                "example": entry["query"],
+            })
+            item["queries"] += 1
+            item["executions"] += entry["count"]
+            item["total_ms"] += entry["total_seconds"] * 1000
+
+        results = sorted(ranked.values(), key=lambda item: item["total_ms"], reverse=True)[:limit]
+        for item in results:
+            item["total_ms"] = round(item["total_ms"], 3)
+        return results
+
+    def slow_queries(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Return the queries with full scans or temp B-trees, slowest in total first"""
+        with self._lock:
+            entries = [
+                entry for entry in self._queries.values()
+                if entry.get("plan") is not None and (entry["full_scans"] or entry["temp_btrees"])
+            ]
+            entries = sorted(entries, key=lambda entry: entry["total_seconds"], reverse=True)[:limit]
+            return [{
+                "query": entry["query"],
+                "count": entry["count"],
+                "avg_ms": round(entry["total_seconds"] * 1000 / entry["count"], 3),
+                "max_ms": round(entry["max_seconds"] * 1000, 3),
+                "full_scans": list(entry["full_scans"]),
+                "temp_btrees": list(entry["temp_btrees"]),
+                "like_columns": list(entry["columns"]["like"]),
+                "function_columns": list(entry["columns"]["function"]),
+            } for entry in entries]
+
+    def report(self, limit: int = 10) -> Dict[str, Any]:
+        """Return the advisor counters, slowest scanning queries and ranked index recommendations"""
+        with self._lock:
+            explained = [entry for entry in self._queries.values() if entry.get("plan") is not None]
+            summary = {
+                "enabled": settings.QUERY_ADVISOR_ENABLED,
+                "observations": self.observations,
+                "distinct_queries": len(self._queries),
+                "full_scan_queries": sum(1 for entry in explained if entry["full_scans"]),
+                "temp_btree_queries": sum(1 for entry in explained if entry["temp_btrees"]),
+                "explain_errors": self.explain_errors,
+            }
+        summary["slow_queries"] = self.slow_queries(limit)
+        summary["recommendations"] = self.recommendations(limit)
+        return summary
+
+# Create a singleton instance
+query_advisor = QueryPlanAdvisor()
@@ -0,0 +1,238 @@
+"""
+Query Execution Budget
+
+This module bounds the work a single generated query may do against the HR
+database. HR connections are opened with BudgetConnection, whose cursors
+install a SQLite progress handler while an ExecutionBudget is active in the
+current thread. The handler interrupts the statement once it exceeds the
+maximum number of VM steps or the maximum wall time, and fetchall() stops
+as soon as the result grows past the maximum number of rows. Either way the
+query is aborted with QueryBudgetExceeded and the breach is recorded.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+# VM instructions between progress handler calls
+PROGRESS_INTERVAL = 1000
+
+# Rows fetched at a time while checking the row limit
+FETCH_BATCH_SIZE = 500
+
+# Prefix of the result text reported for a query stopped by its budget
+BUDGET_ERROR_PREFIX = "Error: Query stopped by the execution budget"
+
+LIMIT_DESCRIPTIONS = {
+    "steps": "it ran more than {maximum:,} SQLite VM steps",
+    "seconds": "it ran longer than {maximum:g} seconds",
+    "rows": "it returned more than {maximum:,} rows",
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a query runs past one of the limits of its execution budget"""
+
+    def __init__(self, limit: str, maximum: float):
+        """Record which limit was exceeded"""
+        self.limit = limit
+        self.maximum = maximum
+        self.reason = LIMIT_DESCRIPTIONS[limit].format(maximum=maximum)
+        super().__init__(f"{BUDGET_ERROR_PREFIX}: {self.reason}")
+
+
+class ExecutionBudget:
+    """Step, wall-time and row limits for the statements run while it is active (0 = no limit)"""
+
+    def __init__(self, max_steps: int = None, max_seconds: float = None, max_rows: int = None):
+        """Initialize a budget, defaulting to the configured limits"""
+        self.max_steps = max_steps if max_steps is not None else settings.QUERY_BUDGET_MAX_STEPS
+        self.max_seconds = max_seconds if max_seconds is not None else settings.QUERY_BUDGET_MAX_SECONDS
+        self.max_rows = max_rows if max_rows is not None else settings.QUERY_BUDGET_MAX_ROWS
+        self.statements = 0
+        self.steps = 0
+        self.rows = 0
+        self.started: Optional[float] = None
+        self.breach: Optional[QueryBudgetExceeded] = None
+
+    def start_statement(self) -> None:
+        """Count a statement, starting the wall clock at the first one"""
+        self.statements += 1
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Return the seconds since the first statement started"""
+        return time.perf_counter() - self.started if self.started is not None else 0.0
+
+    def progress(self) -> int:
+        """SQLite progress handler: returning non-zero interrupts the running statement"""
+        self.steps += PROGRESS_INTERVAL
+        if self.max_steps and self.steps > self.max_steps:
+            self.breach = QueryBudgetExceeded("steps", self.max_steps)
+            return 1
+        if self.max_seconds and self.elapsed() > self.max_seconds:
+            self.breach = QueryBudgetExceeded("seconds", self.max_seconds)
+            return 1
+        return 0
+
+    def add_rows(self, count: int) -> None:
+        """Count fetched rows, raising once they exceed the row limit"""
+        self.rows += count
+        if self.max_rows and self.rows > self.max_rows:
+            self.breach = QueryBudgetExceeded("rows", self.max_rows)
+            raise self.breach
+
+
+_active = threading.local()
+
+
+def active_budget() -> Optional[ExecutionBudget]:
+    """Return the execution budget active in the current thread, if any"""
+    return getattr(_active, "budget", None)
+
+
+class BudgetCursor(sqlite3.Cursor):
+    """sqlite3 cursor that enforces the active execution budget"""
+
+    def _interrupted(self, error: sqlite3.OperationalError) -> Exception:
+        """Return the budget breach behind an interrupted statement, or the original error"""
+        budget = active_budget()
+        return budget.breach if budget is not None and budget.breach is not None else error
+
+    def execute(self, sql: str, parameters=()):
+        """Execute a statement under the active budget"""
+        budget = active_budget()
+        if budget is not None:
+            budget.start_statement()
+            self.connection.set_progress_handler(budget.progress, PROGRESS_INTERVAL)
+        else:
+            self.connection.set_progress_handler(None, PROGRESS_INTERVAL)
+        try:
+            return super().execute(sql, parameters)
+        except sqlite3.OperationalError as e:
+            raise self._interrupted(e) from None
+
+    def fetchall(self) -> list:
+        """Fetch the remaining rows, stopping as soon as they exceed the row limit"""
+        budget = active_budget()
+        try:
+            if budget is None:
+                return super().fetchall()
+            if not budget.max_rows:
+                rows = super().fetchall()
+                budget.rows += len(rows)
+                return rows
+            rows = []
+            while True:
+                batch = self.fetchmany(FETCH_BATCH_SIZE)
+                if not batch:
+                    return rows
+                budget.add_rows(len(batch))
+                rows.extend(batch)
+        except sqlite3.OperationalError as e:
+            raise self._interrupted(e) from None
+
+
+class BudgetConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors enforce the active execution budget"""
+
+    def cursor(self, factory=BudgetCursor):
+        """Return a budget-enforcing cursor"""
+        return super().cursor(factory)
+
+
+class BudgetStats:
+    """Counters for budgeted query executions and their breaches"""
+
+    def __init__(self, max_recent: int = 20):
+        """Initialize empty counters"""
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.breaches = 0
+        self.breaches_by_limit = {limit: 0 for limit in LIMIT_DESCRIPTIONS}
+        self.max_steps_seen = 0
+        self.max_seconds_seen = 0.0
+        self.max_rows_seen = 0
+        self.recent_breaches = deque(maxlen=max_recent)
+
+    def record(self, budget: ExecutionBudget, query: str = "") -> None:
+        """Record a finished execution"""
+        if not budget.statements:
+            # Served from a cache; nothing ran
+            return
+        elapsed = budget.elapsed()
+        with self._lock:
+            self.queries += 1
+            self.max_steps_seen = max(self.max_steps_seen, budget.steps)
+            self.max_seconds_seen = max(self.max_seconds_seen, elapsed)
+            self.max_rows_seen = max(self.max_rows_seen, budget.rows)
+            if budget.breach is not None:
+                self.breaches += 1
+                self.breaches_by_limit[budget.breach.limit] += 1
+                self.recent_breaches.append({
+                    "limit": budget.breach.limit,
+                    "query": query,
+                    "steps": budget.steps,
+                    "elapsed_ms": round(elapsed * 1000, 3),
+                    "rows": budget.rows,
+                    "at": time.time(),
+                })
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the configured limits and breach counters"""
+        with self._lock:
+            return {
+                "enabled": settings.QUERY_BUDGET_ENABLED,
+                "max_steps": settings.QUERY_BUDGET_MAX_STEPS,
+                "max_seconds": settings.QUERY_BUDGET_MAX_SECONDS,
+                "max_rows": settings.QUERY_BUDGET_MAX_ROWS,
+                "queries": self.queries,
+                "breaches": self.breaches,
+                "breaches_by_limit": dict(self.breaches_by_limit),
+                "max_steps_seen": self.max_steps_seen,
+                "max_seconds_seen": round(self.max_seconds_seen, 3),
+                "max_rows_seen": self.max_rows_seen,
+                "recent_breaches": list(self.recent_breaches),
+            }
+
+# Create a singleton instance
+budget_stats = BudgetStats()
+
+
+@contextmanager
+def execution_budget(query: str = "") -> Iterator[Optional[ExecutionBudget]]:
+    """Enforce a fresh execution budget on the HR database statements this thread runs inside the block"""
+    if not settings.QUERY_BUDGET_ENABLED:
+        yield None
+        return
+
+    budget = ExecutionBudget()
+    previous = active_budget()
+    _active.budget = budget
+    try:
+        yield budget
+    finally:
+        _active.budget = previous
+        budget_stats.record(budget, query)
+
+
+def is_budget_error(result: str) -> bool:
+    """Check whether a query result reports a query stopped by its execution budget"""
+    return str(result).startswith(BUDGET_ERROR_PREFIX)
+
+
+def budget_answer(result: str) -> str:
+    """Explain a budget breach to the user in place of an answer"""
+    reason = str(result)[len(BUDGET_ERROR_PREFIX):].lstrip(": ")
+    return (f"The query for this question was stopped because {reason}. "
+            "Try a narrower question, for example about a single year, department or location.")
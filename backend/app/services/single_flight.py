@@ -0,0 +1,220 @@
+"""
+Single-Flight Request Coalescing
+
+This module lets concurrent identical requests share one in-flight
+execution. The first caller for a key runs the work; callers that arrive
+with the same key while it is running wait for it and receive a copy of
+its result (or its exception) instead of running it again. Streams are
+shared the same way: late subscribers replay the events published so far
+and then follow the live stream.
+"""
+
+import asyncio
+import copy
+import threading
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+
+class _Call:
+    """A synchronous call in flight"""
+
+    def __init__(self):
+        """Initialize a call with its leader as the only caller"""
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.callers = 1
+
+
+class _Flight:
+    """An asyncio task in flight"""
+
+    def __init__(self, task: asyncio.Future):
+        """Initialize a flight with its leader as the only caller"""
+        self.task = task
+        self.callers = 1
+
+
+class _Broadcast:
+    """A stream in flight: the events published so far and the subscribers following it"""
+
+    def __init__(self):
+        """Initialize an empty broadcast"""
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.callers = 1
+        self.subscribers = 0
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Future] = None
+
+    def notify(self) -> None:
+        """Wake the subscribers waiting for the next event"""
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution"""
+
+    def __init__(self, name: str):
+        """Initialize empty in-flight tables and counters"""
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._flights: Dict[str, _Flight] = {}
+        self._broadcasts: Dict[str, _Broadcast] = {}
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_shared = 0
+
+    def _record_join(self, entry) -> None:
+        """Count a caller that joined an execution already in flight (lock held)"""
+        entry.callers += 1
+        self.coalesced += 1
+        self.max_shared = max(self.max_shared, entry.callers)
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """Run func, or wait for the identical call already running in another thread"""
+        if not settings.COALESCE_ENABLED:
+            return func()
+
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self._record_join(call)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.copy(call.result)
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            # Callers arriving from now on start a fresh execution
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def ado(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await func, or the identical call already in flight on this event loop"""
+        if not settings.COALESCE_ENABLED:
+            return await func()
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.requests += 1
+            flight = self._flights.get(key)
+            if flight is None or flight.task.get_loop() is not loop:
+                flight = _Flight(loop.create_task(func()))
+                self._flights[key] = flight
+                self.executions += 1
+                flight.task.add_done_callback(lambda task: self._finish_flight(key, flight))
+            else:
+                self._record_join(flight)
+
+        # A caller that goes away doesn't cancel the execution the others are waiting for
+        result = await asyncio.shield(flight.task)
+        return copy.copy(result)
+
+    def _finish_flight(self, key: str, flight: _Flight) -> None:
+        """Forget a finished flight and count its failure, if any"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if not flight.task.cancelled() and flight.task.exception() is not None:
+                self.errors += 1
+
+    async def astream(self, key: str, factory: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Iterate the stream from factory, or subscribe to the identical stream already in flight"""
+        if not settings.COALESCE_ENABLED:
+            async for event in factory():
+                yield event
+            return
+
+        with self._lock:
+            self.requests += 1
+            broadcast = self._broadcasts.get(key)
+            if broadcast is None or broadcast.task.get_loop() is not asyncio.get_running_loop():
+                broadcast = _Broadcast()
+                broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, factory))
+                self._broadcasts[key] = broadcast
+                self.executions += 1
+            else:
+                self._record_join(broadcast)
+            broadcast.subscribers += 1
+
+        try:
+            index = 0
+            while True:
+                while index < len(broadcast.events):
+                    yield copy.copy(broadcast.events[index])
+                    index += 1
+                if broadcast.done:
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+                await broadcast.updated.wait()
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+                abandoned = broadcast.subscribers == 0 and not broadcast.done
+                if abandoned and self._broadcasts.get(key) is broadcast:
+                    del self._broadcasts[key]
+            if abandoned:
+                # Every subscriber went away, so nobody needs the rest of the stream
+                broadcast.task.cancel()
+
+    async def _pump(self, key: str, broadcast: _Broadcast, factory: Callable[[], AsyncIterator[Any]]) -> None:
+        """Publish every event of the stream to the broadcast"""
+        try:
+            async for event in factory():
+                broadcast.events.append(event)
+                broadcast.notify()
+        except Exception as e:
+            broadcast.error = e
+            with self._lock:
+                self.errors += 1
+        finally:
+            broadcast.done = True
+            with self._lock:
+                if self._broadcasts.get(key) is broadcast:
+                    del self._broadcasts[key]
+            broadcast.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many requests were served by another request's execution"""
+        with self._lock:
+            return {
+                "name": self.name,
+                "enabled": settings.COALESCE_ENABLED,
+                "requests": self.requests,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "coalesced_share": round(self.coalesced / self.requests, 4) if self.requests else 0.0,
+                "errors": self.errors,
+                "in_flight": len(self._calls) + len(self._flights) + len(self._broadcasts),
+                "max_shared": self.max_shared,
+            }
@@ -0,0 +1,184 @@
+"""
+SQL Cache Service
+
+This module provides a persistent cache of the SQL generated by the LLM for
+HR Analytics questions, so repeated questions skip the SQL-generation call.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+# Bump this whenever the SQL prompt changes so stale SQL is never served
+SQL_CACHE_VERSION = "v1"
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question so trivially different phrasings share a cache key"""
+    normalized = question.strip().lower()
+    normalized = re.sub(r"\s+", " ", normalized)
+    return normalized.rstrip("?.! ")
+
+
+def fingerprint(text: str) -> str:
+    """Return a short stable fingerprint for a block of text"""
+    if not text:
+        return ""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class SQLCache:
+    """Persistent LRU cache of generated SQL with TTL expiry"""
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None):
+        """Initialize the cache; persisted entries are loaded on first use"""
+        self.path = path if path is not None else settings.SQL_CACHE_PATH
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.SQL_CACHE_TTL_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.SQL_CACHE_MAX_ENTRIES
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._conn = None
+        self._loaded = False
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the backing store, creating it if needed"""
+        if self._conn is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sql_cache ("
+                "key TEXT PRIMARY KEY, sql TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _load(self) -> None:
+        """Load unexpired entries from the backing store, once (lock held)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            conn = self._connect()
+            if conn is None:
+                return
+            cutoff = time.time() - self.ttl_seconds
+            conn.execute("DELETE FROM sql_cache WHERE created_at < ?", (cutoff,))
+            conn.commit()
+            rows = conn.execute(
+                "SELECT key, sql, created_at FROM sql_cache ORDER BY created_at DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+            for key, sql, created_at in reversed(rows):
+                self._entries[key] = (sql, created_at)
+        except sqlite3.Error as e:
+            print(f"Error loading SQL cache: {str(e)}")
+
+    def load(self) -> None:
+        """Open the backing store and load its entries ahead of the first lookup"""
+        with self._lock:
+            self._load()
+
+    def _persist(self, statement: str, params: tuple) -> None:
+        """Write a change through to the backing store"""
+        try:
+            conn = self._connect()
+            if conn is not None:
+                conn.execute(statement, params)
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing SQL cache: {str(e)}")
+
+    def make_key(self, question: str, conversation_history: str = "", schema: str = "") -> str:
+        """Build the cache key from the question, history and schema"""
+        raw = "|".join([
+            SQL_CACHE_VERSION,
+            normalize_question(question),
+            fingerprint(conversation_history),
+            fingerprint(schema),
+        ])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached SQL for a key, or None on a miss"""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            sql, created_at = entry
+            if time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                self._persist("DELETE FROM sql_cache WHERE key = ?", (key,))
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return sql
+
+    def set(self, key: str, sql: str) -> None:
+        """Store generated SQL, evicting the least recently used entries"""
+        created_at = time.time()
+        with self._lock:
+            self._load()
+            self._entries[key] = (sql, created_at)
+            self._entries.move_to_end(key)
+            self._persist(
+                "INSERT OR REPLACE INTO sql_cache (key, sql, created_at) VALUES (?, ?, ?)",
+                (key, sql, created_at)
+            )
+
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                self._persist("DELETE FROM sql_cache WHERE key = ?", (evicted_key,))
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._load()
+            self._entries.clear()
+            self._persist("DELETE FROM sql_cache", ())
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters"""
+        with self._lock:
+            self._load()
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.SQL_CACHE_ENABLED,
+                "version": SQL_CACHE_VERSION,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+# Create a singleton instance; the backing store is opened on first use, not at import
+sql_cache = SQLCache()
@@ -0,0 +1,394 @@
+"""
+SQL Rewriter
+
+This module sits between SQL generation and execution. It rejects queries
+that are known to be expensive or unsafe to run, and rewrites the rest:
+HAVING conditions on group-by columns are pushed down into WHERE, SELECT *
+over hr_data is replaced with the columns the question needs, and the
+result is capped with a LIMIT. Every rewrite is logged together with the
+rows and latency of the query that actually ran.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+TABLE = "hr_data"
+
+# Prefix of the result text reported for a query that was not run
+REJECTED_PREFIX = "Error: Query rejected by the SQL rewriter"
+
+REJECTION_REASONS = {
+    "multiple_statements": "it contains more than one statement",
+    "not_select": "only SELECT queries can be run",
+    "recursive_cte": "it uses a recursive query",
+    "cartesian_join": "it joins tables without a join condition",
+}
+
+AGGREGATE_CALL = re.compile(r"\b(?:count|sum|avg|min|max|total|group_concat)\s*\(", re.IGNORECASE)
+
+# Words in a condition that aren't column references
+SQL_WORDS = {
+    "and", "or", "not", "in", "is", "null", "like", "glob", "regexp", "match", "between", "case", "when",
+    "then", "else", "end", "cast", "as", "collate", "nocase", "escape", "distinct", "true", "false",
+    "integer", "real", "text", "numeric", "current_date", "current_time", "current_timestamp",
+}
+
+# Words that can follow "FROM hr_data" but aren't a table alias
+CLAUSE_WORDS = {
+    "where", "group", "order", "limit", "having", "join", "left", "right", "full", "inner", "outer",
+    "cross", "natural", "window", "union", "intersect", "except", "on", "using",
+}
+
+
+def mask_sql(query: str) -> str:
+    """Blank out literals, quoted identifiers and comments, keeping every other character in place"""
+    masked = list(query)
+    i, n = 0, len(query)
+    while i < n:
+        char = query[i]
+        if char in "'\"`[":
+            close = "]" if char == "[" else char
+            j = i + 1
+            while j < n:
+                if query[j] == close:
+                    # A doubled quote is an escaped quote
+                    if close != "]" and j + 1 < n and query[j + 1] == close:
+                        j += 2
+                        continue
+                    break
+                j += 1
+            for k in range(i + 1, min(j, n)):
+                masked[k] = " "
+            i = j + 1
+        elif query.startswith("--", i):
+            j = query.find("\n", i)
+            j = n if j == -1 else j
+            for k in range(i, j):
+                masked[k] = " "
+            i = j
+        elif query.startswith("/*", i):
+            j = query.find("*/", i + 2)
+            j = n if j == -1 else j + 2
+            for k in range(i, j):
+                masked[k] = " "
+            i = j
+        else:
+            i += 1
+    return "".join(masked)
+
+
+def paren_depths(masked: str) -> List[int]:
+    """Return the parenthesis nesting depth at every character"""
+    depths, depth = [], 0
+    for char in masked:
+        if char == ")":
+            depth = max(0, depth - 1)
+        depths.append(depth)
+        if char == "(":
+            depth += 1
+    return depths
+
+
+def top_level(pattern: str, masked: str, depths: List[int], start: int = 0, end: int = None) -> List[re.Match]:
+    """Return the matches of a pattern outside any parentheses, within [start, end)"""
+    end = len(masked) if end is None else end
+    return [
+        match for match in re.compile(pattern, re.IGNORECASE).finditer(masked, start, end)
+        if depths[match.start()] == 0
+    ]
+
+
+def statement_end(masked: str) -> int:
+    """Return the position just after the statement, before any trailing semicolon, whitespace or comment"""
+    return len(masked.rstrip().rstrip(";").rstrip())
+
+
+def rejection_reason(query: str) -> str:
+    """Return why a query shouldn't run at all, or an empty string"""
+    masked = mask_sql(query)
+    body = masked[:statement_end(masked)]
+    if ";" in body:
+        return "multiple_statements"
+    if not re.match(r"\s*(?:select|with)\b", body, re.IGNORECASE):
+        return "not_select"
+    if re.search(r"\bwith\s+recursive\b", body, re.IGNORECASE):
+        return "recursive_cte"
+
+    joins = len(re.findall(r"\bjoin\b", body, re.IGNORECASE))
+    natural_joins = len(re.findall(r"\bnatural\s+(?:\w+\s+)?join\b", body, re.IGNORECASE))
+    conditions = len(re.findall(r"\b(?:on|using)\b", body, re.IGNORECASE))
+    comma_join = re.search(r"\bfrom\s+[\w.]+(?:\s+(?:as\s+)?\w+)?\s*,", body, re.IGNORECASE)
+    if re.search(r"\bcross\s+join\b", body, re.IGNORECASE) or joins - natural_joins > conditions or \
+            (comma_join and not re.search(r"\bwhere\b", body, re.IGNORECASE)):
+        return "cartesian_join"
+    return ""
+
+
+def mask_subqueries(masked: str, depths: List[int]) -> str:
+    """Blank out every parenthesized subquery, keeping every other character in place"""
+    blanked = list(masked)
+    for match in re.finditer(r"\(\s*select\b", masked, re.IGNORECASE):
+        opened = match.start()
+        close = next((i for i in range(opened + 1, len(masked)) if masked[i] == ")" and depths[i] == depths[opened]), len(masked))
+        for i in range(opened + 1, close):
+            blanked[i] = " "
+    return "".join(blanked)
+
+
+def is_compound(masked: str, depths: List[int]) -> bool:
+    """Check whether the top-level query is a UNION/INTERSECT/EXCEPT"""
+    return bool(top_level(r"\b(?:union|intersect|except)\b", masked, depths))
+
+
+def push_down_having(query: str) -> Optional[str]:
+    """Move HAVING conditions that only test group-by columns into WHERE, so fewer rows are grouped"""
+    masked = mask_sql(query)
+    depths = paren_depths(masked)
+    end = statement_end(masked)
+    group_by = top_level(r"\bgroup\s+by\b", masked, depths, 0, end)
+    having = top_level(r"\bhaving\b", masked, depths, 0, end)
+    if is_compound(masked, depths) or len(group_by) != 1 or len(having) != 1 or having[0].start() < group_by[0].end():
+        return None
+    group_by, having = group_by[0], having[0]
+
+    following = top_level(r"\b(?:order\s+by|limit|window)\b", masked, depths, having.end(), end)
+    having_end = following[0].start() if following else end
+    if top_level(r"\b(?:or|between)\b", masked, depths, having.end(), having_end):
+        return None
+
+    group_columns = set()
+    for item in masked[group_by.end():having.start()].split(","):
+        match = re.fullmatch(r"\s*(?:\w+\s*\.\s*)?(\w+)\s*", item)
+        if match:
+            group_columns.add(match.group(1).lower())
+    select = top_level(r"\bselect\b", masked, depths, 0, group_by.start())
+    select_from = top_level(r"\bfrom\b", masked, depths, select[-1].end() if select else 0, group_by.start())
+    select_list = masked[select[-1].end():select_from[0].start()] if select and select_from else ""
+    aliases = {alias.lower() for alias in re.findall(r"\bas\s+(\w+)", select_list, re.IGNORECASE)}
+
+    # Split the HAVING condition on its top-level ANDs
+    bounds = [having.end()] + [
+        position for match in top_level(r"\band\b", masked, depths, having.end(), having_end)
+        for position in (match.start(), match.end())
+    ] + [having_end]
+    pushed, kept = [], []
+    for start, stop in zip(bounds[::2], bounds[1::2]):
+        text = query[start:stop].strip()
+        conjunct = masked[start:stop]
+        identifiers = {
+            word.lower() for word in re.findall(r"(?<!\w)([A-Za-z_]\w*)\b(?!\s*[.(])", conjunct)
+            if word.lower() not in SQL_WORDS
+        }
+        pushable = (
+            identifiers and identifiers <= group_columns and not identifiers & aliases
+            and not AGGREGATE_CALL.search(conjunct) and not re.search(r"\bselect\b", conjunct, re.IGNORECASE)
+        )
+        (pushed if pushable else kept).append(text)
+    if not pushed:
+        return None
+
+    where = top_level(r"\bwhere\b", masked, depths, select_from[0].end() if select_from else 0, group_by.start())
+    if where:
+        where_clause = f"WHERE ({query[where[0].end():group_by.start()].strip()}) AND {' AND '.join(pushed)} "
+        head = query[:where[0].start()]
+    else:
+        where_clause = f"WHERE {' AND '.join(pushed)} "
+        head = query[:group_by.start()].rstrip() + " "
+    having_clause = f"HAVING {' AND '.join(kept)} " if kept else ""
+    return (
+        head + where_clause + query[group_by.start():having.start()].rstrip() + " "
+        + having_clause + query[having_end:].lstrip()
+    ).rstrip()
+
+
+def project_columns(query: str, columns: List[str]) -> Optional[str]:
+    """Replace SELECT * over hr_data with the given columns"""
+    if not columns:
+        return None
+    masked = mask_sql(query)
+    depths = paren_depths(masked)
+    match = re.match(
+        rf"\s*select\s+(?:(?:distinct|all)\s+)?(?P<star>(?:(?P<qualifier>\w+)\s*\.\s*)?\*)\s+from\s+{TABLE}\b",
+        masked, re.IGNORECASE
+    )
+    if not match or is_compound(masked, depths) or re.search(r"\bjoin\b", masked, re.IGNORECASE):
+        return None
+    rest = masked[match.end():]
+    alias_match = re.match(r"\s+(?:as\s+)?(\w+)", rest, re.IGNORECASE)
+    alias = alias_match.group(1) if alias_match and alias_match.group(1).lower() not in CLAUSE_WORDS else None
+    if (rest[alias_match.end():] if alias else rest).lstrip().startswith(","):
+        # Comma join
+        return None
+    qualifier = match.group("qualifier")
+    if qualifier and qualifier.lower() not in (TABLE, (alias or "").lower()):
+        return None
+
+    def column_sql(column: str) -> str:
+        name = column if re.fullmatch(r"[A-Za-z_]\w*", column) else '"' + column.replace('"', '""') + '"'
+        return f"{qualifier}.{name}" if qualifier else name
+
+    return query[:match.start("star")] + ", ".join(column_sql(column) for column in columns) + query[match.end("star"):]
+
+
+def cap_limit(query: str, max_rows: int) -> Tuple[Optional[str], str]:
+    """Add a LIMIT to queries that can return many rows, or lower one above max_rows; returns the query and rule"""
+    masked = mask_sql(query)
+    depths = paren_depths(masked)
+    end = statement_end(masked)
+    limits = top_level(r"\blimit\b", masked, depths, 0, end)
+    if limits:
+        match = re.compile(r"limit\s+(\d+)(?:\s*,\s*(\d+))?", re.IGNORECASE).match(masked, limits[-1].start())
+        if not match:
+            # LIMIT ? or an expression
+            return None, ""
+        # LIMIT offset, count
+        group = 2 if match.group(2) else 1
+        if int(match.group(group)) <= max_rows:
+            return None, ""
+        return query[:match.start(group)] + str(max_rows) + query[match.end(group):], "limit_capped"
+
+    # A plain aggregate without GROUP BY returns a single row; only the outer select list counts, since an
+    # aggregate in a subquery or the WHERE clause doesn't reduce the outer query to one row
+    select = top_level(r"\bselect\b", masked, depths, 0, end)
+    single_row = False
+    if select and not is_compound(masked, depths) and not top_level(r"\bgroup\s+by\b", masked, depths, 0, end):
+        froms = top_level(r"\bfrom\b", masked, depths, select[-1].end(), end)
+        select_list = mask_subqueries(masked, depths)[select[-1].end():froms[0].start() if froms else end]
+        single_row = bool(AGGREGATE_CALL.search(select_list)) and not re.search(r"\bover\b\s*[(\w]", select_list, re.IGNORECASE)
+    if single_row:
+        return None, ""
+    return query[:end] + f" LIMIT {max_rows}" + query[end:], "limit_added"
+
+
+class SQLRewrite:
+    """The outcome of rewriting one query: what runs, the rules applied, or why it was rejected"""
+
+    def __init__(self, original: str, query: str, rules: List[str] = None, rejected: str = "",
+                 removed_columns: int = 0):
+        """Initialize a rewrite"""
+        self.original = original
+        self.query = query
+        self.rules = rules or []
+        self.rejected = rejected
+        self.removed_columns = removed_columns
+
+    def error(self) -> str:
+        """Return the result text reported instead of running a rejected query"""
+        return f"{REJECTED_PREFIX}: {REJECTION_REASONS[self.rejected]}"
+
+
+class SQLRewriter:
+    """Rejects or rewrites generated SQL before it runs, and logs the effect of each rewrite"""
+
+    def __init__(self, max_rows: int = None, max_recent: int = 50):
+        """Initialize empty counters"""
+        self.max_rows = max_rows if max_rows is not None else settings.SQL_REWRITE_MAX_ROWS
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.rewritten = 0
+        self.rules: Dict[str, Dict[str, float]] = {}
+        self.rejections: Dict[str, int] = {}
+        self.recent = deque(maxlen=max_recent)
+
+    def rewrite(self, query: str, columns: List[str] = None, table_columns: int = 0) -> SQLRewrite:
+        """Reject or rewrite a query; columns is the projection that replaces SELECT * over hr_data"""
+        rejected = rejection_reason(query)
+        if rejected:
+            with self._lock:
+                self.queries += 1
+                self.rejections[rejected] = self.rejections.get(rejected, 0) + 1
+            print(f"SQL rewriter rejected query ({rejected}): {query.strip()[:200]}")
+            return SQLRewrite(query, query, rejected=rejected)
+
+        rules = []
+        removed_columns = 0
+        rewritten = query
+        pushed = push_down_having(rewritten)
+        if pushed is not None:
+            rewritten = pushed
+            rules.append("having_pushdown")
+        projected = project_columns(rewritten, columns or [])
+        if projected is not None:
+            rewritten = projected
+            rules.append("projection")
+            removed_columns = max(0, table_columns - len(columns))
+        capped, rule = cap_limit(rewritten, self.max_rows)
+        if capped is not None:
+            rewritten = capped
+            rules.append(rule)
+
+        with self._lock:
+            self.queries += 1
+            if rules:
+                self.rewritten += 1
+        return SQLRewrite(query, rewritten, rules, removed_columns=removed_columns)
+
+    def record(self, rewrite: SQLRewrite, rows: Optional[int], seconds: Optional[float]) -> None:
+        """Log the rows and latency of a rewritten query that ran"""
+        if not rewrite.rules:
+            return
+        print(f"SQL rewrite ({', '.join(rewrite.rules)}): "
+              f"{rows if rows is not None else '?'} rows in "
+              f"{seconds * 1000 if seconds is not None else 0.0:.1f} ms")
+        with self._lock:
+            for rule in rewrite.rules:
+                entry = self.rules.setdefault(rule, {"count": 0, "measured": 0, "rows": 0, "seconds": 0.0, "removed_columns": 0})
+                entry["count"] += 1
+                entry["removed_columns"] += rewrite.removed_columns if rule == "projection" else 0
+                if rows is not None and seconds is not None:
+                    entry["measured"] += 1
+                    entry["rows"] += rows
+                    entry["seconds"] += seconds
+            self.recent.append({
+                "original": rewrite.original.strip(),
+                "rewritten": rewrite.query.strip(),
+                "rules": list(rewrite.rules),
+                "rows": rows,
+                "latency_ms": round(seconds * 1000, 3) if seconds is not None else None,
+                "at": time.time(),
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        """Return rewrite and rejection counters, per-rule row and latency averages, and recent rewrites"""
+        with self._lock:
+            return {
+                "enabled": settings.SQL_REWRITE_ENABLED,
+                "max_rows": self.max_rows,
+                "queries": self.queries,
+                "rewritten": self.rewritten,
+                "rejected": sum(self.rejections.values()),
+                "rejections": dict(self.rejections),
+                "rules": {
+                    rule: {
+                        "count": entry["count"],
+                        "avg_rows": round(entry["rows"] / entry["measured"], 2) if entry["measured"] else None,
+                        "avg_ms": round(entry["seconds"] * 1000 / entry["measured"], 3) if entry["measured"] else None,
+                        "removed_columns": entry["removed_columns"],
+                    }
+                    for rule, entry in self.rules.items()
+                },
+                "recent": list(self.recent),
+            }
+
+# Create a singleton instance
+sql_rewriter = SQLRewriter()
+
+
+def is_rejected_query(result: str) -> bool:
+    """Check whether a query result reports a query the rewriter refused to run"""
+    return str(result).startswith(REJECTED_PREFIX)
+
+
+def rejection_answer(result: str) -> str:
+    """Explain a rejected query to the user in place of an answer"""
+    reason = str(result)[len(REJECTED_PREFIX):].lstrip(": ")
+    return f"The query generated for this question was not run because {reason}. Try rephrasing the question."
@@ -0,0 +1,188 @@
+"""
+Stage Timing Metrics
+
+This module times the stages of a chat or HR analytics request (SQL prompt
+build, SQL generation, SQL execution, result formatting, the answer and
+analysis LLM calls, chat database commits) and exports them as Prometheus
+histograms. A request opens a Trace with trace_request(); span() records
+the stages run inside it, and the trace learns which path served the
+request (llm, mock or fast_path) along the way. When the request finishes
+every stage is observed with that path as a label, so the same stage can
+be compared across paths. The text exposition format is rendered here, so
+no Prometheus client library is needed.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+except ImportError:
+    from backend.app.core.config import settings
+
+# Histogram bucket upper bounds in seconds, from cache hits to slow LLM calls
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Path label of a request that finished before any path was chosen (e.g. it shared another request's execution)
+UNKNOWN_PATH = "none"
+
+
+def escape_label(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """Prometheus histogram with a fixed label set"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float] = DURATION_BUCKETS):
+        """Initialize an empty histogram"""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Record one observation for the given label values"""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Per-bucket counts, sum, count
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Render the histogram in the Prometheus text exposition format"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count]) for labels, (counts, total, count) in self._series.items())
+        for labelvalues, (counts, total, count) in series:
+            labels = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Trace:
+    """The stage timings of one request and the path that served it"""
+
+    def __init__(self, endpoint: str):
+        """Start timing a request"""
+        self.endpoint = endpoint
+        self.path: Optional[str] = None
+        self.spans: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Record a finished stage"""
+        with self._lock:
+            self.spans.append((stage, seconds))
+
+    def elapsed(self) -> float:
+        """Return the seconds since the request started"""
+        return time.perf_counter() - self.started
+
+
+class StageMetrics:
+    """Stage and request latency histograms"""
+
+    def __init__(self):
+        """Initialize the histograms"""
+        self.stages = Histogram(
+            "hr_stage_duration_seconds",
+            "Duration of a request stage (prompt build, LLM call, SQL execution, commit)",
+            ("endpoint", "stage", "path"),
+        )
+        self.requests = Histogram(
+            "hr_request_duration_seconds",
+            "Duration of a chat or HR analytics request",
+            ("endpoint", "path"),
+        )
+
+    def finish(self, trace: Trace) -> None:
+        """Observe every stage of a finished request, labelled with the path that served it"""
+        path = trace.path or UNKNOWN_PATH
+        for stage, seconds in trace.spans:
+            self.stages.observe(seconds, trace.endpoint, stage, path)
+        self.requests.observe(trace.elapsed(), trace.endpoint, path)
+
+    def render(self) -> str:
+        """Render all histograms for the /metrics endpoint"""
+        return "\n".join(self.stages.render() + self.requests.render()) + "\n"
+
+# Create a singleton instance
+stage_metrics = StageMetrics()
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("hr_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace of the request being served, if any"""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_request(endpoint: str) -> Iterator[Optional[Trace]]:
+    """Time a request; nested calls join the trace of the request already being timed"""
+    trace = current_trace()
+    if not settings.METRICS_ENABLED or trace is not None:
+        yield trace
+        return
+
+    trace = Trace(endpoint)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        try:
+            _current_trace.reset(token)
+        except ValueError:
+            # An abandoned stream can be closed from another context; the trace is finished either way
+            pass
+        stage_metrics.finish(trace)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a stage of the request being traced (worker threads started with asyncio.to_thread inherit the trace)"""
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(stage, time.perf_counter() - started)
+
+
+def add_span(stage: str, seconds: float) -> None:
+    """Record a stage timed by the caller, such as LLM calls that overlap"""
+    trace = current_trace()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+
+def set_path(path: str) -> None:
+    """Record which path (llm, mock, fast_path) is serving the request being traced"""
+    trace = current_trace()
+    if trace is not None:
+        trace.path = path
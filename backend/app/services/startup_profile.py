@@ -0,0 +1,99 @@
+"""
+Startup Profile
+
+This module records how long each step of a cold start takes: importing the
+application modules, upgrading the chat database, and initializing the HR
+analytics resources (LangChain imports, the HR database engine, the SQL
+prompt, the Azure OpenAI client and the schema description). Those resources
+are created on first use or by the background warm-up, so the report shows
+when the server was ready to serve requests and when it was fully warm, with
+each step's offset from the first import. It deliberately imports nothing
+from the application so it can time the rest of it.
+"""
+
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+# The application package this module was imported from ("app" or "backend.app")
+APP_PACKAGE = __name__.rsplit(".services.", 1)[0]
+
+
+class StartupProfile:
+    """Timed steps of a cold start"""
+
+    def __init__(self):
+        """Start the clock at the first import of the application"""
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._steps: List[Dict[str, Any]] = []
+        self.ready_at: Optional[float] = None
+        self.warmed_at: Optional[float] = None
+
+    def offset_ms(self, at: float) -> float:
+        """Return the milliseconds between the first import and a perf_counter reading"""
+        return round((at - self.started) * 1000, 3)
+
+    @contextmanager
+    def step(self, name: str, kind: str = "init") -> Iterator[None]:
+        """Time a startup step (kind is import, init or warmup)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._steps.append({
+                    "name": name,
+                    "kind": kind,
+                    "started_ms": self.offset_ms(started),
+                    "duration_ms": round((finished - started) * 1000, 3),
+                    "thread": threading.current_thread().name,
+                })
+
+    def import_modules(self, modules: List[str]) -> None:
+        """Import application modules (relative to the app package) one at a time, timing each"""
+        for module in modules:
+            name = f"{APP_PACKAGE}.{module}"
+            with self.step(f"import {name}", kind="import"):
+                importlib.import_module(name)
+
+    def mark_ready(self) -> None:
+        """Record that the server finished its startup events and can serve requests"""
+        self.ready_at = time.perf_counter()
+
+    def mark_warmed(self) -> None:
+        """Record that the background warm-up finished"""
+        self.warmed_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        """Return the steps in the order they started, with the ready and warm offsets"""
+        with self._lock:
+            steps = sorted(self._steps, key=lambda step: step["started_ms"])
+        totals: Dict[str, float] = {}
+        for step in steps:
+            totals[step["kind"]] = round(totals.get(step["kind"], 0.0) + step["duration_ms"], 3)
+        return {
+            "ready_ms": self.offset_ms(self.ready_at) if self.ready_at is not None else None,
+            "warmed_ms": self.offset_ms(self.warmed_at) if self.warmed_at is not None else None,
+            "import_ms": totals.get("import", 0.0),
+            "init_ms": totals.get("init", 0.0),
+            "warmup_ms": totals.get("warmup", 0.0),
+            "steps": steps,
+        }
+
+    def format_report(self) -> str:
+        """Render the report as a table for the server log"""
+        report = self.report()
+        header = f"Startup profile: ready after {report['ready_ms']} ms"
+        if report["warmed_ms"] is not None:
+            header += f", warm after {report['warmed_ms']} ms"
+        lines = [header]
+        for step in report["steps"]:
+            lines.append(f"  {step['started_ms']:>10.1f} ms  {step['duration_ms']:>10.1f} ms  {step['kind']:<7} {step['name']}")
+        return "\n".join(lines)
+
+# Create a singleton instance
+startup_profile = StartupProfile()
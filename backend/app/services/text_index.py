@@ -0,0 +1,217 @@
+"""
+HR Text Index Service
+
+This module maintains hr_data_fts, an FTS5 trigram index over the free-text
+columns of hr_data (Employee_Name, Manager, Functional_Head, Reason), kept in
+sync by triggers, and rewrites the case-insensitive substring filters the SQL
+prompt asks for (LOWER(col) LIKE LOWER('%x%')) into index-backed MATCH
+lookups with the same results.
+"""
+
+import re
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Handle imports for both direct and package execution
+try:
+    from app.services.sql_rewriter import mask_sql, paren_depths, top_level, statement_end
+except ImportError:
+    from backend.app.services.sql_rewriter import mask_sql, paren_depths, top_level, statement_end
+
+FTS_TABLE = "hr_data_fts"
+TEXT_COLUMNS = ["employee_name", "manager", "functional_head", "reason"]
+
+# The trigram tokenizer can't match needles shorter than one trigram
+MIN_NEEDLE_LENGTH = 3
+
+
+def create_text_index(conn: sqlite3.Connection) -> None:
+    """Create the FTS5 index and the triggers that keep it in sync with hr_data"""
+    columns = ", ".join(TEXT_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in TEXT_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in TEXT_COLUMNS)
+
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({columns}, "
+        f"content='hr_data', content_rowid='id', tokenize='trigram case_sensitive 0')"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON hr_data BEGIN\n"
+        f"    INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});\nEND"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON hr_data BEGIN\n"
+        f"    INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});\nEND"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON hr_data BEGIN\n"
+        f"    INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});\n"
+        f"    INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});\nEND"
+    )
+    conn.commit()
+
+
+def rebuild_text_index(conn: sqlite3.Connection) -> int:
+    """Create the index if needed and rebuild it from hr_data, returning the number of indexed rows"""
+    create_text_index(conn)
+    conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+    conn.commit()
+    return conn.execute("SELECT COUNT(*) FROM hr_data").fetchone()[0]
+
+
+def drop_text_index(conn: sqlite3.Connection) -> None:
+    """Drop the index and its triggers"""
+    for action in ("insert", "delete", "update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{action}")
+    conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    conn.commit()
+
+
+def text_index_exists(db_path: str) -> bool:
+    """Check whether the text index exists in the HR database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).fetchone()
+        return row is not None
+    finally:
+        conn.close()
+
+
+def is_text_index_table(table: str) -> bool:
+    """Check whether a table is the FTS5 index or one of its shadow tables"""
+    return table == FTS_TABLE or table.startswith(f"{FTS_TABLE}_")
+
+
+# LOWER(col) LIKE LOWER('%x%'), LOWER(col) LIKE '%x%' or col LIKE '%x%', optionally table-qualified
+_column = "|".join(TEXT_COLUMNS)
+LIKE_PATTERN = re.compile(
+    rf"(?<![\w.])(?P<lower>lower\s*\(\s*)?(?:(?P<qualifier>\w+)\s*\.\s*)?\"?(?P<column>{_column})\"?"
+    rf"(?(lower)\s*\))\s+like\s+(?P<lower_value>lower\s*\(\s*)?'(?P<pattern>(?:[^']|'')*)'(?(lower_value)\s*\))"
+    rf"(?!\s*escape\b)",
+    re.IGNORECASE,
+)
+
+
+def _match_predicate(match: re.Match) -> Optional[str]:
+    """Return the MATCH lookup equivalent to a LIKE predicate, or None if it isn't equivalent"""
+    pattern = match.group("pattern").replace("''", "'")
+    needle = pattern[1:-1]
+    equivalent = (
+        len(pattern) >= 2 and pattern.startswith("%") and pattern.endswith("%")
+        # Only plain substrings: no further wildcards
+        and not any(char in needle for char in "%_")
+        and len(needle) >= MIN_NEEDLE_LENGTH
+        # LIKE and LOWER() only fold ASCII case, while the tokenizer folds all of Unicode
+        and needle.isascii()
+    )
+    if not equivalent:
+        return None
+
+    phrase = '"' + needle.replace('"', '""') + '"'
+    expression = f"{match.group('column').lower()} : {phrase}".replace("'", "''")
+    rowid = f"{match.group('qualifier')}.rowid" if match.group("qualifier") else "rowid"
+    return f"{rowid} IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH '{expression}')"
+
+
+def is_single_hr_data_select(query: str) -> bool:
+    """Return whether the query is one SELECT reading only hr_data, so rowid refers to hr_data's rows"""
+    # Ignore keywords inside string literals, e.g. LIKE '%select%'
+    code = re.sub(r"'(?:[^']|'')*'", "''", query)
+    return (
+        re.match(r"\s*select\b", code, re.IGNORECASE) is not None
+        # A CTE, subquery or derived table adds a SELECT; in the outer query rowid isn't hr_data's
+        and len(re.findall(r"\bselect\b", code, re.IGNORECASE)) == 1
+        # hr_data (optionally aliased) is the only source: no joins or comma-separated tables
+        and re.search(
+            r"\bfrom\s+\"?hr_data\"?(?:\s+(?:as\s+)?\w+)?\s*(?:;?\s*$|\b(?:where|group|order|limit)\b)",
+            code, re.IGNORECASE,
+        ) is not None
+        and re.search(r"\bjoin\b", code, re.IGNORECASE) is None
+    )
+
+
+def where_conjuncts(query: str) -> List[Tuple[int, int]]:
+    """Return the spans of the top-level AND-ed conditions of the WHERE clause, without enclosing parentheses"""
+    masked = mask_sql(query)
+    depths = paren_depths(masked)
+    end = statement_end(masked)
+    where = top_level(r"\bwhere\b", masked, depths, 0, end)
+    if len(where) != 1:
+        return []
+    start = where[0].end()
+    clauses = top_level(r"\b(?:group\s+by|having|order\s+by|limit|window)\b", masked, depths, start, end)
+    clause_end = clauses[0].start() if clauses else end
+
+    bounds, begin = [], start
+    for match in top_level(r"\band\b", masked, depths, start, clause_end):
+        bounds.append((begin, match.start()))
+        begin = match.end()
+    bounds.append((begin, clause_end))
+
+    spans = []
+    for begin, finish in bounds:
+        while True:
+            while begin < finish and masked[begin].isspace():
+                begin += 1
+            while finish > begin and masked[finish - 1].isspace():
+                finish -= 1
+            if finish - begin < 2 or masked[begin] != "(":
+                break
+            close = next(i for i in range(begin + 1, len(masked)) if masked[i] == ")" and depths[i] == depths[begin])
+            if close != finish - 1:
+                break
+            begin, finish = begin + 1, finish - 1
+        spans.append((begin, finish))
+    return spans
+
+
+class TextSearchRewriter:
+    """Rewrites substring LIKE filters on hr_data text columns into FTS5 MATCH lookups"""
+
+    def __init__(self):
+        """Initialize empty counters"""
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.rewritten_queries = 0
+        self.rewritten_predicates = 0
+        self.skipped_predicates = 0
+
+    def rewrite(self, query: str) -> Tuple[str, int]:
+        """Return the query with eligible LIKE predicates rewritten, and how many were rewritten"""
+        rewritten_count = 0
+        rewritten = query
+
+        # Only a whole top-level WHERE condition is equivalent: elsewhere (in the select list, a CASE, under NOT
+        # or OR) a LIKE on a NULL column gives NULL, while rowid IN (...) gives 0
+        if is_single_hr_data_select(query):
+            for begin, finish in reversed(where_conjuncts(query)):
+                match = LIKE_PATTERN.fullmatch(query, begin, finish)
+                replacement = _match_predicate(match) if match else None
+                if replacement is not None:
+                    rewritten = rewritten[:begin] + replacement + rewritten[finish:]
+                    rewritten_count += 1
+        skipped_count = len(LIKE_PATTERN.findall(query)) - rewritten_count
+
+        with self._lock:
+            self.queries += 1
+            if rewritten_count:
+                self.rewritten_queries += 1
+            self.rewritten_predicates += rewritten_count
+            self.skipped_predicates += skipped_count
+        return rewritten, rewritten_count
+
+    def stats(self) -> Dict[str, Any]:
+        """Return rewrite counters"""
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "rewritten_queries": self.rewritten_queries,
+                "rewritten_predicates": self.rewritten_predicates,
+                "skipped_predicates": self.skipped_predicates,
+            }
+
+# Create a singleton instance
+text_search_rewriter = TextSearchRewriter()
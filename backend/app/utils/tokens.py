@@ -0,0 +1,23 @@
+"""
+Token Utilities
+
+This module estimates LLM token counts for prompt text, using tiktoken
+when it is installed and a character-based approximation otherwise.
+"""
+
+# Use tiktoken if available for exact GPT-4o token counts
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
@@ -0,0 +1,415 @@
+"""
+Benchmark Chat API
+
+This script load tests the backend end to end. For each dataset scale it
+generates an HR database, starts the backend with uvicorn against it (and
+against the fake Azure OpenAI server, or the rule-based mock path),
+registers users through /api/auth/register, then drives /api/chat,
+/api/conversations and /api/hr-analytics/query with a configurable number
+of concurrent clients. It reports throughput and p50/p95/p99 latency per
+endpoint and saves the results as JSON, tagged with the git commit, so
+runs can be compared across commits.
+
+Usage:
+  python benchmark_chat_api.py
+  python benchmark_chat_api.py --scales 1000,10000 --users 20 --concurrency 16 --rounds 5
+  python benchmark_chat_api.py --llm mock --json results.json
+  python benchmark_chat_api.py --json after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENDPOINTS = ["register", "chat", "conversations", "hr_analytics_query"]
+
+# Questions the simulated users ask; repeats are deliberate so caches see realistic traffic
+QUESTIONS = [
+    "What is the attrition rate by department?",
+    "Show headcount by location",
+    "What are the most common reasons for leaving?",
+    "How many employees are there by gender?",
+    "Which managers have the most reportees?",
+    "What is the monthly headcount trend?",
+    "What is the attrition rate in Sales for 2024?",
+    "Compare attrition between age groups",
+]
+
+DEPARTMENTS = ["IT", "HR", "Finance", "Marketing", "Sales", "Operations", "Customer Support", "R&D"]
+LOCATIONS = ["New York", "San Francisco", "Chicago", "Austin", "Seattle", "Boston", "Atlanta", "Denver"]
+BANDS = ["Entry", "Junior", "Mid", "Senior", "Lead", "Manager", "Director", "VP"]
+PROCESSES = ["Development", "Testing", "Design", "Analysis", "Support", "Management", "Administration"]
+REASONS = ["Better opportunity", "Relocation", "Personal reasons", "Work environment", "Compensation",
+           "Career growth", "Health issues", "Family reasons"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October",
+          "November", "December"]
+FIRST_NAMES = ["James", "John", "Robert", "Mary", "Patricia", "Jennifer", "Linda", "Michael", "Susan", "Sarah"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Jones", "Brown", "Davis", "Miller", "Wilson", "Moore", "Taylor"]
+
+HR_COLUMNS = [
+    "month", "date", "month_year", "year", "count", "emp_id", "employee_name", "date_of_birth", "age", "gender",
+    "date_of_joining", "band", "designation", "process", "voice_non_voice", "account_name", "domain", "department",
+    "manager", "functional_head", "location", "sub_location", "country", "date_of_resignation", "last_working_day",
+    "date_of_intimation_of_attrition", "reason", "voluntary_involuntary", "nascom_attrition_analysis", "new_country",
+    "active_count", "new_hire", "opening_hc", "overall_inactive_count", "inactive_count", "age_group", "tenure_bucket",
+]
+INTEGER_COLUMNS = {"year", "count", "age", "active_count", "new_hire", "opening_hc", "overall_inactive_count",
+                   "inactive_count"}
+
+
+def age_group(age: int) -> str:
+    """Return the age group label used by the demo data"""
+    for limit, label in ((26, "20-25"), (31, "26-30"), (36, "31-35"), (41, "36-40"), (46, "41-45"), (51, "46-50")):
+        if age < limit:
+            return label
+    return "51+"
+
+
+def tenure_bucket(years: int) -> str:
+    """Return the tenure bucket label used by the demo data"""
+    for limit, label in ((1, "<1 year"), (3, "1-2 years"), (6, "3-5 years"), (11, "6-10 years")):
+        if years < limit:
+            return label
+    return "10+ years"
+
+
+def generate_dataset(path: str, employees: int, seed: int) -> int:
+    """Create an HR database with monthly 2023-2024 records for the given number of employees"""
+    rng = random.Random(seed)
+    today = datetime(2025, 1, 1)
+    conn = sqlite3.connect(path)
+    columns = ", ".join(f"{column} {'INTEGER' if column in INTEGER_COLUMNS else 'TEXT'}" for column in HR_COLUMNS)
+    conn.execute(f"CREATE TABLE hr_data (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+    for column in ("month", "year", "department", "location", "band", "process", "gender"):
+        conn.execute(f"CREATE INDEX idx_{column} ON hr_data ({column})")
+
+    rows = 0
+    insert = f"INSERT INTO hr_data ({', '.join(HR_COLUMNS)}) VALUES ({', '.join('?' for _ in HR_COLUMNS)})"
+    for i in range(1, employees + 1):
+        age = rng.randint(25, 55)
+        years_employed = rng.randint(0, 10)
+        joined = today - timedelta(days=years_employed * 365 + rng.randint(0, 364))
+        inactive = rng.random() < 0.15
+        resigned = joined + timedelta(days=rng.randint(30, max(30, (today - joined).days))) if inactive else None
+        voluntary = rng.choice(["Voluntary", "Involuntary"]) if inactive else None
+        department = rng.choice(DEPARTMENTS)
+        band = rng.choice(BANDS)
+        employee = {
+            "emp_id": f"EMP{i:06d}",
+            "employee_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "date_of_birth": (today - timedelta(days=age * 365)).strftime("%Y-%m-%d"),
+            "age": age,
+            "gender": rng.choice(["Male", "Female"]),
+            "date_of_joining": joined.strftime("%Y-%m-%d"),
+            "band": band,
+            "designation": band,
+            "process": rng.choice(PROCESSES),
+            "voice_non_voice": "Non_Voice" if department in ("IT", "Finance", "R&D") else "Voice",
+            "account_name": "Main Account",
+            "domain": "Corporate",
+            "department": department,
+            "manager": f"Manager{rng.randint(1, max(5, employees // 50))}",
+            "functional_head": f"Head{rng.randint(1, 3)}",
+            "location": rng.choice(LOCATIONS),
+            "sub_location": "Main Office",
+            "country": "USA",
+            "date_of_resignation": resigned.strftime("%Y-%m-%d") if resigned else None,
+            "last_working_day": (resigned + timedelta(days=rng.randint(14, 30))).strftime("%Y-%m-%d") if resigned else None,
+            "date_of_intimation_of_attrition": resigned.strftime("%Y-%m-%d") if resigned else None,
+            "reason": rng.choice(REASONS) if inactive else None,
+            "voluntary_involuntary": voluntary,
+            "nascom_attrition_analysis": voluntary,
+            "new_country": "USA",
+            "active_count": 0 if inactive else 1,
+            "new_hire": 1 if years_employed < 1 else 0,
+            "opening_hc": 1,
+            "overall_inactive_count": 1 if inactive else 0,
+            "inactive_count": 1 if inactive else 0,
+            "age_group": age_group(age),
+            "tenure_bucket": tenure_bucket(years_employed),
+        }
+
+        records = []
+        for year in (2023, 2024):
+            for month_index, month in enumerate(MONTHS, 1):
+                month_date = datetime(year, month_index, 1)
+                if month_date < joined or (resigned and month_date > resigned):
+                    continue
+                record = dict(employee, month=month, date=month_date.strftime("%Y-%m-%d"),
+                              month_year=f"{month} {year}", year=year, count=1)
+                records.append(tuple(record[column] for column in HR_COLUMNS))
+        conn.executemany(insert, records)
+        rows += len(records)
+
+    conn.commit()
+    conn.close()
+    return rows
+
+
+def dataset_path(data_dir: str, employees: int, seed: int) -> str:
+    """Return the path of a dataset, generating it the first time"""
+    path = os.path.join(data_dir, f"hr_{employees}_{seed}.db")
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        rows = generate_dataset(path + ".tmp", employees, seed)
+        os.replace(path + ".tmp", path)
+        print(f"Generated {path}: {employees} employees, {rows} rows in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def start_process(args: list, env: dict, log_path: str) -> subprocess.Popen:
+    """Start a background process from the backend directory, logging to a file"""
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_for(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    """Wait until a URL answers, failing if the process exits or the timeout passes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before {url} came up")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout:g}s")
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    """Terminate a background process"""
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def percentile(ordered: list, share: float) -> float:
+    """Return the nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(share * len(ordered))) - 1))]
+
+
+def summarize(samples: list, wall_seconds: float) -> dict:
+    """Return the throughput and latency percentiles of an endpoint's samples"""
+    latencies = sorted(latency for latency, ok in samples)
+    errors = sum(1 for latency, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / wall_seconds, 3) if wall_seconds else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+async def timed(samples: dict, endpoint: str, request) -> httpx.Response:
+    """Send a request and record its latency and success under an endpoint"""
+    started = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response, ok = None, False
+    samples.setdefault(endpoint, []).append(((time.perf_counter() - started) * 1000, ok))
+    return response
+
+
+async def register_users(client: httpx.AsyncClient, users: int, samples: dict) -> list:
+    """Register and log in the simulated users, returning their auth headers"""
+    headers = []
+    run_id = f"{int(time.time())}{os.getpid()}"
+    for i in range(users):
+        email = f"bench{run_id}_{i}@example.com"
+        await timed(samples, "register", client.post("/api/auth/register", json={
+            "email": email, "password": "benchmark", "name": f"Bench {i}",
+        }))
+        response = await client.post("/api/auth/login", data={"username": email, "password": "benchmark"})
+        if response.status_code == 200:
+            headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+    return headers
+
+
+async def simulate_user(client: httpx.AsyncClient, headers: dict, rounds: int, rng: random.Random,
+                        samples: dict) -> None:
+    """Run one client: each round sends a chat message, lists conversations and asks HR analytics directly"""
+    conversation_id = None
+    for _ in range(rounds):
+        message = {"role": "user", "content": rng.choice(QUESTIONS)}
+        if conversation_id:
+            message["conversation_id"] = conversation_id
+        response = await timed(samples, "chat", client.post("/api/chat", json=message, headers=headers))
+        if response is not None and response.status_code == 200:
+            conversation_id = response.json()["conversation"]["conversation_id"]
+        await timed(samples, "conversations", client.get("/api/conversations", headers=headers))
+        await timed(samples, "hr_analytics_query", client.post("/api/hr-analytics/query", json={
+            "query": rng.choice(QUESTIONS),
+        }, headers=headers))
+
+
+async def drive(base_url: str, users: int, concurrency: int, rounds: int, seed: int, timeout: float) -> dict:
+    """Register users and run the concurrent workload, returning per-endpoint summaries"""
+    samples = {}
+    limits = httpx.Limits(max_connections=concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        headers = await register_users(client, users, samples)
+        register_seconds = time.perf_counter() - started
+        if not headers:
+            raise RuntimeError("No user could log in")
+
+        # One task per client; clients take turns over the registered users
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_user(client, headers[i % len(headers)], rounds, random.Random(seed + i), samples)
+            for i in range(concurrency)
+        ))
+        wall_seconds = time.perf_counter() - started
+
+    results = {"wall_seconds": round(wall_seconds, 3), "endpoints": {}}
+    for endpoint in ENDPOINTS:
+        if endpoint in samples:
+            seconds = register_seconds if endpoint == "register" else wall_seconds
+            results["endpoints"][endpoint] = summarize(samples[endpoint], seconds)
+    workload = [sample for endpoint, endpoint_samples in samples.items() if endpoint != "register"
+                for sample in endpoint_samples]
+    results["total"] = summarize(workload, wall_seconds)
+    return results
+
+
+def run_scale(args, employees: int, work_dir: str, fake_url: str) -> dict:
+    """Benchmark the backend against one dataset scale"""
+    hr_path = dataset_path(args.data_dir, employees, args.seed)
+    env = dict(os.environ,
+               HR_DATABASE_URL=f"sqlite:///{hr_path}",
+               DATABASE_URL=f"sqlite:///{os.path.join(work_dir, f'chat_{employees}.db')}",
+               SQL_CACHE_PATH=os.path.join(work_dir, f"sql_cache_{employees}.db"),
+               API_KEY="fake" if fake_url else "",
+               AZURE_OPENAI_ENDPOINT=fake_url)
+    base_url = f"http://127.0.0.1:{args.port}"
+    backend = start_process(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env, os.path.join(work_dir, f"backend_{employees}.log"),
+    )
+    try:
+        wait_for(base_url + "/", backend)
+        print(f"Scale {employees} employees: {args.users} users, {args.concurrency} clients x {args.rounds} rounds")
+        results = asyncio.run(drive(base_url, args.users, args.concurrency, args.rounds, args.seed, args.timeout))
+    finally:
+        stop_process(backend)
+    with sqlite3.connect(hr_path) as conn:
+        results["rows"] = conn.execute("SELECT COUNT(*) FROM hr_data").fetchone()[0]
+    results["employees"] = employees
+    return results
+
+
+def git_commit() -> str:
+    """Return the commit the benchmark ran against"""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_results(report: dict, baseline: dict = None) -> None:
+    """Print the per-endpoint table of every scale, with p95 deltas against a baseline report"""
+    baseline_scales = {scale["employees"]: scale for scale in (baseline or {}).get("scales", [])}
+    for scale in report["scales"]:
+        print(f"\n{scale['employees']} employees ({scale['rows']} rows), workload {scale['wall_seconds']:.1f}s")
+        header = f"{'endpoint':<20} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        print(header + (f" {'p95 vs base':>11}" if baseline else ""))
+        previous = baseline_scales.get(scale["employees"], {})
+        for endpoint, stats in list(scale["endpoints"].items()) + [("total", scale["total"])]:
+            line = (f"{endpoint:<20} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput_rps']:>8.2f} "
+                    f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+            before = (previous.get("endpoints", {}).get(endpoint) if endpoint != "total" else previous.get("total"))
+            if baseline and before and before["p95_ms"]:
+                line += f" {(stats['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:>+10.1f}%"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the chat API against generated HR datasets")
+    parser.add_argument("--scales", default="1000,5000", help="Comma-separated employee counts to generate")
+    parser.add_argument("--users", type=int, default=10, help="Users to register per scale")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--rounds", type=int, default=5, help="Chat/conversations/HR query rounds per client")
+    parser.add_argument("--llm", choices=["fake", "mock"], default="fake",
+                        help="fake: production path against fake_azure_openai.py; mock: rule-based development path")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Fake LLM latency")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Fake LLM latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake LLM error rate")
+    parser.add_argument("--port", type=int, default=8200, help="Port for the backend under test")
+    parser.add_argument("--fake-port", type=int, default=8100, help="Port for the fake Azure OpenAI server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the backend")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for datasets, questions and the fake LLM")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "hr_benchmark_data"),
+                        help="Directory for the generated HR datasets (reused across runs)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Show p95 changes against a previous results file")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("json", "compare", "data_dir")},
+        "scales": [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="hr_benchmark_") as work_dir:
+        fake, fake_url = None, ""
+        if args.llm == "fake":
+            fake = start_process(
+                [sys.executable, "fake_azure_openai.py", "--port", str(args.fake_port),
+                 "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+                 "--error-rate", str(args.error_rate), "--seed", str(args.seed)],
+                dict(os.environ), os.path.join(work_dir, "fake_azure_openai.log"),
+            )
+            fake_url = f"http://127.0.0.1:{args.fake_port}"
+            wait_for(fake_url + "/stats", fake)
+        try:
+            for employees in scales:
+                report["scales"].append(run_scale(args, employees, work_dir, fake_url))
+            if fake:
+                report["fake_llm"] = httpx.get(fake_url + "/stats").json()
+        finally:
+            if fake:
+                stop_process(fake)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Comparing against {args.compare} (commit {baseline.get('commit') or 'unknown'})")
+    print_results(report, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark HR Read Profile
+
+This script compares the latency of typical HR analytics aggregate queries
+with the default SQLite settings and with the read-optimized profile
+(HR_DB_READ_PROFILE: mode=ro, mmap_size, cache_size, temp_store=MEMORY,
+query_only), through both the HRDatabase pool and the LangChain engine.
+
+Usage:
+  python benchmark_hr_read_profile.py
+  python benchmark_hr_read_profile.py --runs 50 --immutable --json results.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from sqlalchemy import text
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.hr_db import HRDatabase, create_hr_engine
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.hr_db import HRDatabase, create_hr_engine
+
+# Aggregate queries representative of HR analytics traffic
+QUERIES = {
+    "attrition_by_department": """
+        SELECT department, SUM(overall_inactive_count) AS attrited, SUM(count) AS headcount,
+               ROUND(SUM(overall_inactive_count) * 100.0 / SUM(count), 2) AS attrition_rate
+        FROM hr_data WHERE year = 2024 GROUP BY department ORDER BY attrition_rate DESC
+    """,
+    "monthly_attrition": """
+        SELECT year, month, ROUND(SUM(overall_inactive_count) * 100.0 / SUM(count), 2) AS attrition_rate
+        FROM hr_data GROUP BY year, month ORDER BY year, month
+    """,
+    "headcount_by_location": """
+        SELECT location, COUNT(DISTINCT emp_id) AS headcount
+        FROM hr_data WHERE active_count = 1 GROUP BY location ORDER BY headcount DESC
+    """,
+    "age_group_distribution": """
+        SELECT age_group, COUNT(DISTINCT emp_id) AS count
+        FROM hr_data GROUP BY age_group ORDER BY age_group
+    """,
+    "reasons_by_band": """
+        SELECT band, reason, COUNT(*) AS count
+        FROM hr_data WHERE reason IS NOT NULL GROUP BY band, reason ORDER BY count DESC LIMIT 20
+    """,
+    "manager_search": """
+        SELECT manager, COUNT(*) AS reports
+        FROM hr_data WHERE LOWER(manager) LIKE LOWER('%son%') GROUP BY manager ORDER BY reports DESC LIMIT 10
+    """,
+}
+
+
+def time_runs(run, runs: int, warmup: int) -> list:
+    """Run a callable warmup + runs times and return the timed latencies in milliseconds"""
+    for _ in range(warmup):
+        run()
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def benchmark_profile(db_path: str, runs: int, warmup: int) -> dict:
+    """Time every query through HRDatabase and the LangChain engine with the current settings"""
+    hr_database = HRDatabase(db_path, pool_size=1)
+    engine = create_hr_engine(db_path, pool_size=1)
+    results = {}
+    try:
+        with engine.connect() as conn:
+            for name, query in QUERIES.items():
+                results[name] = {
+                    "hr_db": time_runs(lambda: hr_database.execute_query(query, use_cache=False), runs, warmup),
+                    "langchain": time_runs(lambda: conn.execute(text(query)).fetchall(), runs, warmup),
+                }
+    finally:
+        hr_database.close()
+        engine.dispose()
+    return results
+
+
+def summarize(latencies: list) -> dict:
+    """Return the median, mean and p95 of a list of latencies"""
+    ordered = sorted(latencies)
+    return {
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.mean(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HR query latency with and without the read profile")
+    parser.add_argument("--db", default=settings.HR_DATABASE_URL.replace("sqlite:///", ""),
+                        help="Path to the HR database")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed warm-up runs per query")
+    parser.add_argument("--immutable", action="store_true", help="Also open the database with immutable=1")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"HR database not found at {args.db}")
+        return
+
+    settings.HR_DB_READ_PROFILE = False
+    settings.HR_DB_IMMUTABLE = False
+    baseline = benchmark_profile(args.db, args.runs, args.warmup)
+
+    settings.HR_DB_READ_PROFILE = True
+    settings.HR_DB_IMMUTABLE = args.immutable
+    tuned = benchmark_profile(args.db, args.runs, args.warmup)
+
+    report = {"db": args.db, "runs": args.runs, "immutable": args.immutable, "queries": {}}
+    print(f"{'query':<26} {'path':<10} {'default ms':>11} {'profile ms':>11} {'speedup':>8}")
+    totals = {"hr_db": [0.0, 0.0], "langchain": [0.0, 0.0]}
+    for name in QUERIES:
+        report["queries"][name] = {}
+        for path in ("hr_db", "langchain"):
+            before = summarize(baseline[name][path])
+            after = summarize(tuned[name][path])
+            report["queries"][name][path] = {"default": before, "read_profile": after}
+            totals[path][0] += before["median_ms"]
+            totals[path][1] += after["median_ms"]
+            speedup = before["median_ms"] / after["median_ms"] if after["median_ms"] else 0.0
+            print(f"{name:<26} {path:<10} {before['median_ms']:>11.3f} {after['median_ms']:>11.3f} {speedup:>7.2f}x")
+
+    report["totals"] = {}
+    for path, (before, after) in totals.items():
+        report["totals"][path] = {"default_ms": round(before, 3), "read_profile_ms": round(after, 3)}
+        print(f"{'total (sum of medians)':<26} {path:<10} {before:>11.3f} {after:>11.3f} "
+              f"{(before / after if after else 0.0):>7.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
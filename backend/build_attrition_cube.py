@@ -0,0 +1,51 @@
+"""
+Build Attrition Cube
+
+This script creates the pre-aggregated hr_attrition_cube table in the HR
+Analytics database, installs the triggers that keep it in sync with hr_data,
+and refreshes any months that are missing or out of date.
+
+Run it after loading new monthly data, or on a schedule:
+  python build_attrition_cube.py          # refresh new/changed months only
+  python build_attrition_cube.py --full   # rebuild the whole cube
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.attrition_cube import refresh_cube, CUBE_TABLE
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.attrition_cube import refresh_cube, CUBE_TABLE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the HR attrition cube")
+    parser.add_argument("--db", default=settings.HR_DATABASE_URL.replace("sqlite:///", ""),
+                        help="Path to the HR database")
+    parser.add_argument("--full", action="store_true", help="Rebuild every month instead of only stale ones")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"HR database not found at {args.db}")
+        return
+
+    conn = sqlite3.connect(args.db)
+    try:
+        started = time.perf_counter()
+        months = refresh_cube(conn, full=args.full)
+        elapsed = time.perf_counter() - started
+        rows = conn.execute(f"SELECT COUNT(*) FROM {CUBE_TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+
+    print(f"Refreshed {len(months)} month(s) of {CUBE_TABLE} in {elapsed:.2f}s ({rows} cube rows)")
+
+
+if __name__ == "__main__":
+    main()
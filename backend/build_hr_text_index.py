@@ -0,0 +1,97 @@
+"""
+Build HR Text Index
+
+This script creates the hr_data_fts FTS5 trigram index over the free-text
+columns of hr_data (Employee_Name, Manager, Functional_Head, Reason) and
+installs the triggers that keep it in sync. While it exists, substring
+filters such as LOWER(manager) LIKE LOWER('%son%') are rewritten into index
+lookups (see TEXT_INDEX_REWRITE_ENABLED).
+
+Usage:
+  python build_hr_text_index.py          # create or rebuild the index
+  python build_hr_text_index.py --drop   # remove the index and its triggers
+  python build_hr_text_index.py --check  # check the rewrite returns the same rows as the LIKE scan
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.text_index import rebuild_text_index, drop_text_index, text_search_rewriter, FTS_TABLE
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.text_index import rebuild_text_index, drop_text_index, text_search_rewriter, FTS_TABLE
+
+# Query shapes the rewrite must leave equivalent, with the number of predicates it should rewrite
+CHECK_QUERIES = [
+    ("SELECT COUNT(*) FROM hr_data WHERE LOWER(employee_name) LIKE LOWER('%smi%')", 1),
+    ("SELECT h.manager, COUNT(*) FROM hr_data h WHERE LOWER(h.manager) LIKE '%son%' GROUP BY h.manager", 1),
+    ("SELECT COUNT(*) FROM hr_data WHERE NOT (LOWER(reason) LIKE '%better%')", 0),
+    ("SELECT COUNT(*) FROM hr_data WHERE (LOWER(manager) LIKE '%son%') AND year = 2023 AND reason LIKE '%career%'", 2),
+    ("SELECT COUNT(*) FROM hr_data WHERE reason LIKE '%career%' OR manager LIKE '%son%'", 0),
+    # Outside a WHERE condition a LIKE on a NULL column gives NULL, not 0
+    ("SELECT reason LIKE '%career%' AS x, COUNT(*) FROM hr_data GROUP BY x", 0),
+    ("SELECT CASE WHEN reason LIKE '%career%' THEN 'career' END AS r, COUNT(*) FROM hr_data GROUP BY r", 0),
+    # In an outer query over a derived table or CTE, rowid isn't hr_data's
+    ("SELECT * FROM (SELECT employee_name, manager FROM hr_data) WHERE LOWER(employee_name) LIKE '%smi%'", 0),
+    ("WITH names AS (SELECT employee_name FROM hr_data) SELECT COUNT(*) FROM names WHERE LOWER(employee_name) LIKE '%smi%'", 0),
+    ("SELECT COUNT(*) FROM hr_data WHERE manager IN (SELECT manager FROM hr_data WHERE LOWER(manager) LIKE '%son%')", 0),
+]
+
+
+def check(conn: sqlite3.Connection) -> bool:
+    """Run each check query as written and rewritten, and report whether the rows and rewrites match"""
+    passed = True
+    for query, expected in CHECK_QUERIES:
+        rewritten, count = text_search_rewriter.rewrite(query)
+        try:
+            same = Counter(conn.execute(query).fetchall()) == Counter(conn.execute(rewritten).fetchall())
+        except sqlite3.Error as e:
+            print(f"FAIL  {query}\n      {str(e)}")
+            passed = False
+            continue
+        ok = same and count == expected
+        passed = passed and ok
+        print(f"{'ok' if ok else 'FAIL':<5} {count} rewritten  {query}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or drop the HR full-text search index")
+    parser.add_argument("--db", default=settings.HR_DATABASE_URL.replace("sqlite:///", ""),
+                        help="Path to the HR database")
+    parser.add_argument("--drop", action="store_true", help="Drop the index and its triggers")
+    parser.add_argument("--check", action="store_true", help="Check the rewrite against the LIKE scan on the existing index")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"HR database not found at {args.db}")
+        return
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.drop:
+            drop_text_index(conn)
+            print(f"Dropped {FTS_TABLE}")
+            return
+        if args.check:
+            if not check(conn):
+                sys.exit(1)
+            return
+        started = time.perf_counter()
+        rows = rebuild_text_index(conn)
+        elapsed = time.perf_counter() - started
+    finally:
+        conn.close()
+
+    print(f"Rebuilt {FTS_TABLE} in {elapsed:.2f}s ({rows} rows indexed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Fake Azure OpenAI Server
+
+This script runs a local stand-in for the Azure OpenAI chat-completions API
+that AzureChatOpenAI calls, so /api/chat and /api/hr-analytics/query can be
+load tested without GPT-4o quota and without Azure's latency variance. It
+answers with scripted responses picked from the prompt: SQL in a fenced
+block for the SQL prompt, markdown tables for the answer prompt, a markdown
+analysis and a plain-text summary. Latency, jitter, error rate and
+streaming speed are configurable, and the random choices are seeded so
+runs are reproducible.
+
+Usage:
+  python fake_azure_openai.py --port 8100 --latency-ms 800 --jitter-ms 200
+  python fake_azure_openai.py --error-rate 0.05 --error-status 429 --seed 7
+  python fake_azure_openai.py --script responses.json   # extra scripted responses
+
+Then start the backend against it:
+  AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8100 API_KEY=fake uvicorn main:app
+
+A script file is a JSON list of {"kind": "sql|answer|analysis|summary|chat",
+"match": "<regex on the question or prompt>", "response": "<content>"}
+entries, tried in order before the built-in responses.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Built-in SQL per question keyword, valid against hr_data; the first match wins
+SQL_SCRIPTS = [
+    (r"reason|why", """SELECT reason, COUNT(*) AS employees
+FROM hr_data
+WHERE reason IS NOT NULL
+GROUP BY reason
+ORDER BY employees DESC
+LIMIT 2000"""),
+    (r"attrition|turnover|left|leav", """SELECT department, SUM(overall_inactive_count) AS attrited, SUM(count) AS headcount,
+       ROUND(SUM(overall_inactive_count) * 100.0 / SUM(count), 2) AS attrition_rate
+FROM hr_data
+WHERE year = 2024
+GROUP BY department
+ORDER BY attrition_rate DESC
+LIMIT 2000"""),
+    (r"headcount|how many|employees", """SELECT department, COUNT(DISTINCT emp_id) AS headcount
+FROM hr_data
+WHERE active_count = 1
+GROUP BY department
+ORDER BY headcount DESC
+LIMIT 2000"""),
+    (r"gender", """SELECT gender, COUNT(DISTINCT emp_id) AS employees
+FROM hr_data
+GROUP BY gender
+ORDER BY employees DESC
+LIMIT 2000"""),
+    (r"location|city|site", """SELECT location, COUNT(DISTINCT emp_id) AS headcount
+FROM hr_data
+GROUP BY location
+ORDER BY headcount DESC
+LIMIT 2000"""),
+    (r"manager|reportee", """SELECT manager, COUNT(DISTINCT emp_id) AS reportees
+FROM hr_data
+GROUP BY manager
+ORDER BY reportees DESC
+LIMIT 2000"""),
+]
+DEFAULT_SQL = """SELECT year, month, SUM(count) AS headcount
+FROM hr_data
+GROUP BY year, month
+ORDER BY year, month
+LIMIT 2000"""
+
+ANALYSIS = """## Analysis
+
+### Key Findings
+* The results cover **{rows}** rows of HR data
+* The largest value is concentrated in the first group listed
+
+### Recommendations
+1. Track these metrics monthly
+2. Compare against the same period last year"""
+
+SUMMARY = "The user asked about {topic}; the assistant answered with figures from the HR data."
+
+
+class FakeAzureOpenAI:
+    """Scripted chat-completions responder with configurable latency, jitter and errors"""
+
+    def __init__(self, latency_ms: float = 800.0, jitter_ms: float = 200.0, error_rate: float = 0.0,
+                 error_status: int = 429, chunk_ms: float = 20.0, chunk_words: int = 1,
+                 seed: int = 0, scripts: List[Dict[str, str]] = None):
+        """Initialize the responder and its seeded random generator"""
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.chunk_ms = chunk_ms
+        self.chunk_words = max(1, chunk_words)
+        self.scripts = scripts or []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.streamed = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def delay(self) -> float:
+        """Return the seconds to wait before the (first token of the) response"""
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self) -> bool:
+        """Decide whether this request gets an error response"""
+        with self._lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return failed
+
+    @staticmethod
+    def classify(prompt: str) -> str:
+        """Tell which backend prompt this is"""
+        if "You are a SQL expert" in prompt:
+            return "sql"
+        if "Perform detailed analysis" in prompt:
+            return "analysis"
+        if "UPDATED SUMMARY:" in prompt:
+            return "summary"
+        if "SQL RESULT:" in prompt:
+            return "answer"
+        return "chat"
+
+    @staticmethod
+    def question(prompt: str) -> str:
+        """Return the question a prompt asks, or the whole prompt"""
+        matches = re.findall(r"QUESTION:\s*(.*)", prompt)
+        return matches[-1].strip() if matches else prompt
+
+    def respond(self, prompt: str) -> str:
+        """Return the scripted content for a prompt"""
+        kind = self.classify(prompt)
+        question = self.question(prompt)
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+        for script in self.scripts:
+            if script.get("kind", kind) == kind and re.search(script.get("match", ""), question, re.IGNORECASE):
+                return script["response"]
+
+        if kind == "sql":
+            sql = next((sql for pattern, sql in SQL_SCRIPTS if re.search(pattern, question, re.IGNORECASE)), DEFAULT_SQL)
+            return f"```sql\n{sql}\n```"
+        if kind == "answer":
+            return self.answer(question, prompt)
+        if kind == "analysis":
+            result = prompt.split("Perform detailed analysis of these results:", 1)[-1]
+            return ANALYSIS.format(rows=result.count("("))
+        if kind == "summary":
+            return SUMMARY.format(topic=question[:80])
+        return "I can help with HR analytics questions such as attrition rates, headcount and leaving reasons."
+
+    @staticmethod
+    def answer(question: str, prompt: str) -> str:
+        """Turn the SQL result in an answer prompt into a markdown table"""
+        result = re.search(r"SQL RESULT:\s*(.*?)\n\s*Format your response", prompt, re.DOTALL)
+        rows = re.findall(r"\(([^()]*)\)", result.group(1) if result else "")[:20]
+        if not rows:
+            return f"No matching records were found for **{question}**."
+        lines = [f"Here are the results for **{question}**:", "", "| Group | Value |", "|-------|-------|"]
+        for row in rows:
+            values = [value.strip().strip("'") for value in row.split(",")]
+            lines.append(f"| {values[0]} | **{values[-1]}** |")
+        return "\n".join(lines)
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int, streamed: bool) -> None:
+        """Count the tokens and streams served"""
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            if streamed:
+                self.streamed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, error and token counters"""
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "errors": self.errors,
+                "streamed": self.streamed,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+def count_tokens(text: str) -> int:
+    """Approximate a token count the way the backend does (about 4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def prompt_text(messages: List[Dict[str, Any]]) -> str:
+    """Join the text of the chat messages"""
+    parts = []
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def create_app(fake: FakeAzureOpenAI) -> FastAPI:
+    """Create the FastAPI app serving the Azure chat-completions route"""
+    app = FastAPI(title="Fake Azure OpenAI")
+
+    @app.get("/stats")
+    def stats() -> Dict[str, Any]:
+        return fake.stats()
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        prompt = prompt_text(body.get("messages", []))
+        await asyncio.sleep(fake.delay())
+
+        if fake.should_fail():
+            return JSONResponse(
+                status_code=fake.error_status,
+                headers={"retry-after": "1"} if fake.error_status == 429 else None,
+                content={"error": {"code": str(fake.error_status), "message": "Injected error from the fake Azure OpenAI server"}},
+            )
+
+        content = fake.respond(prompt)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {"prompt_tokens": count_tokens(prompt), "completion_tokens": count_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not body.get("stream"):
+            fake.record_usage(usage["prompt_tokens"], usage["completion_tokens"], streamed=False)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": deployment,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def stream():
+            def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> str:
+                payload = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": deployment,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra,
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            words = re.findall(r"\S+\s*", content)
+            for start in range(0, len(words), fake.chunk_words):
+                if start:
+                    await asyncio.sleep(fake.chunk_ms / 1000)
+                yield chunk({"content": "".join(words[start:start + fake.chunk_words])})
+            yield chunk({}, "stop")
+            if include_usage:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": deployment, "choices": [], "usage": usage}
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+            fake.record_usage(usage["prompt_tokens"], usage["completion_tokens"], streamed=True)
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Azure OpenAI chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8100, help="Port to listen on")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Base latency before the response or first token")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="Uniform +/- jitter added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that get an error response")
+    parser.add_argument("--error-status", type=int, default=429, help="HTTP status of injected errors")
+    parser.add_argument("--chunk-ms", type=float, default=20.0, help="Delay between streamed chunks")
+    parser.add_argument("--chunk-words", type=int, default=1, help="Words per streamed chunk")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for jitter and error injection")
+    parser.add_argument("--script", help="JSON file of extra scripted responses")
+    args = parser.parse_args()
+
+    scripts = []
+    if args.script:
+        with open(args.script) as f:
+            scripts = json.load(f)
+
+    fake = FakeAzureOpenAI(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, chunk_ms=args.chunk_ms, chunk_words=args.chunk_words,
+        seed=args.seed, scripts=scripts,
+    )
+    print(f"Fake Azure OpenAI listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms:g}±{args.jitter_ms:g} ms, error rate {args.error_rate:g})")
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
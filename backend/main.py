@@ -1,5 +1,19 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import threading
+# Time the cold start from the first application import
+try:
+    from app.services.startup_profile import startup_profile
+except ImportError:
+    from backend.app.services.startup_profile import startup_profile
+
+with startup_profile.step("import fastapi", kind="import"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import PlainTextResponse
+# Import the application modules one at a time so the startup profile shows what each costs
+startup_profile.import_modules([
+    "core.config", "db.database", "models", "services.hr_db", "services.hr_analytics",
+    "services.chat", "api.routes.auth", "api.routes.chat", "api.routes.hr_analytics",
+])
 # Import the routers
 try:
     from app.api.routes import auth, chat, hr_analytics
@@ -12,6 +26,19 @@ try:
 except ImportError:
     # Handle relative imports when running directly
     from backend.app.core.config import settings
+# Import startup tasks
+try:
+    from app.db.init_db import upgrade_db
+    from app.services.hr_analytics import warm_up
+    from app.services.stage_metrics import stage_metrics
+    from app.services.llm_usage import usage_recorder
+    from app.services.cache_warmer import cache_warmer
+except ImportError:
+    from backend.app.db.init_db import upgrade_db
+    from backend.app.services.hr_analytics import warm_up
+    from backend.app.services.stage_metrics import stage_metrics
+    from backend.app.services.llm_usage import usage_recorder
+    from backend.app.services.cache_warmer import cache_warmer
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -34,10 +61,62 @@ app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 app.include_router(chat.router, prefix="/api", tags=["Chat"])
 app.include_router(hr_analytics.router, prefix="/api", tags=["HR Analytics"])
 
+@app.on_event("startup")
+def upgrade_database():
+    # Add tables and columns introduced since the chat database was created
+    try:
+        with startup_profile.step("upgrade chat database"):
+            upgrade_db()
+    except Exception as e:
+        print(f"Error upgrading database: {str(e)}")
+
+def warm_hr_analytics():
+    # Create the LangChain resources and build the schema caches ahead of the first request
+    try:
+        warm_up()
+    except Exception as e:
+        print(f"Error warming up HR analytics: {str(e)}")
+    startup_profile.mark_warmed()
+    print(startup_profile.format_report())
+
+@app.on_event("startup")
+def start_warm_up():
+    # Warm up in the background so requests are served while LangChain loads
+    if settings.HR_ANALYTICS_WARMUP:
+        threading.Thread(target=warm_hr_analytics, name="hr-warmup", daemon=True).start()
+
+@app.on_event("startup")
+def start_cache_warmer():
+    # Answer the most frequent past questions now and on a schedule, so they are served from cache
+    if settings.CACHE_WARMUP_ENABLED:
+        cache_warmer.start()
+
+@app.on_event("startup")
+def mark_ready():
+    # Everything the server needs before serving requests has run
+    startup_profile.mark_ready()
+    if not settings.HR_ANALYTICS_WARMUP:
+        print(startup_profile.format_report())
+
+@app.on_event("shutdown")
+def stop_cache_warmer():
+    # Don't start another warm-up run while shutting down
+    cache_warmer.stop()
+
+@app.on_event("shutdown")
+def flush_llm_usage():
+    # Write the LLM usage records still queued for the background writer
+    usage_recorder.flush()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the AI Chat API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    # Per-stage latency histograms in the Prometheus text format
+    return PlainTextResponse(stage_metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
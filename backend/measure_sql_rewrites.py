@@ -0,0 +1,110 @@
+"""
+Measure SQL Rewrites
+
+This script replays the SQL the LLM generated for HR Analytics questions
+(stored in the SQL cache) or SQL from a file through the SQL rewriter, runs
+both the original and the rewritten query under the execution budget, and
+reports the effect of each rewrite rule on row counts and latency.
+
+Usage:
+  python measure_sql_rewrites.py                      # replay the SQL cache
+  python measure_sql_rewrites.py --file queries.sql   # queries separated by ';'
+  python measure_sql_rewrites.py --runs 5 --json rewrites.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+# Handle imports for both direct and package execution
+try:
+    from app.core.config import settings
+    from app.services.hr_db import hr_db
+    from app.services.hr_analytics import rewrite_sql
+    from app.services.query_budget import execution_budget
+    from advise_hr_indexes import load_cached_queries, load_file_queries
+except ImportError:
+    from backend.app.core.config import settings
+    from backend.app.services.hr_db import hr_db
+    from backend.app.services.hr_analytics import rewrite_sql
+    from backend.app.services.query_budget import execution_budget
+    from backend.advise_hr_indexes import load_cached_queries, load_file_queries
+
+
+def run_timed(query: str, runs: int) -> dict:
+    """Run a query under the execution budget and return its row count and median latency"""
+    latencies = []
+    rows = 0
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            with execution_budget(query):
+                rows = len(hr_db.execute_query(query, use_cache=False))
+            latencies.append((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        return {"rows": None, "median_ms": None, "error": str(e)}
+    return {"rows": rows, "median_ms": round(statistics.median(latencies), 3), "error": ""}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the effect of SQL rewrites on rows and latency")
+    parser.add_argument("--file", help="Read queries from this file instead of the SQL cache")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per query")
+    parser.add_argument("--json", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    queries = load_file_queries(args.file) if args.file else load_cached_queries(settings.SQL_CACHE_PATH)
+    if not queries:
+        print("No queries to measure")
+        return
+
+    # Count every row the original queries return; steps and wall time stay bounded
+    settings.QUERY_BUDGET_MAX_ROWS = 0
+
+    report = {"queries": [], "rules": {}, "rejections": {}}
+    for query in queries:
+        rewrite = rewrite_sql("", query)
+        if rewrite.rejected:
+            report["rejections"][rewrite.rejected] = report["rejections"].get(rewrite.rejected, 0) + 1
+            report["queries"].append({"query": query, "rejected": rewrite.rejected})
+            continue
+        if not rewrite.rules:
+            continue
+
+        before = run_timed(query, args.runs)
+        after = run_timed(rewrite.query, args.runs)
+        report["queries"].append({
+            "query": query, "rewritten": rewrite.query, "rules": rewrite.rules, "original": before, "rewrite": after,
+        })
+        if before["error"] or after["error"]:
+            continue
+        for rule in rewrite.rules:
+            totals = report["rules"].setdefault(rule, {
+                "queries": 0, "rows_before": 0, "rows_after": 0, "ms_before": 0.0, "ms_after": 0.0,
+            })
+            totals["queries"] += 1
+            totals["rows_before"] += before["rows"]
+            totals["rows_after"] += after["rows"]
+            totals["ms_before"] += before["median_ms"]
+            totals["ms_after"] += after["median_ms"]
+
+    rewritten = sum(1 for item in report["queries"] if item.get("rules"))
+    print(f"Replayed {len(queries)} queries: {rewritten} rewritten, {sum(report['rejections'].values())} rejected")
+    print(f"\n{'rule':<18} {'queries':>7} {'rows before':>12} {'rows after':>11} {'ms before':>10} {'ms after':>9}")
+    for rule, totals in report["rules"].items():
+        totals["ms_before"] = round(totals["ms_before"], 3)
+        totals["ms_after"] = round(totals["ms_after"], 3)
+        print(f"{rule:<18} {totals['queries']:>7} {totals['rows_before']:>12} {totals['rows_after']:>11} "
+              f"{totals['ms_before']:>10.1f} {totals['ms_after']:>9.1f}")
+    for reason, count in report["rejections"].items():
+        print(f"rejected: {reason} ({count})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()